@@ -412,14 +412,14 @@ class BioValueClient:
     def run_workflow(
         self,
         query: str,
-        session_id: str = "default",
+        session_id: Optional[str] = None,
         max_iterations: int = 10,
     ) -> WorkflowResult:
         """运行完整工作流
         
         Args:
             query: 用户查询
-            session_id: 会话ID
+            session_id: 会话ID，为空时服务端为本次运行分配独立会话
             max_iterations: 最大迭代次数
             
         Returns:
@@ -446,12 +446,12 @@ class BioValueClient:
             created_nodes_count=result.get("created_nodes_count", 0),
         )
     
-    def chat(self, message: str, session_id: str = "default") -> ChatResponse:
+    def chat(self, message: str, session_id: Optional[str] = None) -> ChatResponse:
         """对话
         
         Args:
             message: 用户消息
-            session_id: 会话ID
+            session_id: 会话ID，为空时服务端为本次对话分配独立会话
             
         Returns:
             ChatResponse: 对话响应
@@ -5,11 +5,14 @@
 这通常是极具投资价值的"处女地"。
 """
 
+import asyncio
+
 from pydantic import BaseModel, Field
 from typing import Any
 
 from src.knowledge import get_neo4j_client
 from src.knowledge.queries import OPPORTUNITY_DISCOVERY_QUERY, HIGH_UNMET_NEED_QUERY
+from src.knowledge.models.nodes import NodeType
 from src.llms import get_llm
 from src.utils import get_logger
 
@@ -164,17 +167,15 @@ class OpportunityAnalyzer:
         """
         await self._client.connect()
         
-        # 获取适应症详情
-        indication = await self._client.get_node(indication_id)
+        # 适应症详情、在研药物与标准疗法互不依赖，在各自会话中并发查询
+        indication, drugs, soc = await asyncio.gather(
+            self._client.get_node(indication_id, NodeType.INDICATION),
+            self._client.get_drug_by_indication(indication_id),
+            self._client.get_indication_soc(indication_id),
+        )
         if not indication:
             return {"error": f"Indication {indication_id} not found"}
         
-        # 获取所有治疗该适应症的药物
-        drugs = await self._client.get_drug_by_indication(indication_id)
-        
-        # 获取标准疗法
-        soc = await self._client.get_indication_soc(indication_id)
-        
         return {
             "indication": indication,
             "current_soc": soc,
@@ -8,8 +8,12 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from src import ingestion
 from src.config import get_settings
-from src.knowledge import get_neo4j_client, init_neo4j_schema
+from src.graph import open_checkpointer
+from src.knowledge import get_neo4j_client
+from src.knowledge.neo4j_client import init_neo4j_schema, warm_up_neo4j
+from src.llms import close_llms
 from src.utils import get_logger, setup_logging
 
 from .routes import graph, data, analysis, workflow
@@ -30,11 +34,18 @@ async def lifespan(app: FastAPI):
         client = get_neo4j_client()
         await client.connect()
         await init_neo4j_schema(client)
+        await warm_up_neo4j(
+            client,
+            page_cache=settings.neo4j.warm_up_page_cache,
+            timeout=settings.neo4j.warm_up_timeout,
+        )
         logger.info("Neo4j initialized")
     except Exception as e:
         logger.warning(f"Neo4j initialization failed: {e}")
     
-    yield
+    # 启动时编译工作流图，避免首个请求承担编译开销；检查点存储随应用生命周期打开/关闭
+    async with open_checkpointer():
+        yield
     
     # 关闭
     logger.info("Shutting down BioValue-AI API...")
@@ -43,6 +54,15 @@ async def lifespan(app: FastAPI):
         await client.close()
     except Exception:
         pass
+    
+    # 关闭 LLM 客户端连接池
+    await close_llms()
+    
+    # 关闭外部 API 共享会话
+    await ingestion.shutdown_all_sessions()
+    
+    # 关闭文档解析线程池与进程池
+    ingestion.shutdown_parse_pools()
 
 
 # 创建 FastAPI 应用
@@ -119,6 +139,8 @@ def run():
         host=settings.api.host,
         port=settings.api.port,
         reload=settings.api.debug,
+        # 安装了 uvloop 可选依赖时使用 uvloop 事件循环，否则回退到 asyncio
+        loop="auto",
     )
 
 
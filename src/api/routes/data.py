@@ -7,7 +7,7 @@ from typing import Any
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
 from pydantic import BaseModel, Field
 
-from src.ingestion import WebCrawler, DocumentParser, ClinicalTrialsAPI
+from src import ingestion
 from src.utils import get_logger
 
 logger = get_logger(__name__)
@@ -69,7 +69,7 @@ class TrialResponse(BaseModel):
 @router.post("/crawl", response_model=CrawlResponse)
 async def crawl_url(request: CrawlRequest):
     """爬取网页内容"""
-    crawler = WebCrawler()
+    crawler = ingestion.WebCrawler()
     
     try:
         result = await crawler.fetch(request.url)
@@ -92,7 +92,7 @@ async def crawl_url(request: CrawlRequest):
 @router.post("/crawl/site", response_model=list[CrawlResponse])
 async def crawl_site(request: CrawlRequest):
     """爬取整个站点"""
-    crawler = WebCrawler()
+    crawler = ingestion.WebCrawler()
     
     try:
         results = await crawler.crawl_site(
@@ -128,7 +128,7 @@ async def parse_document(
     
     支持格式: PDF, DOCX, TXT
     """
-    parser = DocumentParser()
+    parser = ingestion.DocumentParser()
     
     # 检查文件类型
     filename = file.filename or "unknown"
@@ -151,7 +151,7 @@ async def parse_document(
             tmp_path = tmp.name
         
         # 解析文档
-        result = parser.parse(tmp_path)
+        result = await parser.parse_async(tmp_path)
         
         # 删除临时文件
         os.unlink(tmp_path)
@@ -179,7 +179,7 @@ async def parse_document(
 @router.post("/clinical-trials/search", response_model=list[TrialResponse])
 async def search_clinical_trials(request: TrialSearchRequest):
     """搜索 ClinicalTrials.gov"""
-    api = ClinicalTrialsAPI()
+    api = ingestion.ClinicalTrialsAPI()
     
     try:
         results = await api.search_studies(
@@ -220,7 +220,7 @@ async def search_clinical_trials(request: TrialSearchRequest):
 @router.get("/clinical-trials/{nct_id}", response_model=TrialResponse)
 async def get_clinical_trial(nct_id: str):
     """获取临床试验详情"""
-    api = ClinicalTrialsAPI()
+    api = ingestion.ClinicalTrialsAPI()
     
     try:
         study = await api.get_study(nct_id)
@@ -250,7 +250,7 @@ async def import_clinical_trial(nct_id: str):
     """导入临床试验到知识图谱"""
     from src.knowledge import get_neo4j_client
     
-    api = ClinicalTrialsAPI()
+    api = ingestion.ClinicalTrialsAPI()
     client = get_neo4j_client()
     
     try:
@@ -144,13 +144,14 @@ async def get_node(node_id: str, node_type: str | None = None):
 
 
 @router.delete("/nodes/{node_id}")
-async def delete_node(node_id: str):
+async def delete_node(node_id: str, node_type: str | None = None):
     """删除节点"""
     client = get_neo4j_client()
     
     try:
         await client.connect()
-        success = await client.delete_node(node_id)
+        nt = NodeType(node_type) if node_type else None
+        success = await client.delete_node(node_id, nt)
         
         if not success:
             raise HTTPException(status_code=404, detail="Node not found")
@@ -327,7 +328,8 @@ async def execute_query(request: QueryRequest):
     
     try:
         await client.connect()
-        results = await client.execute_query(request.query, request.parameters)
+        # 允许带 RETURN 的写语句，使用写会话
+        results = await client.execute_query(request.query, request.parameters, write=True)
         
         return QueryResponse(
             results=results,
@@ -3,13 +3,17 @@
 LangGraph 工作流 API
 """
 
+from functools import singledispatch
 from typing import Any
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
+from langchain_core.messages import AIMessage, BaseMessage
 from pydantic import BaseModel, Field
 import json
 
 from src.graph import run_workflow, run_workflow_stream
+from src.graph.nodes import extractor_node
+from src.graph.state import Task, TaskType, WorkflowState
 from src.utils import get_logger
 
 logger = get_logger(__name__)
@@ -21,7 +25,7 @@ router = APIRouter()
 class WorkflowRequest(BaseModel):
     """工作流请求"""
     query: str
-    session_id: str = "default"
+    session_id: str | None = None  # 为空时每次运行使用独立的会话
     max_iterations: int = 10
 
 
@@ -50,7 +54,43 @@ class ExtractRequest(BaseModel):
 class ChatRequest(BaseModel):
     """对话请求"""
     message: str
-    session_id: str = "default"
+    session_id: str | None = None  # 为空时每次对话使用独立的会话
+
+
+# ==================== 消息解析 ====================
+
+@singledispatch
+def _content(msg: Any) -> str:
+    """提取消息文本内容"""
+    return ""
+
+
+@_content.register
+def _(msg: BaseMessage) -> str:
+    return msg.content
+
+
+@_content.register
+def _(msg: dict) -> str:
+    return msg.get("content", "")
+
+
+@singledispatch
+def _ai_content(msg: Any) -> str | None:
+    """提取 AI 消息内容，非 AI 消息返回 None"""
+    return None
+
+
+@_ai_content.register
+def _(msg: AIMessage) -> str | None:
+    return msg.content
+
+
+@_ai_content.register
+def _(msg: dict) -> str | None:
+    if msg.get("role") == "assistant":
+        return msg.get("content", "")
+    return None
 
 
 # ==================== 工作流 API ====================
@@ -78,7 +118,7 @@ async def run_workflow_api(request: WorkflowRequest):
             raise HTTPException(status_code=500, detail="Workflow returned no state")
         
         return WorkflowResponse(
-            session_id=request.session_id,
+            session_id=final_state.get("session_id", ""),
             query=request.query,
             final_report=final_state.get("final_report", ""),
             summary=final_state.get("summary", ""),
@@ -90,7 +130,10 @@ async def run_workflow_api(request: WorkflowRequest):
                 r.model_dump() if hasattr(r, "model_dump") else r
                 for r in final_state.get("analysis_results", [])
             ],
-            extracted_entities_count=len(final_state.get("extracted_entities", [])),
+            extracted_entities_count=(
+                len(final_state.get("historical_extracted_entities", []))
+                + len(final_state.get("pending_extracted_entities", []))
+            ),
             created_nodes_count=len(final_state.get("created_nodes", [])),
         )
     except Exception as e:
@@ -114,13 +157,7 @@ async def run_workflow_stream_api(request: WorkflowRequest):
                 # 提取最新消息
                 messages = state.get("messages", [])
                 if messages:
-                    last_msg = messages[-1]
-                    content = ""
-                    if hasattr(last_msg, "content"):
-                        content = last_msg.content
-                    elif isinstance(last_msg, dict):
-                        content = last_msg.get("content", "")
-                    
+                    content = _content(messages[-1])
                     if content:
                         yield f"data: {json.dumps({'message': content}, ensure_ascii=False)}\n\n"
                 
@@ -160,22 +197,31 @@ async def extract_entities(request: ExtractRequest):
     - Trial: 临床试验信息
     - EndpointData: 终点数据
     """
-    # 构建提取任务的工作流
-    query = f"""请从以下文本中提取 {', '.join(request.target_entities)} 类型的实体:
-
-来源: {request.source}
-文本内容:
-{request.text[:5000]}
-"""
+    # 直接调用提取节点，跳过协调器/报告器的多轮编排
+    text = request.text[:5000]
+    task = Task(
+        id=f"extract_{request.source}",
+        type=TaskType.EXTRACT_DATA,
+        description="从文本中提取结构化实体",
+        parameters={
+            "text": text,
+            "source": request.source,
+            "target_entities": request.target_entities,
+        },
+    )
+    state = WorkflowState(
+        messages=[],
+        user_query=text,
+        session_id="extract_" + request.source,
+        current_task=task,
+        completed_tasks=[],
+        pending_extracted_entities=[],
+    )
     
     try:
-        final_state = await run_workflow(
-            user_input=query,
-            session_id="extract_" + request.source,
-            max_iterations=3,
-        )
+        update = await extractor_node(state)
         
-        extracted = final_state.get("extracted_entities", [])
+        extracted = update.get("pending_extracted_entities", [])
         
         return {
             "source": request.source,
@@ -208,19 +254,16 @@ async def chat(request: ChatRequest):
         response = ""
         
         for msg in reversed(messages):
-            if hasattr(msg, "content") and hasattr(msg, "type"):
-                if msg.type == "ai":
-                    response = msg.content
-                    break
-            elif isinstance(msg, dict) and msg.get("role") == "assistant":
-                response = msg.get("content", "")
+            content = _ai_content(msg)
+            if content is not None:
+                response = content
                 break
         
         if not response:
             response = final_state.get("summary", "抱歉，我无法回答这个问题。")
         
         return {
-            "session_id": request.session_id,
+            "session_id": final_state.get("session_id", ""),
             "message": request.message,
             "response": response,
         }
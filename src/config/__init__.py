@@ -1,5 +1,5 @@
 # 配置模块
-from .settings import Settings, get_settings, load_yaml_config
+from .settings import LLMConfig, Settings, get_settings, load_yaml_config
 
-__all__ = ["Settings", "get_settings", "load_yaml_config"]
+__all__ = ["LLMConfig", "Settings", "get_settings", "load_yaml_config"]
 
@@ -7,12 +7,12 @@
 """
 
 import os
-from functools import lru_cache
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import Any, Literal
 
 import yaml
-from pydantic import Field
+from pydantic import Field, PrivateAttr
 from pydantic_settings import BaseSettings
 
 
@@ -43,6 +43,9 @@ class LLMConfig(BaseSettings):
     temperature: float = 0.7
     max_tokens: int = 4096
     max_retries: int = 3
+    pool_max: int = 64  # HTTP 连接池上限
+    max_concurrency: int = 16  # 单个模型同时在途的请求数上限
+    request_compression: bool = False  # gzip 压缩较大的请求体 (需服务端支持)
 
 
 class Neo4jConfig(BaseSettings):
@@ -51,6 +54,13 @@ class Neo4jConfig(BaseSettings):
     username: str = "neo4j"
     password: str = ""
     database: str = "biovalue"
+    max_connection_pool_size: int = 100  # 驱动连接池上限
+    connection_acquisition_timeout: float = 60.0  # 从连接池获取连接的等待秒数
+    max_connection_lifetime: float = 900.0  # 连接最长存活秒数，早于服务端/负载均衡的空闲回收
+    connection_timeout: float = 10.0  # 建立 TCP 连接的超时秒数
+    keep_alive: bool = True  # TCP keep-alive，避免空闲连接被中间设备静默断开
+    warm_up_page_cache: bool = False  # 启动时调用 apoc.warmup.run 读入整个存储，大图上很慢
+    warm_up_timeout: float = 30.0  # 启动预热总时长上限秒数，超时后跳过剩余步骤
 
 
 class RedisConfig(BaseSettings):
@@ -79,7 +89,10 @@ class APIConfig(BaseSettings):
 class CrawlerConfig(BaseSettings):
     """爬虫配置"""
     max_concurrent: int = 5
-    request_delay: float = 1.0
+    connection_limit: int = 0  # 连接池总上限，0 表示 max_concurrent * 2
+    limit_per_host: int = 0  # 单主机连接上限 (按主机限速)，0 表示 max_concurrent
+    max_body_bytes: int = 5242880  # 单页正文读取上限 (5MB)，超出部分截断
+    requests_per_host: float = 2.0  # 单主机每秒请求数 (令牌桶)，0 表示不限速
     user_agent: str = "BioValue-AI/1.0"
 
 
@@ -92,6 +105,8 @@ class ParserConfig(BaseSettings):
 class IngestionConfig(BaseSettings):
     """数据摄入配置"""
     clinical_trials_api: str = "https://clinicaltrials.gov/api/v2"
+    http_cache_path: str = ""  # 外部 API GET 响应缓存 (SQLite)，为空时不缓存
+    http_cache_ttl: int = 3600  # 缓存过期秒数
     crawler: CrawlerConfig = Field(default_factory=CrawlerConfig)
     parser: ParserConfig = Field(default_factory=ParserConfig)
 
@@ -100,35 +115,76 @@ class WorkflowConfig(BaseSettings):
     """LangGraph 工作流配置"""
     max_iterations: int = 10
     recursion_limit: int = 50
-    checkpoint_enabled: bool = True
+    checkpoint_enabled: bool = False  # 按 session_id 持久化工作流会话 (需同时配置 checkpoint_path)
+    checkpoint_path: str = ""  # SQLite 检查点文件
+    max_pending_entities: int = 200  # 待入图谱实体上限，达到后暂停提取
 
 
 class Settings(BaseSettings):
-    """全局配置"""
+    """全局配置
     
-    # LLM 模型配置
-    reasoning_model: LLMConfig = Field(default_factory=LLMConfig)
-    basic_model: LLMConfig = Field(default_factory=LLMConfig)
-    extraction_model: LLMConfig = Field(default_factory=LLMConfig)
-    embedding_model: LLMConfig = Field(default_factory=LLMConfig)
-    
-    # 数据库配置
-    neo4j: Neo4jConfig = Field(default_factory=Neo4jConfig)
-    redis: RedisConfig = Field(default_factory=RedisConfig)
-    vector_db: VectorDBConfig = Field(default_factory=VectorDBConfig)
-    
-    # 服务配置
-    api: APIConfig = Field(default_factory=APIConfig)
-    ingestion: IngestionConfig = Field(default_factory=IngestionConfig)
-    workflow: WorkflowConfig = Field(default_factory=WorkflowConfig)
+    子配置在首次访问时才构建，避免每个 BaseSettings 子类在导入时重复扫描环境变量。
+    from_yaml 解析出的子配置写入 _sub_configs，优先于默认值。
+    """
     
     # 日志级别
     log_level: str = "INFO"
     
+    # 子配置后备存储
+    _sub_configs: dict[str, BaseSettings] = PrivateAttr(default_factory=dict)
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
     
+    def _sub_config(self, name: str, factory: type[BaseSettings]) -> Any:
+        """获取子配置，未注入时构建默认值"""
+        config = self._sub_configs.get(name)
+        return config if config is not None else factory()
+    
+    # LLM 模型配置
+    @cached_property
+    def reasoning_model(self) -> LLMConfig:
+        return self._sub_config("reasoning_model", LLMConfig)
+    
+    @cached_property
+    def basic_model(self) -> LLMConfig:
+        return self._sub_config("basic_model", LLMConfig)
+    
+    @cached_property
+    def extraction_model(self) -> LLMConfig:
+        return self._sub_config("extraction_model", LLMConfig)
+    
+    @cached_property
+    def embedding_model(self) -> LLMConfig:
+        return self._sub_config("embedding_model", LLMConfig)
+    
+    # 数据库配置
+    @cached_property
+    def neo4j(self) -> Neo4jConfig:
+        return self._sub_config("neo4j", Neo4jConfig)
+    
+    @cached_property
+    def redis(self) -> RedisConfig:
+        return self._sub_config("redis", RedisConfig)
+    
+    @cached_property
+    def vector_db(self) -> VectorDBConfig:
+        return self._sub_config("vector_db", VectorDBConfig)
+    
+    # 服务配置
+    @cached_property
+    def api(self) -> APIConfig:
+        return self._sub_config("api", APIConfig)
+    
+    @cached_property
+    def ingestion(self) -> IngestionConfig:
+        return self._sub_config("ingestion", IngestionConfig)
+    
+    @cached_property
+    def workflow(self) -> WorkflowConfig:
+        return self._sub_config("workflow", WorkflowConfig)
+    
     @classmethod
     def from_yaml(cls, config_path: str | Path) -> "Settings":
         """从 YAML 配置文件加载设置"""
@@ -164,11 +220,15 @@ class Settings(BaseSettings):
             ing_config = config["INGESTION"]
             settings_dict["ingestion"] = IngestionConfig(
                 clinical_trials_api=ing_config.get("clinical_trials_api", ""),
+                http_cache_path=ing_config.get("http_cache_path", ""),
+                http_cache_ttl=ing_config.get("http_cache_ttl", 3600),
                 crawler=CrawlerConfig(**ing_config.get("crawler", {})),
                 parser=ParserConfig(**ing_config.get("parser", {})),
             )
         
-        return cls(**settings_dict)
+        settings = cls()
+        settings._sub_configs.update(settings_dict)
+        return settings
 
 
 @lru_cache()
@@ -8,8 +8,23 @@
 - Reporter: 报告生成 Agent
 """
 
-from .builder import build_graph, build_graph_with_memory
+from .builder import (
+    build_graph,
+    build_graph_with_memory,
+    get_graph,
+    open_checkpointer,
+    run_workflow,
+    run_workflow_stream,
+)
 from .state import WorkflowState
 
-__all__ = ["build_graph", "build_graph_with_memory", "WorkflowState"]
+__all__ = [
+    "build_graph",
+    "build_graph_with_memory",
+    "get_graph",
+    "open_checkpointer",
+    "run_workflow",
+    "run_workflow_stream",
+    "WorkflowState",
+]
 
@@ -3,9 +3,15 @@
 构建和编译 LangGraph 工作流
 """
 
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator
+from uuid import uuid4
+
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import END, START, StateGraph
 
+from src.config import get_settings
 from src.utils import get_logger
 
 from .state import WorkflowState
@@ -22,9 +28,9 @@ logger = get_logger(__name__)
 
 def _route_from_coordinator(state: WorkflowState) -> str:
     """从协调器节点路由到下一个节点"""
-    next_node = state.next_node
+    next_node = state.get("next_node")
     
-    if not next_node or not state.should_continue:
+    if not next_node or not state.get("should_continue", True):
         return "reporter"
     
     # 映射到实际节点名称
@@ -46,7 +52,7 @@ def _route_from_coordinator(state: WorkflowState) -> str:
 
 def _route_from_node(state: WorkflowState) -> str:
     """从处理节点路由回协调器或结束"""
-    if not state.should_continue:
+    if not state.get("should_continue", True):
         return "reporter"
     
     return "coordinator"
@@ -130,43 +136,125 @@ def build_graph_with_memory():
     return graph
 
 
-# 预编译的图实例
-graph = build_graph()
+# 进程内共享的图实例，首次使用时编译
+_graph = None
+
+
+def get_graph():
+    """获取已编译的工作流图（惰性编译，进程内单例）
+    
+    未经 open_checkpointer 打开检查点存储时编译为无检查点的图。
+    """
+    global _graph
+    if _graph is None:
+        _graph = _build_base_graph().compile()
+        logger.info("Workflow graph built with no checkpointer")
+    return _graph
+
+
+@asynccontextmanager
+async def open_checkpointer() -> AsyncIterator[Any]:
+    """在应用生命周期内打开 SQLite 检查点存储，并以其编译工作流图
+    
+    未启用检查点、未配置 checkpoint_path 或未安装 langgraph-checkpoint-sqlite 时
+    编译无检查点的图，工作流状态仅保存在单次运行的内存中。
+    
+    Yields:
+        检查点存储，未启用时为 None
+    """
+    global _graph
+    config = get_settings().workflow
+    if not (config.checkpoint_enabled and config.checkpoint_path):
+        get_graph()
+        yield None
+        return
+    
+    try:
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    except ImportError:
+        logger.warning("langgraph-checkpoint-sqlite not installed, checkpointing disabled")
+        get_graph()
+        yield None
+        return
+    
+    Path(config.checkpoint_path).parent.mkdir(parents=True, exist_ok=True)
+    async with AsyncSqliteSaver.from_conn_string(config.checkpoint_path) as checkpointer:
+        _graph = _build_base_graph().compile(checkpointer=checkpointer)
+        logger.info("Workflow graph built with AsyncSqliteSaver checkpointer")
+        try:
+            yield checkpointer
+        finally:
+            # 连接随上下文关闭，之后的调用回退到无检查点的图
+            _graph = None
+
+
+# 每次运行重置的累积字段 (add_or_drain reducer 收到 None 时清空)
+_PER_RUN_FIELDS = (
+    "completed_tasks",
+    "pending_extracted_entities",
+    "historical_extracted_entities",
+    "created_nodes",
+    "created_edges",
+    "graph_query_results",
+    "analysis_results",
+)
+
+
+def _initial_state(user_input: str, session_id: str, max_iterations: int) -> dict:
+    """构建单次运行的初始状态
+    
+    启用检查点时同一 session_id 只延续消息历史；控制流字段与累积的结果字段
+    显式重置，使每次运行从协调器重新开始，结果不随会话无限增长。
+    """
+    return {
+        "messages": [{"role": "user", "content": user_input}],
+        "user_query": user_input,
+        "session_id": session_id,
+        "max_iterations": max_iterations,
+        "max_pending_entities": get_settings().workflow.max_pending_entities,
+        "current_task": None,
+        "next_node": None,
+        "should_continue": True,
+        "iteration_count": 0,
+        "final_report": "",
+        "summary": "",
+        **dict.fromkeys(_PER_RUN_FIELDS),
+    }
+
+
+def _run_config(session_id: str) -> dict:
+    """单次运行的图配置 (检查点按 thread_id 隔离)"""
+    return {
+        "configurable": {
+            "thread_id": session_id,
+        },
+        "recursion_limit": get_settings().workflow.recursion_limit,
+    }
 
 
 async def run_workflow(
     user_input: str,
-    session_id: str = "default",
+    session_id: str | None = None,
     max_iterations: int = 10,
 ) -> dict:
     """运行工作流
     
     Args:
         user_input: 用户输入
-        session_id: 会话ID
+        session_id: 会话ID，为空时每次运行使用独立的会话
         max_iterations: 最大迭代次数
         
     Returns:
         dict: 工作流最终状态
     """
-    initial_state = {
-        "messages": [{"role": "user", "content": user_input}],
-        "user_query": user_input,
-        "session_id": session_id,
-        "max_iterations": max_iterations,
-    }
-    
-    config = {
-        "configurable": {
-            "thread_id": session_id,
-        },
-        "recursion_limit": 50,
-    }
+    session_id = session_id or f"run_{uuid4().hex}"
+    initial_state = _initial_state(user_input, session_id, max_iterations)
+    config = _run_config(session_id)
     
     logger.info(f"Starting workflow with input: {user_input[:100]}...")
     
     final_state = None
-    async for state in graph.astream(
+    async for state in get_graph().astream(
         input=initial_state,
         config=config,
         stream_mode="values"
@@ -185,34 +273,24 @@ async def run_workflow(
 
 async def run_workflow_stream(
     user_input: str,
-    session_id: str = "default",
+    session_id: str | None = None,
     max_iterations: int = 10,
 ):
     """流式运行工作流
     
     Args:
         user_input: 用户输入
-        session_id: 会话ID
+        session_id: 会话ID，为空时每次运行使用独立的会话
         max_iterations: 最大迭代次数
         
     Yields:
         dict: 工作流中间状态
     """
-    initial_state = {
-        "messages": [{"role": "user", "content": user_input}],
-        "user_query": user_input,
-        "session_id": session_id,
-        "max_iterations": max_iterations,
-    }
-    
-    config = {
-        "configurable": {
-            "thread_id": session_id,
-        },
-        "recursion_limit": 50,
-    }
+    session_id = session_id or f"run_{uuid4().hex}"
+    initial_state = _initial_state(user_input, session_id, max_iterations)
+    config = _run_config(session_id)
     
-    async for state in graph.astream(
+    async for state in get_graph().astream(
         input=initial_state,
         config=config,
         stream_mode="values"
@@ -6,6 +6,8 @@
 - 数据诚信检查
 """
 
+from string import Template
+
 from langchain_core.messages import AIMessage
 
 from src.knowledge import get_neo4j_client
@@ -23,6 +25,7 @@ from ..state import (
     AnalysisResult,
     Task,
     TaskStatus,
+    TaskSummary,
     TaskType,
     WorkflowState,
 )
@@ -51,12 +54,54 @@ ANALYZER_SYSTEM_PROMPT = """你是 BioValue-AI 的投资分析专家 Agent。
 请基于查询结果，给出专业的投资分析见解和建议。
 """
 
+# 分析提示词模板 (模块加载时解析一次)
+COMPETITION_PROMPT = Template("""请分析以下竞争坍缩模拟结果，并给出投资建议:
+
+查询参数:
+- 失败药物ID: $drug_id
+- 适应症ID: $indication_id
+
+图谱查询结果:
+$results
+
+请从以下角度分析:
+1. 受影响的联合用药方案数量和重要性
+2. 涉及的公司和管线
+3. 对该适应症竞争格局的影响
+4. 投资建议
+""")
+
+OPPORTUNITY_PROMPT = Template("""请分析以下空白点挖掘结果，识别高价值投资机会:
+
+图谱查询结果:
+$results
+
+请从以下角度分析:
+1. 识别出的高价值适应症
+2. 当前竞争格局
+3. 进入壁垒分析
+4. 投资优先级排序
+5. 具体投资建议
+""")
+
+INTEGRITY_PROMPT = Template("""请分析以下数据诚信检查结果，识别可疑数据:
+
+图谱查询结果:
+$results
+
+请从以下角度分析:
+1. 高风险数据识别
+2. 可疑模式说明
+3. 需要进一步验证的数据点
+4. 投资决策建议
+""")
+
 
 async def analyzer_node(state: WorkflowState) -> dict:
     """分析推理节点"""
     logger.info("Analyzer node processing...")
     
-    task = state.current_task
+    task = state.get("current_task")
     if not task:
         return {
             "next_node": "coordinator",
@@ -65,15 +110,13 @@ async def analyzer_node(state: WorkflowState) -> dict:
     
     task.status = TaskStatus.IN_PROGRESS
     
-    # 获取 Neo4j 客户端
+    # 获取 Neo4j 客户端 (共享驱动，会话按需连接)
     client = get_neo4j_client()
     
     analysis_result = None
     query_results = []
     
     try:
-        await client.connect()
-        
         # 根据任务类型执行不同的分析
         if task.type == TaskType.ANALYZE_COMPETITION:
             analysis_result = await _analyze_competition(client, task, state)
@@ -97,7 +140,7 @@ async def analyzer_node(state: WorkflowState) -> dict:
         task.error = str(e)
         return {
             "current_task": None,
-            "completed_tasks": state.completed_tasks + [task],
+            "completed_tasks": [TaskSummary.from_task(task)],
             "next_node": "coordinator",
             "messages": [AIMessage(content=f"[分析器] 分析执行失败: {e}")],
         }
@@ -113,15 +156,15 @@ async def analyzer_node(state: WorkflowState) -> dict:
     # 构建更新
     updates = {
         "current_task": None,
-        "completed_tasks": state.completed_tasks + [task],
+        "completed_tasks": [TaskSummary.from_task(task)],
         "next_node": "coordinator",
     }
     
     if analysis_result:
-        updates["analysis_results"] = state.analysis_results + [analysis_result]
+        updates["analysis_results"] = [analysis_result]
         summary = _format_analysis_summary(analysis_result)
     else:
-        updates["graph_query_results"] = state.graph_query_results + query_results
+        updates["graph_query_results"] = query_results
         summary = f"[分析器] 查询返回 {len(query_results)} 条结果"
     
     updates["messages"] = [AIMessage(content=summary)]
@@ -151,21 +194,11 @@ async def _analyze_competition(
     # 使用 LLM 分析结果
     llm = get_llm("reasoning")
     
-    analysis_prompt = f"""请分析以下竞争坍缩模拟结果，并给出投资建议:
-
-查询参数:
-- 失败药物ID: {drug_id}
-- 适应症ID: {indication_id}
-
-图谱查询结果:
-{results}
-
-请从以下角度分析:
-1. 受影响的联合用药方案数量和重要性
-2. 涉及的公司和管线
-3. 对该适应症竞争格局的影响
-4. 投资建议
-"""
+    analysis_prompt = COMPETITION_PROMPT.substitute(
+        drug_id=drug_id,
+        indication_id=indication_id,
+        results=results,
+    )
     
     response = await llm.generate(
         prompt=analysis_prompt,
@@ -180,7 +213,6 @@ async def _analyze_competition(
         }],
         recommendations=_extract_recommendations(response.content),
         confidence_score=0.8,
-        raw_data={"query_results": results},
     )
 
 
@@ -205,18 +237,7 @@ async def _find_opportunity(
     # 使用 LLM 分析结果
     llm = get_llm("reasoning")
     
-    analysis_prompt = f"""请分析以下空白点挖掘结果，识别高价值投资机会:
-
-图谱查询结果:
-{results}
-
-请从以下角度分析:
-1. 识别出的高价值适应症
-2. 当前竞争格局
-3. 进入壁垒分析
-4. 投资优先级排序
-5. 具体投资建议
-"""
+    analysis_prompt = OPPORTUNITY_PROMPT.substitute(results=results)
     
     response = await llm.generate(
         prompt=analysis_prompt,
@@ -231,7 +252,6 @@ async def _find_opportunity(
         }],
         recommendations=_extract_recommendations(response.content),
         confidence_score=0.75,
-        raw_data={"query_results": results},
     )
 
 
@@ -255,17 +275,7 @@ async def _check_integrity(
     # 使用 LLM 分析结果
     llm = get_llm("reasoning")
     
-    analysis_prompt = f"""请分析以下数据诚信检查结果，识别可疑数据:
-
-图谱查询结果:
-{results}
-
-请从以下角度分析:
-1. 高风险数据识别
-2. 可疑模式说明
-3. 需要进一步验证的数据点
-4. 投资决策建议
-"""
+    analysis_prompt = INTEGRITY_PROMPT.substitute(results=results)
     
     response = await llm.generate(
         prompt=analysis_prompt,
@@ -280,7 +290,6 @@ async def _check_integrity(
         }],
         recommendations=_extract_recommendations(response.content),
         confidence_score=0.85,
-        raw_data={"query_results": results},
     )
 
 
@@ -296,7 +305,7 @@ async def _execute_query(
     
     if not query:
         # 根据用户查询智能选择查询模板
-        user_query = state.user_query.lower()
+        user_query = state.get("user_query", "").lower()
         
         if "药物" in user_query or "drug" in user_query:
             drug_id = params.get("drug_id", "")
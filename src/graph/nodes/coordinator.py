@@ -3,7 +3,7 @@
 协调器 Agent: 负责理解用户意图，分配任务到合适的处理节点
 """
 
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, trim_messages
 
 from src.llms import get_llm
 from src.utils import get_logger
@@ -45,6 +45,51 @@ COORDINATOR_SYSTEM_PROMPT = """你是 BioValue-AI 创新药知识图谱系统的
 请根据用户查询和当前状态，做出下一步决策。
 """
 
+# 决策动作 -> (任务类型, 任务描述, 下一节点)；任务类型为 None 时不创建任务
+ACTION_DISPATCH: dict[str, tuple[TaskType | None, str, str]] = {
+    "extract": (TaskType.EXTRACT_DATA, "从数据源提取结构化信息", "extractor"),
+    "build_graph": (TaskType.BUILD_GRAPH, "构建知识图谱", "graph_builder"),
+    "analyze": (TaskType.ANALYZE_COMPETITION, "执行 {analysis_type} 分析", "analyzer"),
+    "report": (TaskType.GENERATE_REPORT, "生成分析报告", "reporter"),
+    "query": (TaskType.QUERY_GRAPH, "查询知识图谱", "analyzer"),
+    "end": (None, "", "reporter"),
+}
+
+# analyze 动作的 analysis_type 参数 -> 任务类型
+ANALYSIS_TASK_TYPES = {
+    "competition": TaskType.ANALYZE_COMPETITION,
+    "opportunity": TaskType.FIND_OPPORTUNITY,
+    "integrity": TaskType.CHECK_INTEGRITY,
+}
+
+# 状态中保留的消息条数上限
+# 决策只依赖状态计数，不回放历史；用户查询已持久化在 user_query 中
+MESSAGE_HISTORY_LIMIT = 20
+
+
+def _queue_status(pending: int, limit: int) -> str:
+    """待入图谱实体的积压状态"""
+    if pending >= limit:
+        return "red"
+    if pending * 2 >= limit:
+        return "yellow"
+    return "green"
+
+
+def _trim_history(messages: list) -> list[RemoveMessage]:
+    """为超出上限的旧消息生成删除标记，避免消息历史与检查点随迭代线性增长"""
+    if len(messages) <= MESSAGE_HISTORY_LIMIT:
+        return []
+    
+    kept = trim_messages(
+        messages,
+        max_tokens=MESSAGE_HISTORY_LIMIT,
+        token_counter=len,
+        strategy="last",
+    )
+    kept_ids = {m.id for m in kept}
+    return [RemoveMessage(id=m.id) for m in messages if m.id and m.id not in kept_ids]
+
 
 async def coordinator_node(state: WorkflowState) -> dict:
     """协调器节点
@@ -54,7 +99,8 @@ async def coordinator_node(state: WorkflowState) -> dict:
     logger.info("Coordinator node processing...")
     
     # 检查迭代次数
-    if state.iteration_count >= state.max_iterations:
+    iteration_count = state.get("iteration_count", 0)
+    if iteration_count >= state.get("max_iterations", 10):
         logger.warning("Max iterations reached, ending workflow")
         return {
             "next_node": "reporter",
@@ -63,24 +109,28 @@ async def coordinator_node(state: WorkflowState) -> dict:
     
     # 获取最新的用户消息
     user_message = ""
-    for msg in reversed(state.messages):
+    for msg in reversed(state.get("messages", [])):
         if isinstance(msg, HumanMessage):
             user_message = msg.content
             break
     
-    if not user_message and state.user_query:
-        user_message = state.user_query
+    user_query = state.get("user_query", "")
+    if not user_message and user_query:
+        user_message = user_query
     
-    # 构建上下文
+    pending_count = len(state.get("pending_extracted_entities", []))
+    queue_status = _queue_status(pending_count, state.get("max_pending_entities", 200))
+    
+    # 提示词按稳定性排序以命中前缀缓存:
+    # 静态系统提示词 -> 会话内不变的用户查询 -> 每轮变化的状态计数 (用户消息)
+    system_prompt = f"{COORDINATOR_SYSTEM_PROMPT}\n当前用户查询: {user_message}\n"
     context = f"""
-当前用户查询: {user_message}
-
-已完成任务: {len(state.completed_tasks)}
-待处理任务: {len(state.task_queue)}
-已提取实体: {len(state.extracted_entities)}
-分析结果数: {len(state.analysis_results)}
+已完成任务: {len(state.get("completed_tasks", []))}
+待处理任务: {len(state.get("task_queue", []))}
+已提取实体: {len(state.get("historical_extracted_entities", [])) + pending_count} (待入图谱: {pending_count}, 积压状态: {queue_status})
+分析结果数: {len(state.get("analysis_results", []))}
 
-迭代次数: {state.iteration_count}
+迭代次数: {iteration_count}
 """
     
     # 使用 LLM 做决策
@@ -90,75 +140,45 @@ async def coordinator_node(state: WorkflowState) -> dict:
         decision = await llm.structured_output(
             prompt=f"请分析以下情况并决定下一步行动:\n{context}",
             schema=CoordinatorDecision,
-            system_prompt=COORDINATOR_SYSTEM_PROMPT,
+            system_prompt=system_prompt,
+            cache_system_prompt=True,
+            prompt_cache_key=state.get("session_id", "") or None,
         )
         
         logger.info(f"Coordinator decision: {decision.next_action} - {decision.reasoning}")
         
-        # 创建任务
-        task = None
-        next_node = "end"
-        
-        if decision.next_action == "extract":
-            task = Task(
-                id=f"task_{state.iteration_count}_extract",
-                type=TaskType.EXTRACT_DATA,
-                description="从数据源提取结构化信息",
-                parameters=decision.task_params,
+        # 背压: 积压已满时先入图谱，不再继续提取
+        if decision.next_action == "extract" and queue_status == "red":
+            logger.warning(
+                f"Pending entities at limit ({pending_count}), building graph before extracting"
             )
-            next_node = "extractor"
-            
-        elif decision.next_action == "build_graph":
-            task = Task(
-                id=f"task_{state.iteration_count}_build",
-                type=TaskType.BUILD_GRAPH,
-                description="构建知识图谱",
-                parameters=decision.task_params,
-            )
-            next_node = "graph_builder"
-            
-        elif decision.next_action == "analyze":
+            decision.next_action = "build_graph"
+        
+        # 创建任务
+        task_type, description, next_node = ACTION_DISPATCH.get(
+            decision.next_action, ACTION_DISPATCH["end"]
+        )
+        if decision.next_action == "analyze":
             # 确定具体分析类型
             analysis_type = decision.task_params.get("analysis_type", "competition")
-            task_type_map = {
-                "competition": TaskType.ANALYZE_COMPETITION,
-                "opportunity": TaskType.FIND_OPPORTUNITY,
-                "integrity": TaskType.CHECK_INTEGRITY,
-            }
-            task = Task(
-                id=f"task_{state.iteration_count}_analyze",
-                type=task_type_map.get(analysis_type, TaskType.ANALYZE_COMPETITION),
-                description=f"执行 {analysis_type} 分析",
-                parameters=decision.task_params,
-            )
-            next_node = "analyzer"
-            
-        elif decision.next_action == "report":
-            task = Task(
-                id=f"task_{state.iteration_count}_report",
-                type=TaskType.GENERATE_REPORT,
-                description="生成分析报告",
-                parameters=decision.task_params,
-            )
-            next_node = "reporter"
-            
-        elif decision.next_action == "query":
+            task_type = ANALYSIS_TASK_TYPES.get(analysis_type, TaskType.ANALYZE_COMPETITION)
+            description = description.format(analysis_type=analysis_type)
+        
+        task = None
+        if task_type is not None:
             task = Task(
-                id=f"task_{state.iteration_count}_query",
-                type=TaskType.QUERY_GRAPH,
-                description="查询知识图谱",
+                id=f"task_{iteration_count}_{decision.next_action}",
+                type=task_type,
+                description=description,
                 parameters=decision.task_params,
             )
-            next_node = "analyzer"
-            
-        else:  # end
-            next_node = "reporter"
         
         # 更新状态
         updates = {
             "next_node": next_node,
-            "iteration_count": state.iteration_count + 1,
-            "user_query": user_message if not state.user_query else state.user_query,
+            "iteration_count": iteration_count + 1,
+            "queue_status": queue_status,
+            "user_query": user_query or user_message,
         }
         
         if task:
@@ -168,7 +188,7 @@ async def coordinator_node(state: WorkflowState) -> dict:
         ai_message = AIMessage(
             content=f"[协调器决策] {decision.reasoning}\n下一步: {decision.next_action}"
         )
-        updates["messages"] = [ai_message]
+        updates["messages"] = _trim_history(state.get("messages", [])) + [ai_message]
         
         return updates
         
@@ -7,19 +7,20 @@
 - 外部 API 数据获取
 """
 
+import asyncio
+from typing import Any
+
 from langchain_core.messages import AIMessage
+from pydantic import BaseModel, ConfigDict, Field, create_model
 
-from src.llms import get_llm
-from src.knowledge.models import (
-    Company, Drug, Indication, Trial, EndpointData
-)
+from src.llms import BaseLLM, get_llm
 from src.utils import get_logger
 
 from ..state import (
     ExtractedEntity,
-    ExtractionPlan,
-    Task,
+    MultiEntityExtraction,
     TaskStatus,
+    TaskSummary,
     WorkflowState,
 )
 
@@ -84,6 +85,172 @@ ENTITY_SCHEMAS = {
     }
 }
 
+# 逐类型提取的用户提示词 (待提取文本位于共享的系统提示词前缀中)
+EXTRACTION_PROMPT_TEMPLATE = """请从上述文本中提取所有 {entity_type} 实体。
+
+需要提取的字段:
+- 必填: {required}
+- 可选: {optional}
+
+请在 entities 中以数组形式返回提取结果，每个对象代表一个实体。
+如果某字段无法从文本中确定，请省略该字段。
+同时为每个实体提供一个 confidence 字段（0-1），表示提取的置信度。
+"""
+
+# 模块加载时预先渲染各实体类型的提示词与字段说明，保证每次调用字节一致
+_PROMPT_TEMPLATES = {
+    et: EXTRACTION_PROMPT_TEMPLATE.format(
+        entity_type=et,
+        required=", ".join(schema["required"]),
+        optional=", ".join(schema["optional"]),
+    )
+    for et, schema in ENTITY_SCHEMAS.items()
+}
+_FIELD_SPECS = {
+    et: f"- {et}: 必填 {', '.join(schema['required'])}; 可选 {', '.join(schema['optional'])}"
+    for et, schema in ENTITY_SCHEMAS.items()
+}
+
+
+def _entity_extraction_model(entity_type: str, schema: dict[str, list[str]]) -> type[BaseModel]:
+    """根据 ENTITY_SCHEMAS 构建单实体类型的结构化输出模型
+    
+    字段均可省略 (由图谱构建阶段的节点模型做最终校验)，允许模型返回额外字段。
+    """
+    fields = {name: (Any, None) for name in schema["required"] + schema["optional"]}
+    entity_model = create_model(
+        entity_type,
+        __config__=ConfigDict(extra="allow"),
+        confidence=(float, 0.8),
+        **fields,
+    )
+    return create_model(
+        f"{entity_type}Extraction",
+        entities=(list[entity_model], Field(default_factory=list)),
+    )
+
+
+_EXTRACTION_MODELS = {
+    et: _entity_extraction_model(et, schema) for et, schema in ENTITY_SCHEMAS.items()
+}
+
+# 并发提取的实体类型数上限，避免触发提供商限流
+EXTRACTION_CONCURRENCY = 4
+
+
+async def _extract_entity_type(
+    llm: BaseLLM,
+    entity_type: str,
+    system_prompt: str,
+    source: str,
+    semaphore: asyncio.Semaphore,
+) -> list[ExtractedEntity]:
+    """提取单个实体类型
+    
+    system_prompt 已包含待提取文本，所有实体类型共享同一前缀，
+    仅用户消息中的字段说明随实体类型变化。
+    """
+    async with semaphore:
+        result = await llm.structured_output(
+            prompt=_PROMPT_TEMPLATES[entity_type],
+            schema=_EXTRACTION_MODELS[entity_type],
+            system_prompt=system_prompt,
+            cache_system_prompt=True,
+        )
+    
+    entities_data = [e.model_dump(exclude_none=True) for e in result.entities]
+    return _build_entities(entity_type, entities_data, source)
+
+
+async def _extract_per_type(
+    llm: BaseLLM,
+    entity_types: list[str],
+    text: str,
+    source: str,
+) -> list[ExtractedEntity]:
+    """逐实体类型提取（各类型相互独立，并发执行）
+    
+    文档放在静态前缀中，第 2..N 次调用可命中提供商的提示词前缀缓存。
+    """
+    system_prompt = f"{EXTRACTOR_SYSTEM_PROMPT}\n待提取文本:\n{text}\n"
+    semaphore = asyncio.Semaphore(EXTRACTION_CONCURRENCY)
+    results = await asyncio.gather(
+        *[
+            _extract_entity_type(
+                llm, et, system_prompt, source, semaphore
+            )
+            for et in entity_types
+        ],
+        return_exceptions=True,
+    )
+    
+    extracted_entities = []
+    for entity_type, result in zip(entity_types, results):
+        if isinstance(result, BaseException):
+            logger.error(f"Extraction error for {entity_type}: {result}")
+            continue
+        extracted_entities.extend(result)
+    return extracted_entities
+
+
+async def _extract_batch(
+    llm: BaseLLM,
+    entity_types: list[str],
+    text: str,
+    source: str,
+) -> list[ExtractedEntity]:
+    """单次 LLM 调用提取所有实体类型"""
+    field_specs = "\n".join(_FIELD_SPECS[et] for et in entity_types)
+    extraction_prompt = f"""请从以下文本中提取所有 {', '.join(entity_types)} 实体:
+
+文本:
+{text}
+
+各实体类型需要提取的字段:
+{field_specs}
+
+请在 entities 中以实体类型为键、JSON 数组为值返回提取结果，每个对象代表一个实体。
+文本中没有出现的实体类型返回空数组。
+如果某字段无法从文本中确定，请省略该字段。
+同时为每个实体提供一个 confidence 字段（0-1），表示提取的置信度。
+"""
+    
+    result = await llm.structured_output(
+        prompt=extraction_prompt,
+        schema=MultiEntityExtraction,
+        system_prompt=EXTRACTOR_SYSTEM_PROMPT,
+    )
+    
+    extracted_entities = []
+    for entity_type in entity_types:
+        extracted_entities.extend(
+            _build_entities(entity_type, result.entities.get(entity_type, []), source)
+        )
+    return extracted_entities
+
+
+def _build_entities(
+    entity_type: str,
+    entities_data: list[dict] | dict,
+    source: str,
+) -> list[ExtractedEntity]:
+    """将 LLM 返回的实体数据转换为 ExtractedEntity"""
+    if not isinstance(entities_data, list):
+        entities_data = [entities_data]
+    
+    entities = []
+    for entity_data in entities_data:
+        confidence = entity_data.pop("confidence", 0.8)
+        entities.append(
+            ExtractedEntity(
+                entity_type=entity_type,
+                data=entity_data,
+                source=source,
+                confidence=confidence,
+            )
+        )
+    return entities
+
 
 async def extractor_node(state: WorkflowState) -> dict:
     """数据提取节点
@@ -92,7 +259,7 @@ async def extractor_node(state: WorkflowState) -> dict:
     """
     logger.info("Extractor node processing...")
     
-    task = state.current_task
+    task = state.get("current_task")
     if not task:
         return {
             "next_node": "coordinator",
@@ -109,14 +276,14 @@ async def extractor_node(state: WorkflowState) -> dict:
     
     if not text_to_extract:
         # 如果没有文本，尝试从用户查询中提取
-        text_to_extract = state.user_query
+        text_to_extract = state.get("user_query", "")
     
     if not text_to_extract:
         task.status = TaskStatus.FAILED
         task.error = "No text provided for extraction"
         return {
             "current_task": task,
-            "completed_tasks": state.completed_tasks + [task],
+            "completed_tasks": [TaskSummary.from_task(task)],
             "next_node": "coordinator",
             "messages": [AIMessage(content="[提取器] 没有提供待提取的文本")],
         }
@@ -124,82 +291,40 @@ async def extractor_node(state: WorkflowState) -> dict:
     # 使用 LLM 提取实体
     llm = get_llm("extraction")
     
-    extracted_entities = []
+    extract_types = [et for et in target_entities if et in ENTITY_SCHEMAS]
     
-    for entity_type in target_entities:
-        schema = ENTITY_SCHEMAS.get(entity_type)
-        if not schema:
-            continue
-        
-        extraction_prompt = f"""请从以下文本中提取所有 {entity_type} 实体:
-
-文本:
-{text_to_extract}
-
-需要提取的字段:
-- 必填: {', '.join(schema['required'])}
-- 可选: {', '.join(schema['optional'])}
-
-请以 JSON 数组格式返回提取结果，每个对象代表一个实体。
-如果某字段无法从文本中确定，请省略该字段。
-同时为每个实体提供一个 confidence 字段（0-1），表示提取的置信度。
-"""
-        
+    # 默认单次调用批量提取；batch_extraction=False 时回退到逐类型提取
+    if task.parameters.get("batch_extraction", True):
         try:
-            response = await llm.generate(
-                prompt=extraction_prompt,
-                system_prompt=EXTRACTOR_SYSTEM_PROMPT,
-                temperature=0,
+            extracted_entities = await _extract_batch(
+                llm, extract_types, text_to_extract, source
             )
-            
-            # 解析响应
-            import json
-            content = response.content
-            
-            # 提取 JSON 部分
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0]
-            
-            try:
-                entities_data = json.loads(content.strip())
-                if not isinstance(entities_data, list):
-                    entities_data = [entities_data]
-                
-                for entity_data in entities_data:
-                    confidence = entity_data.pop("confidence", 0.8)
-                    extracted_entities.append(
-                        ExtractedEntity(
-                            entity_type=entity_type,
-                            data=entity_data,
-                            source=source,
-                            confidence=confidence,
-                        )
-                    )
-                    
-            except json.JSONDecodeError:
-                logger.warning(f"Failed to parse extraction result for {entity_type}")
-                
         except Exception as e:
-            logger.error(f"Extraction error for {entity_type}: {e}")
+            logger.error(f"Batch extraction error: {e}")
+            extracted_entities = []
+    else:
+        extracted_entities = await _extract_per_type(
+            llm, extract_types, text_to_extract, source
+        )
     
     # 更新任务结果
     task.status = TaskStatus.COMPLETED
     task.result = {
         "extracted_count": len(extracted_entities),
-        "entity_types": list(set(e.entity_type for e in extracted_entities)),
+        # dict.fromkeys 单次遍历去重并保持出现顺序
+        "entity_types": list(dict.fromkeys(e.entity_type for e in extracted_entities)),
     }
     
     # 构建响应消息
-    summary = f"[提取器] 从文本中提取了 {len(extracted_entities)} 个实体:\n"
-    for entity in extracted_entities:
-        summary += f"  - {entity.entity_type}: {entity.data.get('name', 'N/A')} (置信度: {entity.confidence:.2f})\n"
+    summary = f"[提取器] 从文本中提取了 {len(extracted_entities)} 个实体:\n" + "".join(
+        f"  - {entity.entity_type}: {entity.data.get('name', 'N/A')} (置信度: {entity.confidence:.2f})\n"
+        for entity in extracted_entities
+    )
     
     return {
         "current_task": None,
-        "completed_tasks": state.completed_tasks + [task],
-        "extracted_entities": state.extracted_entities + extracted_entities,
+        "completed_tasks": [TaskSummary.from_task(task)],
+        "pending_extracted_entities": extracted_entities,
         "next_node": "coordinator",
         "messages": [AIMessage(content=summary)],
     }
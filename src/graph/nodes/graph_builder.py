@@ -3,6 +3,10 @@
 图谱构建 Agent: 将提取的数据构建到 Neo4j 知识图谱中
 """
 
+import asyncio
+import hashlib
+from collections import defaultdict
+
 from langchain_core.messages import AIMessage
 
 from src.knowledge import (
@@ -11,7 +15,7 @@ from src.knowledge import (
     get_neo4j_client,
 )
 from src.knowledge.models.nodes import (
-    MoleculeType, TrialDesign, TrialPhase, TrialStatus, TreatmentLine
+    BaseNode, MoleculeType, TrialDesign, TrialPhase, TrialStatus, TreatmentLine
 )
 from src.utils import get_logger
 
@@ -19,11 +23,29 @@ from ..state import (
     ExtractedEntity,
     Task,
     TaskStatus,
+    TaskSummary,
     WorkflowState,
 )
 
 logger = get_logger(__name__)
 
+# 枚举值查找表 (模块加载时构建一次，未知值直接回落到默认值)
+_MOLECULE_MAP = {m.value: m for m in MoleculeType}
+_DESIGN_MAP = {d.value: d for d in TrialDesign}
+_PHASE_MAP = {p.value: p for p in TrialPhase}
+_STATUS_MAP = {s.value: s for s in TrialStatus}
+
+
+def _dedupe_key(node: BaseNode) -> str:
+    """实体内容哈希: 节点类型 + 规范化后的自然键 (NEO4J_MERGE_KEY)；无自然键时使用节点 id"""
+    key_field = node.NEO4J_MERGE_KEY
+    if key_field == "id":
+        return node.id
+    value = str(getattr(node, key_field)).strip().casefold()
+    return hashlib.blake2b(
+        f"{node.node_type}:{value}".encode(), digest_size=16
+    ).hexdigest()
+
 
 def _create_node_from_entity(entity: ExtractedEntity):
     """从提取的实体创建节点对象"""
@@ -35,10 +57,7 @@ def _create_node_from_entity(entity: ExtractedEntity):
             # 处理枚举类型
             molecule_type = data.get("molecule_type", "其他")
             if isinstance(molecule_type, str):
-                try:
-                    molecule_type = MoleculeType(molecule_type)
-                except ValueError:
-                    molecule_type = MoleculeType.OTHER
+                molecule_type = _MOLECULE_MAP.get(molecule_type, MoleculeType.OTHER)
             data["molecule_type"] = molecule_type
             
             return Drug(**data)
@@ -52,22 +71,13 @@ def _create_node_from_entity(entity: ExtractedEntity):
         elif entity_type == "Trial":
             # 处理枚举类型
             if "design" in data and isinstance(data["design"], str):
-                try:
-                    data["design"] = TrialDesign(data["design"])
-                except ValueError:
-                    data["design"] = TrialDesign.OPEN_LABEL
+                data["design"] = _DESIGN_MAP.get(data["design"], TrialDesign.OPEN_LABEL)
                     
             if "phase" in data and isinstance(data["phase"], str):
-                try:
-                    data["phase"] = TrialPhase(data["phase"])
-                except ValueError:
-                    data["phase"] = TrialPhase.PHASE_2
+                data["phase"] = _PHASE_MAP.get(data["phase"], TrialPhase.PHASE_2)
                     
             if "status" in data and isinstance(data["status"], str):
-                try:
-                    data["status"] = TrialStatus(data["status"])
-                except ValueError:
-                    data["status"] = TrialStatus.RECRUITING
+                data["status"] = _STATUS_MAP.get(data["status"], TrialStatus.RECRUITING)
                     
             return Trial(**data)
             
@@ -90,7 +100,7 @@ async def graph_builder_node(state: WorkflowState) -> dict:
     """
     logger.info("Graph builder node processing...")
     
-    task = state.current_task
+    task = state.get("current_task")
     if not task:
         return {
             "next_node": "coordinator",
@@ -100,44 +110,60 @@ async def graph_builder_node(state: WorkflowState) -> dict:
     task.status = TaskStatus.IN_PROGRESS
     
     # 获取待处理的实体
-    entities_to_process = state.extracted_entities
+    entities_to_process = state.get("pending_extracted_entities", [])
     if not entities_to_process:
         task.status = TaskStatus.COMPLETED
         task.result = {"message": "No entities to process"}
         return {
             "current_task": None,
-            "completed_tasks": state.completed_tasks + [task],
+            "completed_tasks": [TaskSummary.from_task(task)],
             "next_node": "coordinator",
             "messages": [AIMessage(content="[图谱构建器] 没有待处理的实体")],
         }
     
-    # 获取 Neo4j 客户端
+    # 获取 Neo4j 客户端 (共享驱动，会话按需连接)
     client = get_neo4j_client()
     
     created_nodes = []
     failed_nodes = []
     
     try:
-        await client.connect()
-        
+        # 按节点类型分组并按内容哈希去重 (保留置信度最高的版本)，每组一次 UNWIND 批量写入
+        groups: dict[str, dict[str, tuple[ExtractedEntity, BaseNode]]] = defaultdict(dict)
         for entity in entities_to_process:
             node = _create_node_from_entity(entity)
             if node is None:
                 failed_nodes.append(entity.entity_type)
                 continue
             
-            try:
-                node_id = await client.create_node(node)
+            deduped = groups[node.node_type]
+            key = _dedupe_key(node)
+            existing = deduped.get(key)
+            if existing is None or entity.confidence > existing[0].confidence:
+                deduped[key] = (entity, node)
+        
+        results = await asyncio.gather(
+            *[
+                client.create_nodes([node for _, node in deduped.values()])
+                for deduped in groups.values()
+            ],
+            return_exceptions=True,
+        )
+        
+        for (node_type, deduped), result in zip(groups.items(), results):
+            if isinstance(result, BaseException):
+                logger.error(f"Failed to create {node_type} nodes: {result}")
+                failed_nodes.extend(entity.entity_type for entity, _ in deduped.values())
+                continue
+            
+            # MERGE 命中已有节点时返回的是原节点 id
+            for (entity, _), node_id in zip(deduped.values(), result):
                 created_nodes.append({
                     "id": node_id,
                     "type": entity.entity_type,
                     "name": entity.data.get("name", "N/A"),
                 })
-                logger.info(f"Created node: {entity.entity_type} - {node_id}")
-                
-            except Exception as e:
-                logger.error(f"Failed to create node: {e}")
-                failed_nodes.append(entity.entity_type)
+            logger.info(f"Created {len(result)} nodes: {node_type}")
         
     except Exception as e:
         logger.error(f"Neo4j connection error: {e}")
@@ -145,7 +171,7 @@ async def graph_builder_node(state: WorkflowState) -> dict:
         task.error = str(e)
         return {
             "current_task": None,
-            "completed_tasks": state.completed_tasks + [task],
+            "completed_tasks": [TaskSummary.from_task(task)],
             "next_node": "coordinator",
             "messages": [AIMessage(content=f"[图谱构建器] 数据库连接失败: {e}")],
         }
@@ -159,18 +185,20 @@ async def graph_builder_node(state: WorkflowState) -> dict:
     }
     
     # 构建响应消息
-    summary = f"[图谱构建器] 创建了 {len(created_nodes)} 个节点:\n"
-    for node in created_nodes:
-        summary += f"  - {node['type']}: {node['name']} (ID: {node['id'][:8]}...)\n"
+    summary = f"[图谱构建器] 创建了 {len(created_nodes)} 个节点:\n" + "".join(
+        f"  - {node['type']}: {node['name']} (ID: {node['id'][:8]}...)\n"
+        for node in created_nodes
+    )
     
     if failed_nodes:
         summary += f"\n失败: {len(failed_nodes)} 个\n"
     
     return {
         "current_task": None,
-        "completed_tasks": state.completed_tasks + [task],
-        "created_nodes": state.created_nodes + [n["id"] for n in created_nodes],
-        "extracted_entities": [],  # 清空已处理的实体
+        "completed_tasks": [TaskSummary.from_task(task)],
+        "created_nodes": [n["id"] for n in created_nodes],
+        "pending_extracted_entities": None,  # 标记为已消费
+        "historical_extracted_entities": entities_to_process,
         "next_node": "coordinator",
         "messages": [AIMessage(content=summary)],
     }
@@ -3,12 +3,15 @@
 报告生成 Agent: 汇总分析结果，生成最终报告
 """
 
+from collections import Counter
+
 from langchain_core.messages import AIMessage
 
 from src.llms import get_llm
 from src.utils import get_logger
 
 from ..state import (
+    ReportOutput,
     Task,
     TaskStatus,
     WorkflowState,
@@ -32,6 +35,8 @@ REPORTER_SYSTEM_PROMPT = """你是 BioValue-AI 的报告生成专家 Agent。
 - 数据驱动
 - 逻辑清晰
 - 可操作性强
+
+输出 JSON: summary 为一句话总结报告的核心结论，report 为 Markdown 格式的完整报告。
 """
 
 
@@ -40,60 +45,60 @@ async def reporter_node(state: WorkflowState) -> dict:
     logger.info("Reporter node processing...")
     
     # 汇总所有分析结果
-    analysis_results = state.analysis_results
-    completed_tasks = state.completed_tasks
-    extracted_entities = state.extracted_entities
-    created_nodes = state.created_nodes
-    graph_query_results = state.graph_query_results
+    analysis_results = state.get("analysis_results", [])
+    completed_tasks = state.get("completed_tasks", [])
+    extracted_entities = (
+        state.get("historical_extracted_entities", []) + state.get("pending_extracted_entities", [])
+    )
+    created_nodes = state.get("created_nodes", [])
+    graph_query_results = state.get("graph_query_results", [])
     
-    # 构建报告上下文
-    context = f"""
+    # 构建报告上下文 (分段收集后一次拼接)
+    parts = [f"""
 # 工作流执行摘要
 
 ## 用户查询
-{state.user_query}
+{state.get("user_query", "")}
 
 ## 完成的任务
 共完成 {len(completed_tasks)} 个任务:
-"""
+"""]
     
     for task in completed_tasks:
-        context += f"- {task.type.value}: {task.description} ({task.status.value})\n"
+        parts.append(f"- {task.type.value}: {task.description} ({task.status.value})\n")
     
-    context += f"""
+    parts.append(f"""
 ## 数据提取
 提取了 {len(extracted_entities)} 个实体:
-"""
+""")
     
-    entity_types = {}
-    for entity in extracted_entities:
-        entity_types[entity.entity_type] = entity_types.get(entity.entity_type, 0) + 1
+    entity_type_counts = Counter(entity.entity_type for entity in extracted_entities)
+    for entity_type, count in entity_type_counts.items():
+        parts.append(f"- {entity_type}: {count} 个\n")
     
-    for entity_type, count in entity_types.items():
-        context += f"- {entity_type}: {count} 个\n"
-    
-    context += f"""
+    parts.append(f"""
 ## 图谱操作
 创建了 {len(created_nodes)} 个节点
 
 ## 分析结果
 完成 {len(analysis_results)} 项分析:
-"""
+""")
     
     for result in analysis_results:
-        context += f"\n### {result.analysis_type}\n"
-        context += f"置信度: {result.confidence_score:.2f}\n"
+        parts.append(f"\n### {result.analysis_type}\n")
+        parts.append(f"置信度: {result.confidence_score:.2f}\n")
         if result.findings:
             for finding in result.findings:
                 if "llm_analysis" in finding:
-                    context += f"\n分析内容:\n{finding['llm_analysis'][:500]}...\n"
+                    parts.append(f"\n分析内容:\n{finding['llm_analysis'][:500]}...\n")
         if result.recommendations:
-            context += "\n建议:\n"
-            for rec in result.recommendations:
-                context += f"- {rec}\n"
+            parts.append("\n建议:\n")
+            parts.extend(f"- {rec}\n" for rec in result.recommendations)
     
     if graph_query_results:
-        context += f"\n## 图谱查询结果\n共 {len(graph_query_results)} 条结果\n"
+        parts.append(f"\n## 图谱查询结果\n共 {len(graph_query_results)} 条结果\n")
+    
+    context = "".join(parts)
     
     # 使用 LLM 生成最终报告
     llm = get_llm("basic")
@@ -111,17 +116,16 @@ async def reporter_node(state: WorkflowState) -> dict:
 """
     
     try:
-        response = await llm.generate(
+        # 报告与一句话摘要在同一次调用中生成
+        output = await llm.structured_output(
             prompt=report_prompt,
+            schema=ReportOutput,
             system_prompt=REPORTER_SYSTEM_PROMPT,
+            temperature=llm.temperature,
         )
         
-        final_report = response.content
-        
-        # 生成简短摘要
-        summary_prompt = f"请用一句话总结以下报告的核心结论:\n\n{final_report[:1000]}"
-        summary_response = await llm.generate(prompt=summary_prompt)
-        summary = summary_response.content
+        final_report = output.report
+        summary = output.summary
         
     except Exception as e:
         logger.error(f"Report generation error: {e}")
@@ -8,7 +8,7 @@
 """
 
 from enum import Enum
-from typing import Any, Literal, Optional
+from typing import Annotated, Any, Literal, Optional
 
 from langgraph.graph import MessagesState
 from pydantic import BaseModel, Field
@@ -45,6 +45,32 @@ class Task(BaseModel):
     error: Optional[str] = None
 
 
+class TaskSummary(BaseModel):
+    """已完成任务的摘要
+    
+    completed_tasks 随每个检查点序列化，只保留报告所需字段，
+    完整结果已体现在 analysis_results / created_nodes 等字段中。
+    """
+    id: str
+    type: TaskType
+    description: str
+    status: TaskStatus
+    error: Optional[str] = None
+    result_preview: str = ""
+    
+    @classmethod
+    def from_task(cls, task: Task) -> "TaskSummary":
+        """从任务生成摘要 (结果截断至 200 字符)"""
+        return cls(
+            id=task.id,
+            type=task.type,
+            description=task.description,
+            status=task.status,
+            error=task.error,
+            result_preview=str(task.result)[:200] if task.result is not None else "",
+        )
+
+
 class ExtractedEntity(BaseModel):
     """提取的实体"""
     entity_type: str
@@ -62,11 +88,25 @@ class AnalysisResult(BaseModel):
     raw_data: Optional[dict] = None
 
 
+def add_or_drain(left: list, right: list | None) -> list:
+    """累积列表的 reducer: 追加增量；传入 None 时清空 (已被消费或新一轮运行重置)"""
+    if right is None:
+        return []
+    return left + right
+
+
 class WorkflowState(MessagesState):
     """工作流状态
     
     继承 MessagesState 以支持消息历史管理，
     并添加创新药知识图谱特有的状态字段。
+    
+    MessagesState 是 TypedDict，节点收到的状态为普通字典，
+    字段统一以 state.get(key, 默认值) 读取。
+    
+    累积列表字段由节点返回增量，LangGraph 负责追加；每次运行开始时传入 None 重置，
+    检查点会话只延续消息历史。提取的实体先进入 pending_extracted_entities，
+    图谱构建器消费后 (返回 None) 转入 historical_extracted_entities。
     """
     
     # 基本信息
@@ -77,19 +117,23 @@ class WorkflowState(MessagesState):
     # 任务管理
     current_task: Optional[Task] = None
     task_queue: list[Task] = Field(default_factory=list)
-    completed_tasks: list[Task] = Field(default_factory=list)
+    # 待入图谱实体的积压状态: green < 50% < yellow < 100% <= red (red 时暂停提取)
+    max_pending_entities: int = 200
+    queue_status: Literal["green", "yellow", "red"] = "green"
+    completed_tasks: Annotated[list[TaskSummary], add_or_drain] = Field(default_factory=list)
     
     # 数据提取
-    extracted_entities: list[ExtractedEntity] = Field(default_factory=list)
+    pending_extracted_entities: Annotated[list[ExtractedEntity], add_or_drain] = Field(default_factory=list)
+    historical_extracted_entities: Annotated[list[ExtractedEntity], add_or_drain] = Field(default_factory=list)
     source_documents: list[str] = Field(default_factory=list)
     
     # 图谱操作
-    created_nodes: list[str] = Field(default_factory=list)
-    created_edges: list[str] = Field(default_factory=list)
-    graph_query_results: list[dict] = Field(default_factory=list)
+    created_nodes: Annotated[list[str], add_or_drain] = Field(default_factory=list)
+    created_edges: Annotated[list[str], add_or_drain] = Field(default_factory=list)
+    graph_query_results: Annotated[list[dict], add_or_drain] = Field(default_factory=list)
     
     # 分析结果
-    analysis_results: list[AnalysisResult] = Field(default_factory=list)
+    analysis_results: Annotated[list[AnalysisResult], add_or_drain] = Field(default_factory=list)
     
     # 最终输出
     final_report: str = ""
@@ -118,6 +162,20 @@ class ExtractionPlan(BaseModel):
     extraction_strategy: str
 
 
+class MultiEntityExtraction(BaseModel):
+    """多实体类型批量提取结果
+    
+    entities 以实体类型 (Drug/Company/...) 为键，值为该类型的实体列表。
+    """
+    entities: dict[str, list[dict[str, Any]]] = Field(default_factory=dict)
+
+
+class ReportOutput(BaseModel):
+    """报告生成结果 (一次调用同时产出报告与摘要)"""
+    summary: str
+    report: str
+
+
 class GraphBuildPlan(BaseModel):
     """图谱构建计划"""
     nodes_to_create: list[dict[str, Any]]
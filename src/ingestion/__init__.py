@@ -5,16 +5,47 @@
 - 文档解析: 解析 PDF/DOCX 等文档
 - 外部 API: 对接 ClinicalTrials.gov 等
 - 手动录入: 结构化数据导入
+
+子模块按需加载 (PEP 562)，导入本包不会引入爬虫/解析器依赖。
 """
 
-from .crawler import WebCrawler
-from .parser import DocumentParser
-from .external import ClinicalTrialsAPI, ExternalAPIClient
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .crawler import WebCrawler
+    from .parser import DocumentParser, shutdown_parse_pools
+    from .external import ClinicalTrialsAPI, ExternalAPIClient, shutdown_all_sessions
 
 __all__ = [
     "WebCrawler",
     "DocumentParser",
+    "shutdown_parse_pools",
     "ClinicalTrialsAPI",
     "ExternalAPIClient",
+    "shutdown_all_sessions",
 ]
 
+# 导出名 -> 所在子模块
+_LAZY_IMPORTS = {
+    "WebCrawler": ".crawler",
+    "DocumentParser": ".parser",
+    "shutdown_parse_pools": ".parser",
+    "ClinicalTrialsAPI": ".external",
+    "ExternalAPIClient": ".external",
+    "shutdown_all_sessions": ".external",
+}
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value  # 缓存，后续访问不再经过 __getattr__
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
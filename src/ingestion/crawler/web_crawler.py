@@ -4,20 +4,177 @@
 """
 
 import asyncio
-from typing import Any
+import codecs
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Any, AsyncIterator
 from urllib.parse import urljoin, urlparse
 
 import aiohttp
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
 
 from src.config import get_settings
 from src.utils import get_logger
 
+try:
+    # 基于 C 实现的 lexbor HTML5 解析器，比 stdlib HTMLParser 快一个数量级
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
 logger = get_logger(__name__)
 
+# 提取正文时跳过的标签
+SKIP_TAGS = ("script", "style", "nav", "footer", "header")
+
+# 不入队的伪链接协议
+NON_HTTP_LINK_PREFIXES = ("#", "mailto:", "javascript:", "tel:", "data:")
+
+# 可重试的 HTTP 状态码 (其余 4xx 直接返回)
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# 服务端 Retry-After 的最长等待秒数
+MAX_RETRY_AFTER = 60
+
+# 允许下载并解析的内容类型 (缺失 Content-Type 时同样尝试解析)
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+
+class _ContentExtractor(HTMLParser):
+    """stdlib 回退解析器 (未安装 selectolax 时使用)"""
+    
+    def __init__(self):
+        super().__init__()
+        self.text_parts = []
+        self.title = ""
+        self.links = []
+        self.in_title = False
+        self.current_skip = 0
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self.current_skip += 1
+        elif tag == "title":
+            self.in_title = True
+        elif tag == "a":
+            for name, value in attrs:
+                if name == "href" and value:
+                    self.links.append(value)
+    
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self.current_skip = max(0, self.current_skip - 1)
+        elif tag == "title":
+            self.in_title = False
+    
+    def handle_data(self, data):
+        if self.in_title:
+            self.title = data.strip()
+        elif self.current_skip == 0:
+            text = data.strip()
+            if text:
+                self.text_parts.append(text)
+
+
+def _parse_with_lexbor(html: str) -> tuple[str, str, list[str]]:
+    """使用 selectolax/lexbor 提取 (纯文本, 标题, 原始链接)"""
+    tree = LexborHTMLParser(html)
+    
+    title_node = tree.css_first("title")
+    title = title_node.text(strip=True) if title_node else ""
+    links = [a.attributes.get("href") or "" for a in tree.css("a[href]")]
+    
+    tree.strip_tags(list(SKIP_TAGS))
+    body = tree.body
+    text = body.text(separator=" ", strip=True) if body else ""
+    
+    return text, title, links
+
+
+def _parse_with_stdlib(html: str) -> tuple[str, str, list[str]]:
+    """使用 stdlib HTMLParser 提取 (纯文本, 标题, 原始链接)"""
+    extractor = _ContentExtractor()
+    extractor.feed(html)
+    return " ".join(extractor.text_parts), extractor.title, extractor.links
+
+
+class _RetryableStatusError(Exception):
+    """响应状态码可重试 (429/5xx)"""
+    
+    def __init__(self, status: int, content_type: str, retry_after: float = 0):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.content_type = content_type
+        self.retry_after = retry_after
+
+
+def _parse_retry_after(value: str | None) -> float:
+    """解析 Retry-After 秒数 (HTTP 日期格式按 0 处理)"""
+    try:
+        return min(max(float(value), 0.0), MAX_RETRY_AFTER) if value else 0.0
+    except ValueError:
+        return 0.0
+
+
+# 默认重试等待: 带抖动的指数退避，避免大量请求同步重试
+_backoff = wait_exponential_jitter(initial=1, max=10)
+
+
+def _retry_wait(retry_state: RetryCallState) -> float:
+    """重试等待秒数: 服务端给出 Retry-After 时以其替代本次退避"""
+    exc = retry_state.outcome.exception() if retry_state.outcome else None
+    if isinstance(exc, _RetryableStatusError) and exc.retry_after:
+        return exc.retry_after
+    return _backoff(retry_state)
+
+
+def _resolve_charset(charset: str | None) -> str:
+    """校验响应声明的字符集，未声明或无法识别时回退 utf-8"""
+    if not charset:
+        return "utf-8"
+    try:
+        return codecs.lookup(charset).name
+    except LookupError:
+        return "utf-8"
+
+
+class _TokenBucket:
+    """令牌桶限速器 (每个主机一个)，等待令牌时不占用并发槽"""
+    
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self) -> None:
+        """取一个令牌，不足时按缺口等待"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
 
 class CrawlResult(BaseModel):
     """爬取结果"""
+    model_config = ConfigDict(extra="ignore")
+    
     url: str
     status_code: int
     content_type: str
@@ -33,7 +190,7 @@ class WebCrawler:
     
     支持:
     - 并发爬取
-    - 请求限速
+    - 按主机限制连接数
     - 自动重试
     - 内容提取
     """
@@ -41,32 +198,74 @@ class WebCrawler:
     def __init__(
         self,
         max_concurrent: int | None = None,
-        request_delay: float | None = None,
         user_agent: str | None = None,
+        connection_limit: int | None = None,
+        limit_per_host: int | None = None,
+        max_body_bytes: int | None = None,
+        requests_per_host: float | None = None,
+        keep_html: bool = False,
     ):
         settings = get_settings()
         crawler_config = settings.ingestion.crawler
         
         self.max_concurrent = max_concurrent or crawler_config.max_concurrent
-        self.request_delay = request_delay or crawler_config.request_delay
         self.user_agent = user_agent or crawler_config.user_agent
+        self.connection_limit = (
+            connection_limit or crawler_config.connection_limit or self.max_concurrent * 2
+        )
+        self.limit_per_host = (
+            limit_per_host or crawler_config.limit_per_host or self.max_concurrent
+        )
+        self.max_body_bytes = max_body_bytes or crawler_config.max_body_bytes
+        self.requests_per_host = (
+            requests_per_host if requests_per_host is not None
+            else crawler_config.requests_per_host
+        )
         
         self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        # 默认只保留提取后的纯文本，避免结果中同时驻留整页 HTML
+        self.keep_html = keep_html
+        
         self._session: aiohttp.ClientSession | None = None
+        self._limiters: dict[str, _TokenBucket] = {}
+        # HTML 解析为 CPU 密集型，放到线程池执行 (lexbor 解析期间释放 GIL)
+        self._parse_executor = ThreadPoolExecutor(
+            max_workers=os.cpu_count(), thread_name_prefix="crawler-parse"
+        )
     
     async def _get_session(self) -> aiohttp.ClientSession:
         """获取或创建 HTTP 会话"""
         if self._session is None or self._session.closed:
+            # 显式连接池: 与信号量匹配的连接上限、按主机限流、DNS 缓存与长连接复用
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=300,
+                keepalive_timeout=75,
+                enable_cleanup_closed=True,
+            )
             self._session = aiohttp.ClientSession(
+                connector=connector,
                 headers={"User-Agent": self.user_agent},
                 timeout=aiohttp.ClientTimeout(total=30),
             )
         return self._session
     
+    def _get_limiter(self, url: str) -> _TokenBucket | None:
+        """获取目标主机的限速器 (requests_per_host <= 0 时不限速)"""
+        if self.requests_per_host <= 0:
+            return None
+        host = urlparse(url).netloc
+        limiter = self._limiters.get(host)
+        if limiter is None:
+            limiter = self._limiters[host] = _TokenBucket(self.requests_per_host)
+        return limiter
+    
     async def close(self):
         """关闭会话"""
         if self._session and not self._session.closed:
             await self._session.close()
+        self._parse_executor.shutdown(wait=False)
     
     async def fetch(self, url: str, retries: int = 3) -> CrawlResult:
         """爬取单个 URL
@@ -78,55 +277,128 @@ class WebCrawler:
         Returns:
             CrawlResult: 爬取结果
         """
-        async with self._semaphore:
-            session = await self._get_session()
-            
-            for attempt in range(retries):
-                try:
-                    async with session.get(url) as response:
-                        content_type = response.headers.get("Content-Type", "")
-                        html = await response.text()
-                        
-                        # 提取纯文本和标题
-                        text, title, links = self._extract_content(html, url)
-                        
-                        result = CrawlResult(
-                            url=url,
-                            status_code=response.status,
-                            content_type=content_type,
-                            text=text,
-                            html=html,
-                            title=title,
-                            links=links,
+        session = await self._get_session()
+        limiter = self._get_limiter(url)
+        
+        # 仅对连接错误、超时与 429/5xx 重试，优先遵循 Retry-After，否则指数退避
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(retries),
+            wait=_retry_wait,
+            retry=retry_if_exception_type(
+                (aiohttp.ClientConnectionError, asyncio.TimeoutError, _RetryableStatusError)
+            ),
+            reraise=True,
+        )
+        
+        try:
+            async for attempt in retrying:
+                with attempt:
+                    # 先按主机取令牌，再占用全局并发槽；退避等待也不占用并发槽
+                    if limiter is not None:
+                        await limiter.acquire()
+                    
+                    try:
+                        return await self._fetch_once(session, url)
+                    except _RetryableStatusError as e:
+                        logger.warning(
+                            f"Fetch got {e.status} for {url} "
+                            f"(attempt {attempt.retry_state.attempt_number})"
                         )
-                        
-                        logger.debug(f"Fetched {url}: {response.status}")
-                        
-                        # 请求间隔
-                        await asyncio.sleep(self.request_delay)
-                        
-                        return result
-                        
-                except aiohttp.ClientError as e:
-                    logger.warning(f"Fetch error for {url} (attempt {attempt + 1}): {e}")
-                    if attempt < retries - 1:
-                        await asyncio.sleep(2 ** attempt)  # 指数退避
-                    else:
-                        return CrawlResult(
-                            url=url,
-                            status_code=0,
-                            content_type="",
-                            error=str(e),
+                        raise
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        logger.warning(
+                            f"Fetch error for {url} "
+                            f"(attempt {attempt.retry_state.attempt_number}): {e}"
                         )
-                        
-                except Exception as e:
-                    logger.error(f"Unexpected error for {url}: {e}")
-                    return CrawlResult(
-                        url=url,
-                        status_code=0,
-                        content_type="",
-                        error=str(e),
-                    )
+                        raise
+        
+        except _RetryableStatusError as e:
+            return CrawlResult(
+                url=url,
+                status_code=e.status,
+                content_type=e.content_type,
+                error=str(e),
+            )
+        
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return CrawlResult(
+                url=url,
+                status_code=0,
+                content_type="",
+                error=str(e) or repr(e),
+            )
+        
+        except Exception as e:
+            logger.error(f"Unexpected error for {url}: {e}")
+            return CrawlResult(
+                url=url,
+                status_code=0,
+                content_type="",
+                error=str(e),
+            )
+    
+    async def _fetch_once(self, session: aiohttp.ClientSession, url: str) -> CrawlResult:
+        """发起单次请求并解析 (429/5xx 抛出 _RetryableStatusError)"""
+        async with self._semaphore, session.get(url) as response:
+            content_type = response.headers.get("Content-Type", "")
+            
+            if response.status in RETRYABLE_STATUSES:
+                raise _RetryableStatusError(
+                    response.status,
+                    content_type,
+                    _parse_retry_after(response.headers.get("Retry-After")),
+                )
+            
+            # 先看响应头: 非 HTML 或声明体积超限的响应不下载正文
+            skip_reason = self._skip_reason(response)
+            if skip_reason:
+                logger.debug(f"Skipped {url}: {skip_reason}")
+                return CrawlResult(
+                    url=url,
+                    status_code=response.status,
+                    content_type=content_type,
+                    error=skip_reason,
+                )
+            
+            html = await self._read_body(response)
+            
+            # 提取纯文本和标题 (不阻塞事件循环)
+            text, title, links = await asyncio.get_running_loop().run_in_executor(
+                self._parse_executor, self._extract_content, html, url
+            )
+            
+            logger.debug(f"Fetched {url}: {response.status}")
+            
+            return CrawlResult(
+                url=url,
+                status_code=response.status,
+                content_type=content_type,
+                text=text,
+                html=html if self.keep_html else "",
+                title=title,
+                links=links,
+            )
+    
+    def _skip_reason(self, response: aiohttp.ClientResponse) -> str | None:
+        """根据响应头判断是否跳过正文下载"""
+        mimetype = response.content_type
+        if response.headers.get("Content-Type") and mimetype not in HTML_CONTENT_TYPES:
+            return f"Unsupported content type: {mimetype}"
+        
+        if response.content_length and response.content_length > self.max_body_bytes:
+            return f"Content too large: {response.content_length} bytes (max: {self.max_body_bytes})"
+        
+        return None
+    
+    async def _read_body(self, response: aiohttp.ClientResponse) -> str:
+        """流式读取响应体，最多 max_body_bytes 字节"""
+        body = bytearray()
+        async for chunk in response.content.iter_chunked(65536):
+            body += chunk
+            if len(body) >= self.max_body_bytes:
+                del body[self.max_body_bytes:]
+                break
+        return body.decode(_resolve_charset(response.charset), errors="replace")
     
     async def fetch_many(self, urls: list[str]) -> list[CrawlResult]:
         """并发爬取多个 URL
@@ -140,6 +412,26 @@ class WebCrawler:
         tasks = [self.fetch(url) for url in urls]
         return await asyncio.gather(*tasks)
     
+    async def iter_many(self, urls: list[str]) -> AsyncIterator[CrawlResult]:
+        """并发爬取多个 URL，按完成顺序逐个产出结果
+        
+        下游可在首个结果返回时即开始处理，无需等待全部完成。
+        
+        Args:
+            urls: URL 列表
+            
+        Yields:
+            CrawlResult: 爬取结果 (顺序与输入不一致)
+        """
+        tasks = [asyncio.create_task(self.fetch(url)) for url in urls]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # 调用方提前退出时取消未完成的请求
+            for task in tasks:
+                task.cancel()
+    
     def _extract_content(
         self,
         html: str,
@@ -155,56 +447,31 @@ class WebCrawler:
             tuple: (纯文本, 标题, 链接列表)
         """
         try:
-            from html.parser import HTMLParser
+            if LexborHTMLParser is not None:
+                text, title, raw_links = _parse_with_lexbor(html)
+            else:
+                text, title, raw_links = _parse_with_stdlib(html)
             
-            class ContentExtractor(HTMLParser):
-                def __init__(self):
-                    super().__init__()
-                    self.text_parts = []
-                    self.title = ""
-                    self.links = []
-                    self.in_title = False
-                    self.skip_tags = {"script", "style", "nav", "footer", "header"}
-                    self.current_skip = 0
-                
-                def handle_starttag(self, tag, attrs):
-                    if tag in self.skip_tags:
-                        self.current_skip += 1
-                    elif tag == "title":
-                        self.in_title = True
-                    elif tag == "a":
-                        for name, value in attrs:
-                            if name == "href" and value:
-                                self.links.append(value)
-                
-                def handle_endtag(self, tag):
-                    if tag in self.skip_tags:
-                        self.current_skip = max(0, self.current_skip - 1)
-                    elif tag == "title":
-                        self.in_title = False
-                
-                def handle_data(self, data):
-                    if self.in_title:
-                        self.title = data.strip()
-                    elif self.current_skip == 0:
-                        text = data.strip()
-                        if text:
-                            self.text_parts.append(text)
+            # 处理链接为绝对路径: 常见形式直接拼接，其余交给 urljoin
+            parsed = urlparse(base_url)
+            scheme_host = f"{parsed.scheme}://{parsed.netloc}"
             
-            extractor = ContentExtractor()
-            extractor.feed(html)
-            
-            # 处理链接为绝对路径
             links = []
-            for link in extractor.links:
+            for link in raw_links:
+                link = link.strip()
+                if not link or link.startswith(NON_HTTP_LINK_PREFIXES):
+                    continue
                 if link.startswith(("http://", "https://")):
                     links.append(link)
+                elif link.startswith("//"):
+                    links.append(f"{parsed.scheme}:{link}")
                 elif link.startswith("/"):
+                    links.append(scheme_host + link)
+                elif ":" not in link.split("/", 1)[0]:
+                    # 相对路径 (./a、../b、c.html)
                     links.append(urljoin(base_url, link))
             
-            text = " ".join(extractor.text_parts)
-            
-            return text, extractor.title, links[:50]  # 限制链接数量
+            return text, title, links[:50]  # 限制链接数量
             
         except Exception as e:
             logger.warning(f"Content extraction error: {e}")
@@ -226,31 +493,52 @@ class WebCrawler:
         Returns:
             list[CrawlResult]: 爬取结果列表
         """
-        visited = set()
-        to_visit = [start_url]
-        results = []
+        return [
+            result
+            async for result in self.iter_site(start_url, max_pages, same_domain_only)
+        ]
+    
+    async def iter_site(
+        self,
+        start_url: str,
+        max_pages: int = 10,
+        same_domain_only: bool = True,
+    ) -> AsyncIterator[CrawlResult]:
+        """广度优先爬取站点，逐页产出结果
+        
+        Args:
+            start_url: 起始 URL
+            max_pages: 最大页面数
+            same_domain_only: 是否只爬取同域名
+            
+        Yields:
+            CrawlResult: 爬取结果
+        """
+        # 入队即去重: 双端队列 O(1) 出队，集合 O(1) 判重
+        queued = {start_url}
+        to_visit = deque([start_url])
+        fetched = 0
         
+        # 链接已在 _extract_content 中规范为绝对 http(s) URL，用前缀匹配代替逐条 urlparse
         start_domain = urlparse(start_url).netloc
+        site_roots = {f"{scheme}://{start_domain}" for scheme in ("http", "https")}
+        site_prefixes = tuple(root + sep for root in site_roots for sep in "/?#")
         
-        while to_visit and len(results) < max_pages:
-            url = to_visit.pop(0)
-            
-            if url in visited:
-                continue
-            
-            visited.add(url)
+        while to_visit and fetched < max_pages:
+            url = to_visit.popleft()
             result = await self.fetch(url)
-            results.append(result)
+            fetched += 1
             
             # 添加新链接
-            if result.links:
-                for link in result.links:
-                    if link not in visited and link not in to_visit:
-                        if same_domain_only:
-                            if urlparse(link).netloc == start_domain:
-                                to_visit.append(link)
-                        else:
-                            to_visit.append(link)
-        
-        return results
+            for link in result.links:
+                if link in queued:
+                    continue
+                if same_domain_only and not (
+                    link.startswith(site_prefixes) or link in site_roots
+                ):
+                    continue
+                queued.add(link)
+                to_visit.append(link)
+            
+            yield result
 
@@ -1,6 +1,6 @@
 # 外部 API 模块
 from .clinical_trials import ClinicalTrialsAPI
-from .base import ExternalAPIClient
+from .base import ExternalAPIClient, shutdown_all_sessions
 
-__all__ = ["ClinicalTrialsAPI", "ExternalAPIClient"]
+__all__ = ["ClinicalTrialsAPI", "ExternalAPIClient", "shutdown_all_sessions"]
 
@@ -4,18 +4,104 @@
 """
 
 from abc import ABC, abstractmethod
+from pathlib import Path
 from typing import Any
 
 import aiohttp
-from pydantic import BaseModel
+import orjson
+from pydantic import BaseModel, ConfigDict
 
 from src.utils import get_logger
 
 logger = get_logger(__name__)
 
 
+def _loads(body: bytes) -> Any:
+    """解码 JSON 响应体 (orjson 直接解析字节，跳过 str 解码)"""
+    return orjson.loads(body) if body else None
+
+
+def _dumps(obj: Any) -> str:
+    """序列化 JSON 请求体"""
+    return orjson.dumps(obj).decode()
+
+
+def _create_cache_backend(cache_path: str, cache_ttl: int) -> Any:
+    """创建 HTTP 响应缓存后端 (未安装 http-cache 可选依赖时返回 None)"""
+    try:
+        from aiohttp_client_cache import SQLiteBackend
+    except ImportError:
+        logger.warning("aiohttp-client-cache not installed, HTTP response caching disabled")
+        return None
+    
+    path = Path(cache_path).expanduser()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # 仅缓存 GET/HEAD，并遵循上游 Cache-Control / ETag
+    return SQLiteBackend(
+        cache_name=str(path),
+        expire_after=cache_ttl,
+        allowed_methods=("GET", "HEAD"),
+        cache_control=True,
+    )
+
+
+# 进程内共享的 HTTP 会话，按 (base_url, api_key, cache_path) 复用连接池，生命周期跟随应用而非客户端实例
+_SESSIONS: dict[tuple[str, str | None, str], aiohttp.ClientSession] = {}
+
+
+async def get_shared_session(
+    key: tuple[str, str | None, str],
+    headers: dict[str, str],
+    timeout: int,
+    connection_limit: int,
+    limit_per_host: int,
+    cache_ttl: int = 3600,
+) -> aiohttp.ClientSession:
+    """获取或创建共享会话
+    
+    key 的最后一项为响应缓存文件路径，非空时返回带缓存的会话。
+    """
+    session = _SESSIONS.get(key)
+    if session is None or session.closed:
+        # 同一 API 主机的连接复用，并缓存 DNS 解析结果
+        connector = aiohttp.TCPConnector(
+            limit=connection_limit,
+            limit_per_host=limit_per_host,
+            ttl_dns_cache=300,
+            keepalive_timeout=75,
+            enable_cleanup_closed=True,
+        )
+        session_kwargs = {
+            "connector": connector,
+            "headers": headers,
+            "timeout": aiohttp.ClientTimeout(total=timeout),
+            "json_serialize": _dumps,
+        }
+        
+        cache_path = key[-1]
+        cache = _create_cache_backend(cache_path, cache_ttl) if cache_path else None
+        if cache is not None:
+            from aiohttp_client_cache import CachedSession
+            session = CachedSession(cache=cache, **session_kwargs)
+        else:
+            session = aiohttp.ClientSession(**session_kwargs)
+        _SESSIONS[key] = session
+    return session
+
+
+async def shutdown_all_sessions() -> None:
+    """关闭所有共享会话 (应用退出时调用)"""
+    sessions = list(_SESSIONS.values())
+    _SESSIONS.clear()
+    for session in sessions:
+        if not session.closed:
+            await session.close()
+
+
 class APIResponse(BaseModel):
     """API 响应"""
+    model_config = ConfigDict(extra="ignore")
+    
     success: bool
     data: Any = None
     error: str | None = None
@@ -30,19 +116,30 @@ class ExternalAPIClient(ABC):
         base_url: str,
         api_key: str | None = None,
         timeout: int = 30,
+        connection_limit: int = 20,
+        limit_per_host: int = 10,
+        cache_path: str = "",
+        cache_ttl: int = 3600,
     ):
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key
         self.timeout = timeout
+        self.connection_limit = connection_limit
+        self.limit_per_host = limit_per_host
+        self.cache_path = cache_path  # GET 响应缓存文件，为空时不缓存
+        self.cache_ttl = cache_ttl
         self._session: aiohttp.ClientSession | None = None
     
     async def _get_session(self) -> aiohttp.ClientSession:
-        """获取 HTTP 会话"""
+        """获取 HTTP 会话 (同一 base_url/api_key 的客户端共享)"""
         if self._session is None or self._session.closed:
-            headers = self._get_headers()
-            self._session = aiohttp.ClientSession(
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            self._session = await get_shared_session(
+                (self.base_url, self.api_key, self.cache_path),
+                headers=self._get_headers(),
+                timeout=self.timeout,
+                connection_limit=self.connection_limit,
+                limit_per_host=self.limit_per_host,
+                cache_ttl=self.cache_ttl,
             )
         return self._session
     
@@ -57,9 +154,11 @@ class ExternalAPIClient(ABC):
         return headers
     
     async def close(self):
-        """关闭会话"""
-        if self._session and not self._session.closed:
-            await self._session.close()
+        """释放会话引用
+        
+        共享会话由 shutdown_all_sessions 在应用退出时统一关闭。
+        """
+        self._session = None
     
     async def get(
         self,
@@ -72,7 +171,7 @@ class ExternalAPIClient(ABC):
         
         try:
             async with session.get(url, params=params) as response:
-                data = await response.json()
+                data = _loads(await response.read())
                 return APIResponse(
                     success=response.status == 200,
                     data=data,
@@ -97,7 +196,7 @@ class ExternalAPIClient(ABC):
         
         try:
             async with session.post(url, json=data, params=params) as response:
-                resp_data = await response.json()
+                resp_data = _loads(await response.read())
                 return APIResponse(
                     success=response.status in (200, 201),
                     data=resp_data,
@@ -4,9 +4,10 @@
 获取临床试验数据
 """
 
-from typing import Any
+import asyncio
+from typing import Any, AsyncIterator
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from src.config import get_settings
 from src.knowledge.models.nodes import (
@@ -22,9 +23,61 @@ from .base import ExternalAPIClient
 
 logger = get_logger(__name__)
 
+# API 状态 -> TrialStatus
+_STATUS_MAP = {
+    "RECRUITING": TrialStatus.RECRUITING,
+    "ACTIVE_NOT_RECRUITING": TrialStatus.ACTIVE_NOT_RECRUITING,
+    "COMPLETED": TrialStatus.COMPLETED,
+    "SUSPENDED": TrialStatus.SUSPENDED,
+    "TERMINATED": TrialStatus.TERMINATED,
+    "WITHDRAWN": TrialStatus.WITHDRAWN,
+    "NOT_YET_RECRUITING": TrialStatus.NOT_YET_RECRUITING,
+}
+
+# API 阶段 -> TrialPhase
+_PHASE_MAP = {
+    "PHASE1": TrialPhase.PHASE_1,
+    "PHASE2": TrialPhase.PHASE_2,
+    "PHASE3": TrialPhase.PHASE_3,
+    "PHASE4": TrialPhase.PHASE_4,
+    "EARLY_PHASE1": TrialPhase.PHASE_1,
+    "NA": TrialPhase.PRECLINICAL,
+}
+
+# API 分组方式 -> TrialDesign
+_DESIGN_MAP = {
+    "RANDOMIZED": TrialDesign.DOUBLE_BLIND,
+    "NON_RANDOMIZED": TrialDesign.OPEN_LABEL,
+    "NA": TrialDesign.SINGLE_ARM,
+}
+
+
+# 列表视图只需的字段，服务端裁剪后响应体仅含这些模块
+LIST_VIEW_FIELDS = [
+    "NCTId",
+    "OfficialTitle",
+    "BriefTitle",
+    "OverallStatus",
+    "Phase",
+    "EnrollmentCount",
+]
+
+
+def _dig(data: dict, *keys: str, default: Any = None) -> Any:
+    """沿键路径逐层取值，任一层缺失或非 dict 时返回 default"""
+    for key in keys:
+        if not isinstance(data, dict):
+            return default
+        data = data.get(key)
+        if data is None:
+            return default
+    return data
+
 
 class ClinicalTrialStudy(BaseModel):
     """临床试验研究"""
+    model_config = ConfigDict(extra="ignore")
+    
     nct_id: str
     title: str
     status: str
@@ -46,10 +99,13 @@ class ClinicalTrialsAPI(ExternalAPIClient):
     文档: https://clinicaltrials.gov/data-api/api
     """
     
-    def __init__(self):
-        settings = get_settings()
-        base_url = settings.ingestion.clinical_trials_api
-        super().__init__(base_url=base_url)
+    def __init__(self, cache_enabled: bool = True):
+        ingestion_config = get_settings().ingestion
+        super().__init__(
+            base_url=ingestion_config.clinical_trials_api,
+            cache_path=ingestion_config.http_cache_path if cache_enabled else "",
+            cache_ttl=ingestion_config.http_cache_ttl,
+        )
     
     async def health_check(self) -> bool:
         """健康检查"""
@@ -66,6 +122,7 @@ class ClinicalTrialsAPI(ExternalAPIClient):
         phase: list[str] | None = None,
         page_size: int = 20,
         page_token: str | None = None,
+        fields: list[str] | None = None,
     ) -> dict[str, Any]:
         """搜索临床试验
         
@@ -78,6 +135,7 @@ class ClinicalTrialsAPI(ExternalAPIClient):
             phase: 阶段过滤
             page_size: 每页数量
             page_token: 分页令牌
+            fields: 仅返回指定字段 (缩小响应体)
             
         Returns:
             dict: 搜索结果
@@ -114,6 +172,9 @@ class ClinicalTrialsAPI(ExternalAPIClient):
         if page_token:
             params["pageToken"] = page_token
         
+        if fields:
+            params["fields"] = ",".join(fields)
+        
         response = await self.get("/studies", params=params)
         
         if not response.success:
@@ -140,29 +201,101 @@ class ClinicalTrialsAPI(ExternalAPIClient):
         study_data = response.data
         
         # 解析响应
-        protocol = study_data.get("protocolSection", {})
-        id_module = protocol.get("identificationModule", {})
-        status_module = protocol.get("statusModule", {})
-        design_module = protocol.get("designModule", {})
-        conditions_module = protocol.get("conditionsModule", {})
-        interventions_module = protocol.get("armsInterventionsModule", {})
-        sponsors_module = protocol.get("sponsorCollaboratorsModule", {})
-        outcomes_module = protocol.get("outcomesModule", {})
-        
-        return ClinicalTrialStudy(
-            nct_id=nct_id,
-            title=id_module.get("officialTitle", id_module.get("briefTitle", "")),
-            status=status_module.get("overallStatus", ""),
-            phase=design_module.get("phases", [None])[0] if design_module.get("phases") else None,
-            enrollment=design_module.get("enrollmentInfo", {}).get("count"),
-            start_date=status_module.get("startDateStruct", {}).get("date"),
-            completion_date=status_module.get("completionDateStruct", {}).get("date"),
-            conditions=conditions_module.get("conditions", []),
-            interventions=interventions_module.get("interventions", []),
-            sponsors=[sponsors_module.get("leadSponsor", {})] if sponsors_module.get("leadSponsor") else [],
-            design=design_module,
-            outcomes=outcomes_module.get("primaryOutcomes", []),
+        protocol = study_data.get("protocolSection") or {}
+        id_module = protocol.get("identificationModule") or {}
+        status_module = protocol.get("statusModule") or {}
+        design_module = protocol.get("designModule") or {}
+        phases = design_module.get("phases")
+        lead_sponsor = _dig(protocol, "sponsorCollaboratorsModule", "leadSponsor")
+        
+        return ClinicalTrialStudy.model_validate({
+            "nct_id": nct_id,
+            "title": id_module.get("officialTitle", id_module.get("briefTitle", "")),
+            "status": status_module.get("overallStatus", ""),
+            "phase": phases[0] if phases else None,
+            "enrollment": _dig(design_module, "enrollmentInfo", "count"),
+            "start_date": _dig(status_module, "startDateStruct", "date"),
+            "completion_date": _dig(status_module, "completionDateStruct", "date"),
+            "conditions": _dig(protocol, "conditionsModule", "conditions", default=[]),
+            "interventions": _dig(protocol, "armsInterventionsModule", "interventions", default=[]),
+            "sponsors": [lead_sponsor] if lead_sponsor else [],
+            "design": design_module,
+            "outcomes": _dig(protocol, "outcomesModule", "primaryOutcomes", default=[]),
+        })
+    
+    async def fetch_studies(
+        self,
+        nct_ids: list[str],
+        concurrency: int = 16,
+    ) -> list[ClinicalTrialStudy]:
+        """并发获取多个临床试验详情
+        
+        Args:
+            nct_ids: NCT 编号列表
+            concurrency: 最大并发请求数
+            
+        Returns:
+            list[ClinicalTrialStudy]: 成功获取的试验详情 (保持输入顺序)
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def fetch_one(nct_id: str) -> ClinicalTrialStudy | None:
+            async with semaphore:
+                return await self.get_study(nct_id)
+        
+        results = await asyncio.gather(
+            *(fetch_one(nct_id) for nct_id in nct_ids),
+            return_exceptions=True,
         )
+        
+        studies = []
+        for nct_id, result in zip(nct_ids, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Failed to get study {nct_id}: {result}")
+            elif result is not None:
+                studies.append(result)
+        
+        return studies
+    
+    async def iter_search(
+        self,
+        max_pages: int | None = None,
+        **search_kwargs: Any,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """按分页令牌遍历搜索结果
+        
+        处理当前页时已在后台请求下一页，隐藏分页往返延迟。
+        
+        Args:
+            max_pages: 最大页数 (None 表示不限)
+            **search_kwargs: 透传给 search_studies 的参数 (page_token 除外)
+            
+        Yields:
+            dict: 单条试验原始数据
+        """
+        search_kwargs.pop("page_token", None)
+        next_page = asyncio.ensure_future(self.search_studies(**search_kwargs))
+        pages = 0
+        
+        try:
+            while next_page is not None:
+                result = await next_page
+                next_page = None
+                pages += 1
+                
+                token = result.get("nextPageToken")
+                if token and (max_pages is None or pages < max_pages):
+                    # 预取下一页
+                    next_page = asyncio.ensure_future(
+                        self.search_studies(page_token=token, **search_kwargs)
+                    )
+                
+                for study_data in result.get("studies", []):
+                    yield study_data
+        finally:
+            # 调用方提前退出时取消未消费的预取
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
     
     async def search_by_drug(
         self,
@@ -187,25 +320,25 @@ class ClinicalTrialsAPI(ExternalAPIClient):
             status=status,
             phase=phase,
             page_size=page_size,
+            fields=LIST_VIEW_FIELDS,
         )
         
         studies = []
         for study_data in result.get("studies", []):
-            protocol = study_data.get("protocolSection", {})
-            id_module = protocol.get("identificationModule", {})
-            status_module = protocol.get("statusModule", {})
-            design_module = protocol.get("designModule", {})
+            protocol = study_data.get("protocolSection") or {}
+            id_module = protocol.get("identificationModule") or {}
+            nct_id = id_module.get("nctId")
+            if not nct_id:
+                continue
             
-            nct_id = id_module.get("nctId", "")
-            if nct_id:
-                study = ClinicalTrialStudy(
-                    nct_id=nct_id,
-                    title=id_module.get("officialTitle", id_module.get("briefTitle", "")),
-                    status=status_module.get("overallStatus", ""),
-                    phase=design_module.get("phases", [None])[0] if design_module.get("phases") else None,
-                    enrollment=design_module.get("enrollmentInfo", {}).get("count"),
-                )
-                studies.append(study)
+            phases = _dig(protocol, "designModule", "phases")
+            studies.append(ClinicalTrialStudy(
+                nct_id=nct_id,
+                title=id_module.get("officialTitle", id_module.get("briefTitle", "")),
+                status=_dig(protocol, "statusModule", "overallStatus", default=""),
+                phase=phases[0] if phases else None,
+                enrollment=_dig(protocol, "designModule", "enrollmentInfo", "count"),
+            ))
         
         return studies
     
@@ -218,43 +351,14 @@ class ClinicalTrialsAPI(ExternalAPIClient):
         Returns:
             Trial: Trial 节点对象
         """
-        # 状态映射
-        status_map = {
-            "RECRUITING": TrialStatus.RECRUITING,
-            "ACTIVE_NOT_RECRUITING": TrialStatus.ACTIVE_NOT_RECRUITING,
-            "COMPLETED": TrialStatus.COMPLETED,
-            "SUSPENDED": TrialStatus.SUSPENDED,
-            "TERMINATED": TrialStatus.TERMINATED,
-            "WITHDRAWN": TrialStatus.WITHDRAWN,
-            "NOT_YET_RECRUITING": TrialStatus.NOT_YET_RECRUITING,
-        }
-        
-        # 阶段映射
-        phase_map = {
-            "PHASE1": TrialPhase.PHASE_1,
-            "PHASE2": TrialPhase.PHASE_2,
-            "PHASE3": TrialPhase.PHASE_3,
-            "PHASE4": TrialPhase.PHASE_4,
-            "EARLY_PHASE1": TrialPhase.PHASE_1,
-            "NA": TrialPhase.PRECLINICAL,
-        }
-        
-        # 设计映射
-        design_info = study.design
-        design_type = design_info.get("designInfo", {}).get("allocation", "")
-        
-        design_map = {
-            "RANDOMIZED": TrialDesign.DOUBLE_BLIND,
-            "NON_RANDOMIZED": TrialDesign.OPEN_LABEL,
-            "NA": TrialDesign.SINGLE_ARM,
-        }
+        design_type = _dig(study.design, "designInfo", "allocation", default="")
         
         return Trial(
             nct_id=study.nct_id,
             title=study.title,
-            design=design_map.get(design_type, TrialDesign.OPEN_LABEL),
-            phase=phase_map.get(study.phase, TrialPhase.PHASE_2) if study.phase else TrialPhase.PHASE_2,
-            status=status_map.get(study.status, TrialStatus.RECRUITING),
+            design=_DESIGN_MAP.get(design_type, TrialDesign.OPEN_LABEL),
+            phase=_PHASE_MAP.get(study.phase, TrialPhase.PHASE_2),
+            status=_STATUS_MAP.get(study.status, TrialStatus.RECRUITING),
             enrollment_target=study.enrollment,
             sponsor=study.sponsors[0].get("name") if study.sponsors else None,
         )
@@ -1,5 +1,5 @@
 # 文档解析模块
-from .document_parser import DocumentParser
+from .document_parser import DocumentParser, shutdown_parse_pools
 
-__all__ = ["DocumentParser"]
+__all__ = ["DocumentParser", "shutdown_parse_pools"]
 
@@ -6,19 +6,134 @@
 - TXT
 """
 
+import asyncio
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
-from pydantic import BaseModel, Field
+import charset_normalizer
+from pydantic import BaseModel, ConfigDict, Field
 
 from src.config import get_settings
 from src.utils import get_logger
 
 logger = get_logger(__name__)
 
+# 按页区间并行提取时每个进程的最少页数，小文档直接串行以免进程间通信开销
+PARALLEL_PDF_PAGE_THRESHOLD = 20
+
+# 按页并行提取的进程数上限
+PAGE_POOL_WORKERS = os.cpu_count() or 1
+
+# 文档解析专用线程池，与事件循环默认线程池隔离，避免多文档解析阻塞其他 to_thread 调用
+PARSE_POOL_WORKERS = 4
+_parse_pool: ThreadPoolExecutor | None = None
+
+# 按页提取的进程池，进程内共享、常驻复用
+_page_pool: ProcessPoolExecutor | None = None
+_page_pool_lock = threading.Lock()
+
+
+def _get_parse_pool() -> ThreadPoolExecutor:
+    """获取 (惰性创建) 文档解析线程池"""
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = ThreadPoolExecutor(
+            max_workers=PARSE_POOL_WORKERS, thread_name_prefix="docparse"
+        )
+    return _parse_pool
+
+
+def _get_page_pool() -> ProcessPoolExecutor:
+    """获取 (惰性创建) 按页提取的进程池
+    
+    在解析线程中创建，多线程进程中 fork 可能死锁，因此使用 forkserver/spawn 启动子进程。
+    """
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None:
+            method = (
+                "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            )
+            _page_pool = ProcessPoolExecutor(
+                max_workers=PAGE_POOL_WORKERS,
+                mp_context=multiprocessing.get_context(method),
+            )
+        return _page_pool
+
+
+def shutdown_parse_pools() -> None:
+    """关闭文档解析线程池与进程池 (应用退出时调用)"""
+    global _parse_pool, _page_pool
+    with _page_pool_lock:
+        if _page_pool is not None:
+            _page_pool.shutdown(cancel_futures=True)
+            _page_pool = None
+    if _parse_pool is not None:
+        _parse_pool.shutdown(cancel_futures=True)
+        _parse_pool = None
+
+
+def _extract_page_range(path: str, start: int, end: int) -> tuple[str, list[dict]]:
+    """提取 PDF [start, end) 页的文本与图片信息
+    
+    模块级函数，可在子进程中独立打开文档执行。
+    
+    Returns:
+        tuple: (页间以空行分隔的文本, 图片信息列表)
+    """
+    import fitz  # PyMuPDF
+    
+    # 逐页写入缓冲区，避免列表与拼接结果两份全文同时驻留内存
+    buf = io.StringIO()
+    images = []
+    
+    with fitz.open(path) as doc:
+        for page_num in range(start, end):
+            page = doc[page_num]
+            
+            # 提取文本 (页间以空行分隔)
+            if page_num > start:
+                buf.write("\n\n")
+            buf.write(page.get_text("text"))
+            
+            # 提取表格 (简单实现)
+            # TODO: 使用更高级的表格提取库
+            
+            # 提取图片信息
+            for img in page.get_images():
+                images.append({
+                    "page": page_num + 1,
+                    "xref": img[0],
+                    "width": img[2],
+                    "height": img[3],
+                })
+    
+    return buf.getvalue(), images
+
+
+def _decode_text(raw: bytes) -> str:
+    """单次检测编码并解码文本字节"""
+    try:
+        # 绝大多数文本为 UTF-8，直接解码即可，无需检测
+        return raw.decode("utf-8")
+    except UnicodeDecodeError:
+        pass
+    
+    match = charset_normalizer.from_bytes(raw).best()
+    if match is not None:
+        return str(match)
+    return raw.decode("utf-8", errors="replace")
+
 
 class ParsedDocument(BaseModel):
     """解析后的文档"""
+    model_config = ConfigDict(extra="ignore")
+    
     filename: str
     file_type: str
     text: str
@@ -106,46 +221,43 @@ class DocumentParser:
         try:
             import fitz  # PyMuPDF
             
-            doc = fitz.open(file_path)
+            with fitz.open(file_path) as doc:
+                pages = doc.page_count
+                metadata = {
+                    "title": doc.metadata.get("title", ""),
+                    "author": doc.metadata.get("author", ""),
+                    "subject": doc.metadata.get("subject", ""),
+                    "keywords": doc.metadata.get("keywords", ""),
+                    "creator": doc.metadata.get("creator", ""),
+                    "producer": doc.metadata.get("producer", ""),
+                }
             
-            text_parts = []
             tables = []
-            images = []
             
-            for page_num, page in enumerate(doc):
-                # 提取文本
-                text = page.get_text()
-                text_parts.append(text)
+            # 每个进程至少分到 PARALLEL_PDF_PAGE_THRESHOLD 页，不足两个进程时串行
+            n_workers = min(PAGE_POOL_WORKERS, pages // PARALLEL_PDF_PAGE_THRESHOLD)
+            if n_workers >= 2:
+                # 按连续页区间拆分到多进程 (PyMuPDF 不支持多线程共享)，按顺序合并
+                step = -(-pages // n_workers)
+                bounds = [(i, min(i + step, pages)) for i in range(0, pages, step)]
                 
-                # 提取表格 (简单实现)
-                # TODO: 使用更高级的表格提取库
+                chunks = list(_get_page_pool().map(
+                    _extract_page_range,
+                    [str(file_path)] * len(bounds),
+                    [lo for lo, _ in bounds],
+                    [hi for _, hi in bounds],
+                ))
                 
-                # 提取图片信息
-                image_list = page.get_images()
-                for img in image_list:
-                    images.append({
-                        "page": page_num + 1,
-                        "xref": img[0],
-                        "width": img[2],
-                        "height": img[3],
-                    })
-            
-            metadata = {
-                "title": doc.metadata.get("title", ""),
-                "author": doc.metadata.get("author", ""),
-                "subject": doc.metadata.get("subject", ""),
-                "keywords": doc.metadata.get("keywords", ""),
-                "creator": doc.metadata.get("creator", ""),
-                "producer": doc.metadata.get("producer", ""),
-            }
-            
-            doc.close()
+                text = "\n\n".join(chunk_text for chunk_text, _ in chunks)
+                images = [img for _, chunk_images in chunks for img in chunk_images]
+            else:
+                text, images = _extract_page_range(str(file_path), 0, pages)
             
             return ParsedDocument(
                 filename=file_path.name,
                 file_type=".pdf",
-                text="\n\n".join(text_parts),
-                pages=len(text_parts),
+                text=text,
+                pages=pages,
                 metadata=metadata,
                 tables=tables,
                 images=images,
@@ -228,17 +340,8 @@ class DocumentParser:
     def _parse_txt(self, file_path: Path) -> ParsedDocument:
         """解析 TXT 文档"""
         try:
-            # 尝试多种编码
-            encodings = ["utf-8", "gbk", "gb2312", "latin-1"]
-            text = ""
-            
-            for encoding in encodings:
-                try:
-                    with open(file_path, "r", encoding=encoding) as f:
-                        text = f.read()
-                    break
-                except UnicodeDecodeError:
-                    continue
+            # 一次读取原始字节，检测编码后解码
+            text = _decode_text(file_path.read_bytes())
             
             return ParsedDocument(
                 filename=file_path.name,
@@ -257,9 +360,8 @@ class DocumentParser:
             )
     
     async def parse_async(self, file_path: str | Path) -> ParsedDocument:
-        """异步解析文档（实际上是同步，但提供异步接口）"""
-        import asyncio
-        return await asyncio.get_event_loop().run_in_executor(
-            None, self.parse, file_path
+        """异步解析文档 (在专用解析线程池中执行，不阻塞事件循环)"""
+        return await asyncio.get_running_loop().run_in_executor(
+            _get_parse_pool(), self.parse, file_path
         )
 
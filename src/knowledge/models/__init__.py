@@ -16,6 +16,7 @@ from .edges import (
     CombinedWithRelation,
     HasSocRelation,
 )
+from .tables import EndpointDataTable
 
 __all__ = [
     # Nodes
@@ -33,5 +34,7 @@ __all__ = [
     "OutputsRelation",
     "CombinedWithRelation",
     "HasSocRelation",
+    # Tables
+    "EndpointDataTable",
 ]
 
@@ -8,20 +8,17 @@
 4. HAS_SOC: [适应症] --(HAS_SOC)--> [药物X]
 """
 
+from collections import defaultdict
 from datetime import date, datetime
-from enum import Enum
-from typing import Optional
-from uuid import uuid4
+from enum import StrEnum
+from typing import ClassVar, Iterable, Literal, Optional, Self
 
 from pydantic import BaseModel, Field
 
+from .nodes import NodeType, batch_now, generate_id, list_adapter
 
-def generate_id() -> str:
-    """生成唯一ID"""
-    return str(uuid4())
 
-
-class EdgeType(str, Enum):
+class EdgeType(StrEnum):
     """边类型枚举"""
     TREATS = "TREATS"
     OUTPUTS = "OUTPUTS"
@@ -35,25 +32,116 @@ class EdgeType(str, Enum):
     HAS_LANDMARK = "HAS_LANDMARK"
 
 
+# 模型字段按 Literal 校验，字段值为普通 str；EdgeType 保留为常量
+EdgeTypeName = Literal[tuple(member.value for member in EdgeType)]
+
+
+
+def _match_node_cypher(var: str, label: str, id_expr: str) -> str:
+    """按 id 匹配节点的子句
+    
+    未限定标签时展开为各节点标签的 UNION 子查询，每个分支都走 :Label(id) 索引；
+    id_expr 为行变量属性 (如 row.source_id) 时在分支内导入该变量。
+    """
+    if label:
+        return f"MATCH ({var}:{label} {{id: {id_expr}}}) "
+    
+    imported = "" if id_expr.startswith("$") else f"WITH {id_expr.split('.')[0]} "
+    branches = " UNION ".join(
+        f"{imported}MATCH ({var}:{node_label} {{id: {id_expr}}}) RETURN {var}"
+        for node_label in NodeType
+    )
+    return f"CALL {{ {branches} }} "
+
+
 class BaseEdge(BaseModel):
     """边基类"""
+    # Neo4j 关系类型 (由 edge_type 默认值派生) 与需要建索引的关系属性
+    NEO4J_LABEL: ClassVar[str] = ""
+    NEO4J_INDEX_KEYS: ClassVar[tuple[str, ...]] = ("id",)
+    # 源/目标节点标签，匹配端点时走 :Label(id) 唯一约束索引；为空表示任意标签
+    SOURCE_LABEL: ClassVar[str] = ""
+    TARGET_LABEL: ClassVar[str] = ""
+    
     id: str = Field(default_factory=generate_id)
-    edge_type: EdgeType
+    edge_type: EdgeTypeName
     source_id: str = Field(..., description="源节点ID")
     target_id: str = Field(..., description="目标节点ID")
-    created_at: datetime = Field(default_factory=datetime.now)
-    updated_at: datetime = Field(default_factory=datetime.now)
+    created_at: datetime = Field(default_factory=batch_now)
+    updated_at: datetime = Field(default_factory=batch_now)
+    
+    @classmethod
+    def validate_json_batch(cls, data: str | bytes) -> list[Self]:
+        """从 JSON 数组批量解析并校验关系 (解析与校验在 pydantic-core 中一次完成)"""
+        return list_adapter(cls).validate_json(data)
+    
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs) -> None:
+        super().__pydantic_init_subclass__(**kwargs)
+        default = cls.model_fields["edge_type"].default
+        if isinstance(default, str):
+            cls.NEO4J_LABEL = default
+    
+    @classmethod
+    def cypher_index_statements(cls) -> list[str]:
+        """本关系类型的属性索引语句 (幂等，写入前执行一次)"""
+        return [
+            f"CREATE INDEX IF NOT EXISTS FOR ()-[r:{cls.NEO4J_LABEL}]-() ON (r.{key})"
+            for key in cls.NEO4J_INDEX_KEYS
+        ]
     
     def to_neo4j_properties(self) -> dict:
-        """转换为 Neo4j 属性字典"""
-        data = self.model_dump(exclude={"edge_type", "source_id", "target_id"})
-        # 转换日期时间
-        for key, value in data.items():
-            if isinstance(value, (datetime, date)):
-                data[key] = value.isoformat()
-            elif isinstance(value, Enum):
-                data[key] = value.value
-        return data
+        """转换为 Neo4j 属性字典
+        
+        JSON 模式由 pydantic-core 直接输出 ISO 日期字符串，类型字段本身即为字符串。
+        """
+        return self.model_dump(mode="json", exclude={"edge_type", "source_id", "target_id"})
+    
+    @classmethod
+    def match_endpoints_cypher(cls, source_id: str, target_id: str) -> str:
+        """匹配源节点 a 与目标节点 b 的 MATCH 子句 (参数为 Cypher 表达式)"""
+        return (
+            _match_node_cypher("a", cls.SOURCE_LABEL, source_id)
+            + _match_node_cypher("b", cls.TARGET_LABEL, target_id)
+        )
+    
+    @classmethod
+    def unwind_cypher(cls) -> str:
+        """批量写入语句: 一次 UNWIND $rows 按 id MERGE 整批关系"""
+        return (
+            f"UNWIND $rows AS row "
+            f"{cls.match_endpoints_cypher('row.source_id', 'row.target_id')}"
+            f"MERGE (a)-[r:{cls.NEO4J_LABEL} {{id: row.props.id}}]->(b) "
+            f"SET r += row.props "
+            f"RETURN r.id AS id"
+        )
+    
+    @classmethod
+    def serialize_batch(cls, instances: list["BaseEdge"]) -> list[dict]:
+        """序列化为 unwind_cypher 的 $rows 参数"""
+        return [
+            {
+                "source_id": instance.source_id,
+                "target_id": instance.target_id,
+                "props": instance.to_neo4j_properties(),
+            }
+            for instance in instances
+        ]
+    
+    @staticmethod
+    def batch_by_type(edges: Iterable["BaseEdge"]) -> dict[type["BaseEdge"], list[dict]]:
+        """将混合类型的关系流按关系类型分组并序列化
+        
+        每组的 rows 对应该类型 unwind_cypher 的 $rows 参数，关系类型直接写在语句中，
+        不使用参数化的关系类型。
+        """
+        groups: dict[type[BaseEdge], list[BaseEdge]] = defaultdict(list)
+        for edge in edges:
+            groups[type(edge)].append(edge)
+        return {
+            edge_cls: edge_cls.serialize_batch(group)
+            for edge_cls, group in groups.items()
+        }
 
 
 class TreatsRelation(BaseEdge):
@@ -64,7 +152,9 @@ class TreatsRelation(BaseEdge):
     - 当前优先级
     - 市场预计渗透率
     """
-    edge_type: EdgeType = EdgeType.TREATS
+    edge_type: EdgeTypeName = EdgeType.TREATS.value
+    SOURCE_LABEL = NodeType.DRUG.value
+    TARGET_LABEL = NodeType.INDICATION.value
     
     # 治疗线数
     treatment_line: Optional[str] = Field(None, description="治疗线数(1L/2L/3L+)")
@@ -100,7 +190,9 @@ class OutputsRelation(BaseEdge):
     - 拖尾效应强度 (0-1)
     - 删失点密集度评分
     """
-    edge_type: EdgeType = EdgeType.OUTPUTS
+    edge_type: EdgeTypeName = EdgeType.OUTPUTS.value
+    SOURCE_LABEL = NodeType.TRIAL.value
+    TARGET_LABEL = NodeType.ENDPOINT_DATA.value
     
     # 数据发布信息
     publication_date: Optional[date] = Field(None, description="数据发布日期")
@@ -135,7 +227,9 @@ class CombinedWithRelation(BaseEdge):
     - 协同效应评分
     - 联合用药的实验结果链接
     """
-    edge_type: EdgeType = EdgeType.COMBINED_WITH
+    edge_type: EdgeTypeName = EdgeType.COMBINED_WITH.value
+    SOURCE_LABEL = NodeType.DRUG.value
+    TARGET_LABEL = NodeType.DRUG.value
     
     # 协同效应
     synergy_score: Optional[float] = Field(
@@ -149,8 +243,8 @@ class CombinedWithRelation(BaseEdge):
     )
     
     # 联合用药实验
-    combo_trial_nct_ids: list[str] = Field(
-        default_factory=list, description="联合用药实验NCT编号列表"
+    combo_trial_nct_ids: tuple[str, ...] = Field(
+        (), description="联合用药实验NCT编号列表"
     )
     combo_trial_results_url: Optional[str] = Field(
         None, description="实验结果链接"
@@ -182,7 +276,9 @@ class HasSocRelation(BaseEdge):
     属性:
     - 纳入基准时间 (用于判断其他药物是否在挑战过时的标准)
     """
-    edge_type: EdgeType = EdgeType.HAS_SOC
+    edge_type: EdgeTypeName = EdgeType.HAS_SOC.value
+    SOURCE_LABEL = NodeType.INDICATION.value
+    TARGET_LABEL = NodeType.DRUG.value
     
     # 纳入时间
     soc_established_date: Optional[date] = Field(
@@ -206,8 +302,8 @@ class HasSocRelation(BaseEdge):
         None, description="作为SoC的年数"
     )
     is_being_challenged: bool = Field(False, description="是否正在被挑战")
-    challenging_drugs: list[str] = Field(
-        default_factory=list, description="正在挑战的药物列表"
+    challenging_drugs: tuple[str, ...] = Field(
+        (), description="正在挑战的药物列表"
     )
     
     # 市场地位
@@ -223,7 +319,9 @@ class HasSocRelation(BaseEdge):
 
 class DevelopedByRelation(BaseEdge):
     """[药物] --(DEVELOPED_BY)--> [公司]"""
-    edge_type: EdgeType = EdgeType.DEVELOPED_BY
+    edge_type: EdgeTypeName = EdgeType.DEVELOPED_BY.value
+    SOURCE_LABEL = NodeType.DRUG.value
+    TARGET_LABEL = NodeType.COMPANY.value
     
     role: Optional[str] = Field(None, description="角色(原研/授权/合作)")
     license_date: Optional[date] = Field(None, description="授权日期")
@@ -232,35 +330,43 @@ class DevelopedByRelation(BaseEdge):
 
 class ConductsRelation(BaseEdge):
     """[公司] --(CONDUCTS)--> [临床实验]"""
-    edge_type: EdgeType = EdgeType.CONDUCTS
+    edge_type: EdgeTypeName = EdgeType.CONDUCTS.value
+    SOURCE_LABEL = NodeType.COMPANY.value
+    TARGET_LABEL = NodeType.TRIAL.value
     
     role: Optional[str] = Field(None, description="角色(申办方/合作方)")
 
 
 class HasAssetRelation(BaseEdge):
     """[实体] --(HAS_ASSET)--> [媒体资源]"""
-    edge_type: EdgeType = EdgeType.HAS_ASSET
+    edge_type: EdgeTypeName = EdgeType.HAS_ASSET.value
+    TARGET_LABEL = NodeType.MEDIA_ASSET.value
     
     asset_category: Optional[str] = Field(None, description="资源类别")
 
 
 class HasFactorRelation(BaseEdge):
     """[实体] --(HAS_FACTOR)--> [外部因素]"""
-    edge_type: EdgeType = EdgeType.HAS_FACTOR
+    edge_type: EdgeTypeName = EdgeType.HAS_FACTOR.value
+    TARGET_LABEL = NodeType.EXTERNAL_FACTOR.value
     
     factor_category: Optional[str] = Field(None, description="因素类别")
 
 
 class PartOfComboRelation(BaseEdge):
     """[药物] --(PART_OF_COMBO)--> [联合方案节点]"""
-    edge_type: EdgeType = EdgeType.PART_OF_COMBO
+    edge_type: EdgeTypeName = EdgeType.PART_OF_COMBO.value
+    SOURCE_LABEL = NodeType.DRUG.value
+    TARGET_LABEL = NodeType.COMBO_NODE.value
     
     role_in_combo: Optional[str] = Field(None, description="在联合方案中的角色")
 
 
 class HasLandmarkRelation(BaseEdge):
     """[终点数据] --(HAS_LANDMARK)--> [里程碑数据点]"""
-    edge_type: EdgeType = EdgeType.HAS_LANDMARK
+    edge_type: EdgeTypeName = EdgeType.HAS_LANDMARK.value
+    SOURCE_LABEL = NodeType.ENDPOINT_DATA.value
+    TARGET_LABEL = NodeType.LANDMARK_NODE.value
     
     endpoint_type: Optional[str] = Field(None, description="终点类型")
 
@@ -13,20 +13,85 @@
 9. LandmarkNode (里程碑数据点) - 长期生存率数据
 """
 
-from datetime import date, datetime
-from enum import Enum
-from typing import Optional
-from uuid import uuid4
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from enum import StrEnum
+from functools import cache
+from typing import Annotated, ClassVar, Iterable, Literal, Optional, Self
 
-from pydantic import BaseModel, Field
+from pydantic import AfterValidator, BaseModel, Field, TypeAdapter
+
+
+# 批量预取的随机数池: 一次 os.urandom 供 ID_POOL_SIZE 个 ID 使用
+ID_POOL_SIZE = 4096
+_random_pool: list[int] = []
+# fork 出的子进程会继承父进程尚未用完的池，清空以免父子生成相同的 ID
+os.register_at_fork(after_in_child=_random_pool.clear)
+
+_RAND_A_MASK = (1 << 12) - 1
+_RAND_B_MASK = (1 << 62) - 1
+
+
+def _refill_random_pool() -> None:
+    """一次性读取一批随机字节并切分为 80 位随机整数"""
+    buf = os.urandom(10 * ID_POOL_SIZE)
+    _random_pool.extend(
+        int.from_bytes(buf[i:i + 10], "big") for i in range(0, len(buf), 10)
+    )
 
 
 def generate_id() -> str:
-    """生成唯一ID"""
-    return str(uuid4())
+    """生成唯一ID (UUIDv7)
+    
+    高 48 位为毫秒时间戳，ID 随时间递增，Neo4j id 索引以追加为主而非随机插入。
+    """
+    # 每个随机数只会被一次 pop 取走；多个线程同时发现池空时各自补充，
+    # 只会多读一批随机字节，而补充后到 pop 之间池可能再次被取空，因此循环重试
+    while True:
+        try:
+            rand = _random_pool.pop()
+            break
+        except IndexError:
+            _refill_random_pool()
+    
+    value = (
+        (time.time_ns() // 1_000_000) << 80
+        | 0x7 << 76  # 版本 7
+        | ((rand >> 62) & _RAND_A_MASK) << 64
+        | 0b10 << 62  # RFC 4122 变体
+        | (rand & _RAND_B_MASK)
+    )
+    h = f"{value:032x}"
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+@cache
+def list_adapter(model: type[BaseModel]) -> TypeAdapter:
+    """模型列表的 TypeAdapter (每个模型类构建一次)"""
+    return TypeAdapter(list[model])
+
 
+# 时间戳复用窗口: 该时间内创建的节点/边共享同一 created_at
+_BATCH_NOW_WINDOW_NS = 1_000_000  # 1ms
+_now_cache: tuple[int, datetime] | None = None
 
-class NodeType(str, Enum):
+
+def batch_now() -> datetime:
+    """当前 UTC 时间，1ms 内的连续调用复用同一对象 (批量创建时避免逐个取时间)"""
+    global _now_cache
+    mono = time.monotonic_ns()
+    cached = _now_cache
+    if cached is not None and mono - cached[0] < _BATCH_NOW_WINDOW_NS:
+        return cached[1]
+    now = datetime.now(timezone.utc)
+    _now_cache = (mono, now)
+    return now
+
+
+class NodeType(StrEnum):
     """节点类型枚举"""
     COMPANY = "Company"
     DRUG = "Drug"
@@ -39,7 +104,7 @@ class NodeType(str, Enum):
     LANDMARK_NODE = "LandmarkNode"
 
 
-class MoleculeType(str, Enum):
+class MoleculeType(StrEnum):
     """分子类型枚举"""
     ADC = "ADC"  # 抗体药物偶联物
     MONOCLONAL = "单抗"  # 单克隆抗体
@@ -52,7 +117,7 @@ class MoleculeType(str, Enum):
     OTHER = "其他"
 
 
-class TrialDesign(str, Enum):
+class TrialDesign(StrEnum):
     """实验设计枚举"""
     DOUBLE_BLIND = "双盲"
     SINGLE_ARM = "单臂"
@@ -63,7 +128,7 @@ class TrialDesign(str, Enum):
     ADAPTIVE = "适应性设计"
 
 
-class TrialPhase(str, Enum):
+class TrialPhase(StrEnum):
     """临床阶段枚举"""
     PRECLINICAL = "临床前"
     PHASE_1 = "Phase I"
@@ -75,7 +140,7 @@ class TrialPhase(str, Enum):
     APPROVED = "已获批"
 
 
-class TreatmentLine(str, Enum):
+class TreatmentLine(StrEnum):
     """治疗线数枚举"""
     FIRST_LINE = "1L"
     SECOND_LINE = "2L"
@@ -85,7 +150,7 @@ class TreatmentLine(str, Enum):
     MAINTENANCE = "维持治疗"
 
 
-class TrialStatus(str, Enum):
+class TrialStatus(StrEnum):
     """临床实验状态"""
     NOT_YET_RECRUITING = "尚未招募"
     RECRUITING = "招募中"
@@ -96,23 +161,119 @@ class TrialStatus(str, Enum):
     WITHDRAWN = "撤回"
 
 
+# ==================== 字段取值类型 ====================
+# 模型字段按 Literal 校验 (pydantic-core 直接比较字符串，不构造枚举成员)，
+# 字段值为普通 str；上面的枚举类保留为调用方使用的常量。
+
+def _values(enum_cls: type[StrEnum]) -> tuple[str, ...]:
+    return tuple(member.value for member in enum_cls)
+
+
+NodeTypeName = Literal[_values(NodeType)]
+MoleculeTypeName = Literal[_values(MoleculeType)]
+TrialDesignName = Literal[_values(TrialDesign)]
+TrialPhaseName = Literal[_values(TrialPhase)]
+TreatmentLineName = Literal[_values(TreatmentLine)]
+TrialStatusName = Literal[_values(TrialStatus)]
+
+# 取值高度重复的自由文本字段 (靶点、机制、治疗领域等)，校验后驻留，
+# 相同取值在所有节点间共享同一个 str 对象
+InternedStr = Annotated[str, AfterValidator(sys.intern)]
+
+
 class BaseNode(BaseModel):
     """节点基类"""
+    # Neo4j 标签 (由 node_type 默认值派生) 与查询/MERGE 键:
+    # 唯一键建唯一约束 (自带索引)，索引键建普通范围索引，
+    # 复合索引服务于 "按前导属性过滤 + 后续属性排序/范围" 的查询 (如 find_nodes)，
+    # MERGE 键为批量写入时识别同一实体的自然键 (须为本模型字段，且已建唯一约束或索引)
+    NEO4J_LABEL: ClassVar[str] = ""
+    NEO4J_UNIQUE_KEYS: ClassVar[tuple[str, ...]] = ("id",)
+    NEO4J_MERGE_KEY: ClassVar[str] = "id"
+    NEO4J_INDEX_KEYS: ClassVar[tuple[str, ...]] = ()
+    NEO4J_COMPOSITE_INDEXES: ClassVar[tuple[tuple[str, ...], ...]] = ()
+    
     id: str = Field(default_factory=generate_id)
-    node_type: NodeType
-    created_at: datetime = Field(default_factory=datetime.now)
-    updated_at: datetime = Field(default_factory=datetime.now)
+    node_type: NodeTypeName
+    created_at: datetime = Field(default_factory=batch_now)
+    updated_at: datetime = Field(default_factory=batch_now)
+    
+    @classmethod
+    def validate_json_batch(cls, data: str | bytes) -> list[Self]:
+        """从 JSON 数组批量解析并校验节点 (解析与校验在 pydantic-core 中一次完成)"""
+        return list_adapter(cls).validate_json(data)
+    
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs) -> None:
+        super().__pydantic_init_subclass__(**kwargs)
+        default = cls.model_fields["node_type"].default
+        if isinstance(default, str):
+            cls.NEO4J_LABEL = default
+        if cls.NEO4J_MERGE_KEY not in cls.model_fields:
+            raise TypeError(f"{cls.__name__}.NEO4J_MERGE_KEY is not a field: {cls.NEO4J_MERGE_KEY}")
+    
+    @classmethod
+    def cypher_index_statements(cls) -> list[str]:
+        """本节点类型的约束与索引语句 (幂等，写入前执行一次)"""
+        label = cls.NEO4J_LABEL
+        return [
+            f"CREATE CONSTRAINT IF NOT EXISTS FOR (n:{label}) REQUIRE n.{key} IS UNIQUE"
+            for key in cls.NEO4J_UNIQUE_KEYS
+        ] + [
+            f"CREATE INDEX IF NOT EXISTS FOR (n:{label}) ON (n.{key})"
+            for key in cls.NEO4J_INDEX_KEYS
+        ] + [
+            f"CREATE INDEX IF NOT EXISTS FOR (n:{label}) "
+            f"ON ({', '.join(f'n.{key}' for key in keys)})"
+            for keys in cls.NEO4J_COMPOSITE_INDEXES
+        ]
     
     def to_neo4j_properties(self) -> dict:
-        """转换为 Neo4j 属性字典"""
-        data = self.model_dump(exclude={"node_type"})
-        # 转换日期时间
-        for key, value in data.items():
-            if isinstance(value, (datetime, date)):
-                data[key] = value.isoformat()
-            elif isinstance(value, Enum):
-                data[key] = value.value
-        return data
+        """转换为 Neo4j 属性字典
+        
+        JSON 模式由 pydantic-core 直接输出 ISO 日期字符串，类型字段本身即为字符串。
+        """
+        return self.model_dump(mode="json", exclude={"node_type"})
+    
+    @classmethod
+    def unwind_cypher(cls) -> str:
+        """批量写入语句: 一次 UNWIND $rows 按 NEO4J_MERGE_KEY MERGE 整批节点
+        
+        按自然键命中已有实体时保留其 id 与 created_at，返回的是已有节点的 id。
+        """
+        key = cls.NEO4J_MERGE_KEY
+        on_match = "row" if key == "id" else "row {.*, id: n.id, created_at: n.created_at}"
+        return (
+            f"UNWIND $rows AS row "
+            f"MERGE (n:{cls.NEO4J_LABEL} {{{key}: row.{key}}}) "
+            f"ON CREATE SET n = row "
+            f"ON MATCH SET n += {on_match} "
+            f"RETURN n.id AS id"
+        )
+    
+    @classmethod
+    def serialize_batch(cls, instances: list["BaseNode"]) -> list[dict]:
+        """序列化为 unwind_cypher 的 $rows 参数
+        
+        按自然键合并时丢弃空值: SET += null 会删除已有实体上的该属性。
+        """
+        if cls.NEO4J_MERGE_KEY == "id":
+            return [instance.to_neo4j_properties() for instance in instances]
+        return [
+            {k: v for k, v in instance.to_neo4j_properties().items() if v is not None}
+            for instance in instances
+        ]
+    
+    @staticmethod
+    def batch_by_type(nodes: Iterable["BaseNode"]) -> dict[type["BaseNode"], list[dict]]:
+        """将混合类型的节点流按节点类型分组并序列化 (每组对应一条 unwind_cypher)"""
+        groups: dict[type[BaseNode], list[BaseNode]] = defaultdict(list)
+        for node in nodes:
+            groups[type(node)].append(node)
+        return {
+            node_cls: node_cls.serialize_batch(group)
+            for node_cls, group in groups.items()
+        }
 
 
 class Company(BaseNode):
@@ -124,7 +285,9 @@ class Company(BaseNode):
     - 研发费用占比
     - 核心科学家背景评分
     """
-    node_type: NodeType = NodeType.COMPANY
+    node_type: NodeTypeName = NodeType.COMPANY.value
+    NEO4J_INDEX_KEYS = ("name", "stock_code")
+    NEO4J_MERGE_KEY = "name"
     
     name: str = Field(..., description="公司名称")
     name_en: Optional[str] = Field(None, description="英文名称")
@@ -164,7 +327,10 @@ class Drug(BaseNode):
     - 专利失效日 (LOE)
     - 给药方式
     """
-    node_type: NodeType = NodeType.DRUG
+    node_type: NodeTypeName = NodeType.DRUG.value
+    NEO4J_INDEX_KEYS = ("name", "target")
+    NEO4J_MERGE_KEY = "name"
+    NEO4J_COMPOSITE_INDEXES = (("target", "created_at"),)
     
     name: str = Field(..., description="药物名称")
     name_en: Optional[str] = Field(None, description="英文名称")
@@ -172,13 +338,13 @@ class Drug(BaseNode):
     brand_name: Optional[str] = Field(None, description="商品名")
     
     # 核心属性
-    molecule_type: MoleculeType = Field(..., description="分子类型")
-    target: str = Field(..., description="靶点")
-    moa: str = Field(..., description="作用机制(Mechanism of Action)")
+    molecule_type: MoleculeTypeName = Field(..., description="分子类型")
+    target: InternedStr = Field(..., description="靶点")
+    moa: InternedStr = Field(..., description="作用机制(Mechanism of Action)")
     
     # 专利信息
     loe_date: Optional[date] = Field(None, description="专利失效日(Loss of Exclusivity)")
-    patent_numbers: list[str] = Field(default_factory=list, description="专利号列表")
+    patent_numbers: tuple[str, ...] = Field((), description="专利号列表")
     
     # 给药信息
     administration_route: Optional[str] = Field(None, description="给药途径")
@@ -186,9 +352,9 @@ class Drug(BaseNode):
     recommended_dose: Optional[str] = Field(None, description="推荐剂量")
     
     # 审批状态
-    approval_status: Optional[str] = Field(None, description="审批状态")
+    approval_status: Optional[InternedStr] = Field(None, description="审批状态")
     first_approval_date: Optional[date] = Field(None, description="首次获批日期")
-    approved_regions: list[str] = Field(default_factory=list, description="获批地区")
+    approved_regions: tuple[str, ...] = Field((), description="获批地区")
     
     # 关联公司
     company_id: Optional[str] = Field(None, description="所属公司ID")
@@ -204,7 +370,14 @@ class Indication(BaseNode):
     - 当前 SoC (标准疗法)
     - 未满足需求程度 (1-10评分)
     """
-    node_type: NodeType = NodeType.INDICATION
+    node_type: NodeTypeName = NodeType.INDICATION.value
+    NEO4J_INDEX_KEYS = ("name", "icd_code")
+    NEO4J_MERGE_KEY = "name"
+    NEO4J_COMPOSITE_INDEXES = (
+        ("therapeutic_area", "unmet_need_score"),
+        # 空白点挖掘: prevalence 范围过滤 + 需求/SoC 评分
+        ("prevalence", "unmet_need_score", "soc_efficacy_score"),
+    )
     
     name: str = Field(..., description="适应症名称")
     name_en: Optional[str] = Field(None, description="英文名称")
@@ -232,7 +405,7 @@ class Indication(BaseNode):
     growth_rate: Optional[float] = Field(None, description="年增长率")
     
     # 分类信息
-    therapeutic_area: Optional[str] = Field(None, description="治疗领域")
+    therapeutic_area: Optional[InternedStr] = Field(None, description="治疗领域")
     disease_type: Optional[str] = Field(None, description="疾病类型")
     is_rare_disease: bool = Field(False, description="是否罕见病")
 
@@ -247,29 +420,34 @@ class Trial(BaseNode):
     - 治疗线数 (1L/2L/3L+)
     - 状态
     """
-    node_type: NodeType = NodeType.TRIAL
+    node_type: NodeTypeName = NodeType.TRIAL.value
+    NEO4J_UNIQUE_KEYS = ("id", "nct_id")
+    NEO4J_MERGE_KEY = "nct_id"
+    # drug_id 是实验与研究药物的关联 (查询模板按 {drug_id: drug.id} 匹配)
+    NEO4J_INDEX_KEYS = ("status", "drug_id")
+    NEO4J_COMPOSITE_INDEXES = (("status", "created_at"),)
     
     nct_id: str = Field(..., description="NCT编号")
     title: str = Field(..., description="实验标题")
     
     # 设计信息
-    design: TrialDesign = Field(..., description="实验设计")
-    phase: TrialPhase = Field(..., description="临床阶段")
-    treatment_line: Optional[TreatmentLine] = Field(None, description="治疗线数")
+    design: TrialDesignName = Field(..., description="实验设计")
+    phase: TrialPhaseName = Field(..., description="临床阶段")
+    treatment_line: Optional[TreatmentLineName] = Field(None, description="治疗线数")
     
     # 入组信息
     enrollment_target: Optional[int] = Field(None, description="计划入组人数")
     enrollment_actual: Optional[int] = Field(None, description="实际入组人数")
     
     # 状态信息
-    status: TrialStatus = Field(..., description="实验状态")
+    status: TrialStatusName = Field(..., description="实验状态")
     start_date: Optional[date] = Field(None, description="开始日期")
     completion_date: Optional[date] = Field(None, description="预计完成日期")
     actual_completion_date: Optional[date] = Field(None, description="实际完成日期")
     
     # 主要终点
     primary_endpoint: Optional[str] = Field(None, description="主要终点")
-    secondary_endpoints: list[str] = Field(default_factory=list, description="次要终点")
+    secondary_endpoints: tuple[str, ...] = Field((), description="次要终点")
     
     # 对照组
     comparator: Optional[str] = Field(None, description="对照组")
@@ -292,7 +470,7 @@ class EndpointData(BaseNode):
     - p值
     - G3+不良反应率
     """
-    node_type: NodeType = NodeType.ENDPOINT_DATA
+    node_type: NodeTypeName = NodeType.ENDPOINT_DATA.value
     
     trial_id: str = Field(..., description="关联临床实验ID")
     data_cutoff_date: Optional[date] = Field(None, description="数据截止日期")
@@ -353,7 +531,7 @@ class MediaAsset(BaseNode):
     - 原始财报PDF地址
     - FDA审议函文本链接
     """
-    node_type: NodeType = NodeType.MEDIA_ASSET
+    node_type: NodeTypeName = NodeType.MEDIA_ASSET.value
     
     asset_type: str = Field(..., description="资源类型")
     title: str = Field(..., description="资源标题")
@@ -389,13 +567,13 @@ class ExternalFactor(BaseNode):
     - 集采压力评分
     - KOL正面/负面评价指数
     """
-    node_type: NodeType = NodeType.EXTERNAL_FACTOR
+    node_type: NodeTypeName = NodeType.EXTERNAL_FACTOR.value
     
     factor_type: str = Field(..., description="因素类型")
     related_entity_id: str = Field(..., description="关联实体ID")
     
     # 医保相关
-    nrdl_status: Optional[str] = Field(None, description="国家医保目录状态")
+    nrdl_status: Optional[InternedStr] = Field(None, description="国家医保目录状态")
     nrdl_entry_date: Optional[date] = Field(None, description="医保纳入日期")
     reimbursement_rate: Optional[float] = Field(None, ge=0, le=1, description="报销比例")
     
@@ -438,7 +616,7 @@ class ComboNode(BaseNode):
     当药物A和B联合时，产生一个虚拟节点。
     用于对比"A+B"与"A单药"或"SoC"的曲线差异。
     """
-    node_type: NodeType = NodeType.COMBO_NODE
+    node_type: NodeTypeName = NodeType.COMBO_NODE.value
     
     name: str = Field(..., description="联合方案名称")
     drug_ids: list[str] = Field(..., min_length=2, description="组成药物ID列表")
@@ -454,7 +632,7 @@ class ComboNode(BaseNode):
     vs_soc_benefit: Optional[str] = Field(None, description="相比SoC优势")
     
     # 关联实验
-    combo_trial_ids: list[str] = Field(default_factory=list, description="联合用药实验ID")
+    combo_trial_ids: tuple[str, ...] = Field((), description="联合用药实验ID")
 
 
 class LandmarkNode(BaseNode):
@@ -463,7 +641,7 @@ class LandmarkNode(BaseNode):
     在终点数据中，强制挂载 12个月、24个月、36个月生存率。
     这是捕捉免疫治疗"拖尾效应"的物理证据。
     """
-    node_type: NodeType = NodeType.LANDMARK_NODE
+    node_type: NodeTypeName = NodeType.LANDMARK_NODE.value
     
     endpoint_data_id: str = Field(..., description="关联终点数据ID")
     endpoint_type: str = Field(..., description="终点类型(PFS/OS)")
@@ -0,0 +1,201 @@
+# 知识图谱列式数据表
+"""
+终点数据的列式 (SoA) 表示:
+
+EndpointData 的 Pydantic 模型用于入库与序列化；批量分析 (HR/CI、p 值筛选、
+拖尾效应评分等) 时转换为 EndpointDataTable，在连续的 NumPy 列上向量化计算，
+避免逐个访问 Pydantic 对象。
+"""
+
+import math
+from typing import Any, Iterable, Iterator, get_args
+
+import numpy as np
+
+from .nodes import EndpointData
+
+
+def _fields_of(*types: type) -> tuple[str, ...]:
+    """EndpointData 中注解 (去掉 Optional 后) 包含给定类型的字段"""
+    fields = []
+    for name, field in EndpointData.model_fields.items():
+        candidates = get_args(field.annotation) or (field.annotation,)
+        if any(tp in types for tp in candidates):
+            fields.append(name)
+    return tuple(fields)
+
+
+# 列式存储的数值字段 (float64 列)，缺失值记为 NaN
+ENDPOINT_NUMERIC_FIELDS = _fields_of(float, int)
+
+# 其中的整数字段，还原为行时转回 int
+ENDPOINT_INT_FIELDS = _fields_of(int)
+
+# 其余字段 (日期、数据成熟度等) 以 object 列原样携带，不参与向量化计算
+ENDPOINT_OBJECT_FIELDS = tuple(
+    name for name in EndpointData.model_fields
+    if name not in ENDPOINT_NUMERIC_FIELDS and name not in ("id", "trial_id")
+)
+
+# LandmarkNode 的里程碑月份，与 month_*_rate 列顺序一致
+LANDMARK_MONTHS = np.array([12, 24, 36, 48, 60], dtype=np.float64)
+
+
+# ==================== 批量分析核函数 ====================
+
+def compute_tail_effect(month_rates: np.ndarray) -> np.ndarray:
+    """批量计算拖尾效应强度 (0-1)
+    
+    比较 24 个月后与 12-24 个月间的月均生存率下降速度: 后期下降越平缓，
+    拖尾 (平台期) 越明显。后期以 24 个月之后最晚的有效里程碑计算。
+    
+    Args:
+        month_rates: (n, 5) 12/24/36/48/60 个月生存率，缺失为 NaN
+        
+    Returns:
+        np.ndarray: (n,) 拖尾效应强度，数据不足时为 NaN
+    """
+    rates = np.asarray(month_rates, dtype=np.float64)
+    r12, r24 = rates[:, 0], rates[:, 1]
+    late = rates[:, 2:]
+    
+    # 每行 24 个月之后最晚的有效里程碑
+    valid = ~np.isnan(late)
+    has_late = valid.any(axis=1)
+    last_idx = late.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+    r_last = late[np.arange(len(rates)), last_idx]
+    months_last = LANDMARK_MONTHS[2:][last_idx]
+    
+    early_decline = (r12 - r24) / 12
+    late_decline = (r24 - r_last) / (months_last - 24)
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        strength = np.clip(1 - late_decline / early_decline, 0, 1)
+    
+    usable = has_late & (early_decline > 0)
+    return np.where(usable, strength, np.nan)
+
+
+def compute_censoring_density(at_risk: np.ndarray, events: np.ndarray) -> np.ndarray:
+    """批量计算删失点密集度评分 (0-1)
+    
+    删失人数 = 区间起点风险人数 - 区间终点风险人数 - 区间内事件数，
+    评分为离开风险集的患者中因删失 (而非事件) 离开的比例。
+    
+    Args:
+        at_risk: (n, k) 各时间点风险人数
+        events: (n, k - 1) 各区间事件数
+        
+    Returns:
+        np.ndarray: (n,) 删失密集度，无人离开风险集时为 NaN
+    """
+    at_risk = np.asarray(at_risk, dtype=np.float64)
+    events = np.asarray(events, dtype=np.float64)
+    
+    left = at_risk[:, :-1] - at_risk[:, 1:]
+    censored = np.clip(left - events, 0, None).sum(axis=1)
+    total_left = left.sum(axis=1)
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        density = censored / total_left
+    return np.where(total_left > 0, np.clip(density, 0, 1), np.nan)
+
+
+class EndpointDataTable:
+    """终点数据列式表
+    
+    每个数值字段一列 float64 数组 (与 Python float 精度一致，还原无损)，
+    其余字段存于 attrs 的 object 数组；行顺序与 ids 一致。
+    """
+    
+    __slots__ = ("ids", "trial_ids", "columns", "attrs")
+    
+    def __init__(
+        self,
+        ids: np.ndarray,
+        trial_ids: np.ndarray,
+        columns: dict[str, np.ndarray],
+        attrs: dict[str, np.ndarray] | None = None,
+    ):
+        self.ids = ids
+        self.trial_ids = trial_ids
+        self.columns = columns
+        self.attrs = attrs or {}
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.columns[field]
+    
+    @classmethod
+    def from_instances(cls, endpoints: Iterable[EndpointData]) -> "EndpointDataTable":
+        """由 EndpointData 实例构建列式表"""
+        endpoints = list(endpoints)
+        n = len(endpoints)
+        nan = math.nan
+        
+        columns = {}
+        for field in ENDPOINT_NUMERIC_FIELDS:
+            values = (getattr(ep, field) for ep in endpoints)
+            columns[field] = np.fromiter(
+                (nan if v is None else v for v in values), dtype=np.float64, count=n
+            )
+        
+        attrs = {}
+        for field in ENDPOINT_OBJECT_FIELDS:
+            column = np.empty(n, dtype=object)
+            column[:] = [getattr(ep, field) for ep in endpoints]
+            attrs[field] = column
+        
+        return cls(
+            ids=np.array([ep.id for ep in endpoints], dtype=object),
+            trial_ids=np.array([ep.trial_id for ep in endpoints], dtype=object),
+            columns=columns,
+            attrs=attrs,
+        )
+    
+    def iter_rows(self) -> Iterator[dict[str, Any]]:
+        """逐行还原为属性字典 (NaN 还原为 None，整数字段还原为 int)"""
+        names = list(self.columns) + list(self.attrs)
+        lists = [self.columns[name].tolist() for name in self.columns]
+        lists += [self.attrs[name].tolist() for name in self.attrs]
+        int_fields = frozenset(ENDPOINT_INT_FIELDS)
+        for i, (ep_id, trial_id) in enumerate(zip(self.ids, self.trial_ids)):
+            row = {"id": ep_id, "trial_id": trial_id}
+            for name, values in zip(names, lists):
+                value = values[i]
+                if isinstance(value, float):
+                    if value != value:
+                        value = None
+                    elif name in int_fields:
+                        value = int(value)
+                row[name] = value
+            yield row
+    
+    # ==================== 向量化分析 ====================
+    
+    def hr_ci_ratio(self, endpoint: str = "pfs") -> np.ndarray:
+        """HR 95%CI 上下限之比 (越大说明估计越不精确)，缺失为 NaN"""
+        lower = self.columns[f"hr_{endpoint}_ci_lower"]
+        upper = self.columns[f"hr_{endpoint}_ci_upper"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(lower > 0, upper / lower, np.nan)
+    
+    def significant_mask(self, p_value_threshold: float = 0.05) -> np.ndarray:
+        """PFS 或 OS 的 HR p 值低于阈值的行"""
+        return (
+            (self.columns["hr_pfs_p_value"] < p_value_threshold)
+            | (self.columns["hr_os_p_value"] < p_value_threshold)
+        )
+    
+    def suspicious_mask(
+        self,
+        censoring_threshold: float = 0.5,
+        p_value_threshold: float = 0.01,
+    ) -> np.ndarray:
+        """删失点密集且结果高度显著的行 (数据诚信检查的候选)"""
+        return (
+            (self.columns["censoring_density_score"] > censoring_threshold)
+            & self.significant_mask(p_value_threshold)
+        )
@@ -7,10 +7,22 @@ Neo4j 图数据库客户端，提供:
 - 查询模板执行
 """
 
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
 from contextlib import asynccontextmanager
+from functools import lru_cache
 from typing import Any, TypeVar
 
-from neo4j import AsyncGraphDatabase, AsyncDriver, AsyncSession
+from neo4j import (
+    READ_ACCESS,
+    WRITE_ACCESS,
+    AsyncDriver,
+    AsyncGraphDatabase,
+    AsyncManagedTransaction,
+    AsyncSession,
+    Query,
+)
+from neo4j.exceptions import ClientError
 from pydantic import BaseModel
 
 from src.config import get_settings
@@ -18,9 +30,130 @@ from src.utils import get_logger
 
 from .models.nodes import BaseNode, NodeType
 from .models.edges import BaseEdge, EdgeType
+from . import queries
 
 logger = get_logger(__name__)
 
+# 单次 UNWIND 写入的行数上限
+WRITE_BATCH_SIZE = 1000
+
+# 批量删除时每个内部事务处理的行数 (CALL { ... } IN TRANSACTIONS)
+DELETE_BATCH_SIZE = 10000
+
+# ==================== 查询模板 ====================
+# 标签/关系类型只取自模型声明的类型，语句文本按类型固定 (命中服务端执行计划缓存)；
+# 取值一律作为参数绑定，不拼接进语句
+
+_NODE_LABELS = frozenset(NodeType)
+_EDGE_TYPES = frozenset(EdgeType)
+
+_CREATE_NODE_QUERIES = {
+    label: f"CREATE (n:{label} $props) RETURN n.id AS id" for label in NodeType
+}
+_GET_NODE_QUERIES = {
+    label: f"MATCH (n:{label} {{id: $id}}) RETURN n" for label in NodeType
+}
+_UPDATE_NODE_QUERIES = {
+    label: f"MATCH (n:{label} {{id: $id}}) SET n += $props" for label in NodeType
+}
+
+# 未指定类型时按全部标签/关系类型展开为 UNION，每个分支都能使用 :Label(id) 索引
+_ANY_NODE_BY_ID = "CALL { " + " UNION ".join(
+    f"MATCH (n:{label} {{id: $id}}) RETURN n" for label in NodeType
+) + " }"
+_ANY_EDGE_BY_ID = "CALL { " + " UNION ".join(
+    f"MATCH ()-[r:{edge_type} {{id: $id}}]->() RETURN r" for edge_type in EdgeType
+) + " }"
+
+# 图谱统计: 每个分支只按单一标签/关系类型计数，由计数存储直接返回，不扫描全图
+_NODE_COUNTS_QUERY = (
+    "CALL { "
+    + " UNION ALL ".join(
+        f"MATCH (n:{label}) RETURN '{label}' AS label, count(n) AS node_count"
+        for label in NodeType
+    )
+    + " } WITH label, node_count WHERE node_count > 0 "
+    "RETURN label, node_count ORDER BY node_count DESC"
+)
+_EDGE_COUNTS_QUERY = (
+    "CALL { "
+    + " UNION ALL ".join(
+        f"MATCH ()-[r:{edge_type}]->() RETURN '{edge_type}' AS edge_type, count(r) AS edge_count"
+        for edge_type in EdgeType
+    )
+    + " } WITH edge_type, edge_count WHERE edge_count > 0 "
+    "RETURN edge_type, edge_count ORDER BY edge_count DESC"
+)
+
+_DELETE_NODE_QUERIES = {
+    label: f"MATCH (n:{label} {{id: $id}}) DETACH DELETE n" for label in NodeType
+}
+
+# 批量删除: 按标签/关系类型走 id 索引，分批提交以限制单个事务的内存占用
+_DELETE_NODES_QUERIES = {
+    label: (
+        f"UNWIND $ids AS id "
+        f"CALL {{ WITH id MATCH (n:{label} {{id: id}}) DETACH DELETE n }} "
+        f"IN TRANSACTIONS OF $batch_size ROWS"
+    )
+    for label in NodeType
+}
+_DELETE_EDGES_QUERIES = {
+    edge_type: (
+        f"UNWIND $ids AS id "
+        f"CALL {{ WITH id MATCH ()-[r:{edge_type} {{id: id}}]->() DELETE r }} "
+        f"IN TRANSACTIONS OF $batch_size ROWS"
+    )
+    for edge_type in EdgeType
+}
+
+
+def _check_label(label: str) -> str:
+    if label not in _NODE_LABELS:
+        raise ValueError(f"Unknown node type: {label}")
+    return label
+
+
+def _check_edge_type(edge_type: str) -> str:
+    if edge_type not in _EDGE_TYPES:
+        raise ValueError(f"Unknown edge type: {edge_type}")
+    return edge_type
+
+
+@lru_cache(maxsize=256)
+def _find_nodes_query(label: str, keys: tuple[str, ...]) -> str:
+    """find_nodes 语句 (keys 为排序后的过滤属性名，取值通过 $filters 绑定)"""
+    for key in keys:
+        if not key.isidentifier():
+            raise ValueError(f"Invalid filter key: {key}")
+    where_clause = ""
+    if keys:
+        where_clause = "WHERE " + " AND ".join(f"n.{k} = $filters.{k}" for k in keys) + " "
+    return (
+        f"MATCH (n:{_check_label(label)}) "
+        f"{where_clause}"
+        f"RETURN n ORDER BY n.created_at DESC SKIP $skip LIMIT $limit"
+    )
+
+
+@lru_cache(maxsize=64)
+def _find_edges_query(edge_type: str, by_source: bool, by_target: bool) -> str:
+    """find_edges 语句 (按是否限定源/目标节点区分)"""
+    conditions = []
+    if by_source:
+        conditions.append("a.id = $source_id")
+    if by_target:
+        conditions.append("b.id = $target_id")
+    where_clause = ""
+    if conditions:
+        where_clause = "WHERE " + " AND ".join(conditions) + " "
+    return (
+        f"MATCH (a)-[r:{_check_edge_type(edge_type)}]->(b) "
+        f"{where_clause}"
+        f"RETURN r {{.*, source_id: a.id, target_id: b.id}} AS edge LIMIT $limit"
+    )
+
+
 T = TypeVar("T", bound=BaseNode)
 E = TypeVar("E", bound=BaseEdge)
 
@@ -44,23 +177,54 @@ class Neo4jClient:
         username: str,
         password: str,
         database: str = "neo4j",
+        max_connection_pool_size: int = 100,
+        connection_acquisition_timeout: float = 60.0,
+        max_connection_lifetime: float = 900.0,
+        connection_timeout: float = 10.0,
+        keep_alive: bool = True,
     ):
         self.uri = uri
         self.username = username
         self.password = password
         self.database = database
+        # 驱动连接池参数
+        self.pool_config = {
+            "max_connection_pool_size": max_connection_pool_size,
+            "connection_acquisition_timeout": connection_acquisition_timeout,
+            "max_connection_lifetime": max_connection_lifetime,
+            "connection_timeout": connection_timeout,
+            "keep_alive": keep_alive,
+        }
         self._driver: AsyncDriver | None = None
+        self._connect_lock = asyncio.Lock()
+        # 所有会话共享书签: 集群中先写后读时，读会话等待副本追上已提交的写入
+        self._bookmark_manager = AsyncGraphDatabase.bookmark_manager()
     
     async def connect(self) -> None:
-        """建立数据库连接"""
-        if self._driver is None:
+        """建立数据库连接
+        
+        驱动内部维护连接池，进程内只创建一次；已连接时直接返回。
+        """
+        if self._driver is not None:
+            return
+        
+        async with self._connect_lock:
+            if self._driver is not None:
+                return
+            
             logger.info(f"Connecting to Neo4j at {self.uri}")
-            self._driver = AsyncGraphDatabase.driver(
+            driver = AsyncGraphDatabase.driver(
                 self.uri,
                 auth=(self.username, self.password),
+                **self.pool_config,
             )
             # 验证连接
-            await self._driver.verify_connectivity()
+            try:
+                await driver.verify_connectivity()
+            except Exception:
+                await driver.close()
+                raise
+            self._driver = driver
             logger.info("Neo4j connection established")
     
     async def close(self) -> None:
@@ -71,17 +235,60 @@ class Neo4jClient:
             logger.info("Neo4j connection closed")
     
     @asynccontextmanager
-    async def session(self):
-        """获取数据库会话"""
+    async def session(self, write: bool = True):
+        """获取数据库会话
+        
+        只读会话 (write=False) 在集群中路由到 follower / read replica，减轻 leader 负载。
+        """
         if self._driver is None:
             await self.connect()
         
-        session = self._driver.session(database=self.database)
+        session = self._driver.session(
+            database=self.database,
+            default_access_mode=WRITE_ACCESS if write else READ_ACCESS,
+            bookmark_manager=self._bookmark_manager,
+        )
         try:
             yield session
         finally:
             await session.close()
     
+    async def _tx(
+        self,
+        work: Callable[[AsyncManagedTransaction], Awaitable[Any]],
+        write: bool = True,
+    ) -> Any:
+        """在单个托管事务中执行 work (瞬时错误时由驱动整体重试，work 需可重复执行)"""
+        async with self.session(write=write) as session:
+            if write:
+                return await session.execute_write(work)
+            return await session.execute_read(work)
+    
+    async def run_many(
+        self,
+        queries: Iterable[tuple[str, dict[str, Any] | None]],
+        write: bool = True,
+    ) -> list[list[dict]]:
+        """在一个会话的同一事务中依次执行多条语句
+        
+        Args:
+            queries: (Cypher 语句, 参数) 序列
+            write: 是否为写事务
+            
+        Returns:
+            list[list[dict]]: 每条语句的结果行，与 queries 顺序一致
+        """
+        queries = list(queries)
+        
+        async def work(tx: AsyncManagedTransaction) -> list[list[dict]]:
+            results = []
+            for query, params in queries:
+                result = await tx.run(query, **(params or {}))
+                results.append(await result.data())
+            return results
+        
+        return await self._tx(work, write=write)
+    
     # ==================== 节点操作 ====================
     
     async def create_node(self, node: BaseNode) -> str:
@@ -95,22 +302,47 @@ class Neo4jClient:
         """
         async with self.session() as session:
             properties = node.to_neo4j_properties()
-            label = node.node_type.value
-            
-            query = f"""
-            CREATE (n:{label} $props)
-            RETURN n.id as id
-            """
+            label = node.node_type
+            query = _CREATE_NODE_QUERIES[_check_label(label)]
             
             result = await session.run(query, props=properties)
             record = await result.single()
             logger.debug(f"Created node: {label} with id {record['id']}")
             return record["id"]
     
+    async def create_nodes(
+        self,
+        nodes: list[BaseNode],
+        batch_size: int = WRITE_BATCH_SIZE,
+    ) -> list[str]:
+        """批量创建节点
+        
+        按节点类型分组，每 batch_size 个一次 UNWIND 写入 (按 id MERGE，可重复执行)，
+        所有批次共用一个会话。
+        
+        Args:
+            nodes: 节点对象列表
+            batch_size: 每批行数
+            
+        Returns:
+            list[str]: 写入的节点ID列表
+        """
+        created = []
+        async with self.session() as session:
+            for node_cls, rows in BaseNode.batch_by_type(nodes).items():
+                query = node_cls.unwind_cypher()
+                for start in range(0, len(rows), batch_size):
+                    result = await session.run(query, rows=rows[start:start + batch_size])
+                    records = await result.data()
+                    created.extend(r["id"] for r in records)
+        
+        logger.debug(f"Created {len(created)}/{len(nodes)} nodes")
+        return created
+    
     async def get_node(
         self,
         node_id: str,
-        node_type: NodeType | None = None
+        node_type: str | None = None
     ) -> dict | None:
         """获取节点
         
@@ -121,17 +353,11 @@ class Neo4jClient:
         Returns:
             dict | None: 节点属性字典
         """
-        async with self.session() as session:
+        async with self.session(write=False) as session:
             if node_type:
-                query = f"""
-                MATCH (n:{node_type.value} {{id: $id}})
-                RETURN n
-                """
+                query = _GET_NODE_QUERIES[_check_label(node_type)]
             else:
-                query = """
-                MATCH (n {id: $id})
-                RETURN n
-                """
+                query = f"{_ANY_NODE_BY_ID} RETURN n LIMIT 1"
             
             result = await session.run(query, id=node_id)
             record = await result.single()
@@ -151,45 +377,88 @@ class Neo4jClient:
         """
         async with self.session() as session:
             properties = node.to_neo4j_properties()
-            label = node.node_type.value
-            
-            query = f"""
-            MATCH (n:{label} {{id: $id}})
-            SET n += $props
-            RETURN n.id as id
-            """
+            query = _UPDATE_NODE_QUERIES[_check_label(node.node_type)]
             
             result = await session.run(
                 query,
                 id=node.id,
                 props=properties
             )
-            record = await result.single()
-            return record is not None
+            # 写语句不返回记录，由结果摘要的计数器判断是否命中
+            summary = await result.consume()
+            return summary.counters.properties_set > 0
     
-    async def delete_node(self, node_id: str) -> bool:
+    async def delete_node(self, node_id: str, node_type: str | None = None) -> bool:
         """删除节点及其关联关系
         
         Args:
             node_id: 节点ID
+            node_type: 节点类型(可选，用于优化查询)
             
         Returns:
             bool: 是否删除成功
         """
         async with self.session() as session:
-            query = """
-            MATCH (n {id: $id})
-            DETACH DELETE n
-            RETURN count(n) as deleted
-            """
+            if node_type:
+                query = _DELETE_NODE_QUERIES[_check_label(node_type)]
+            else:
+                query = f"{_ANY_NODE_BY_ID} DETACH DELETE n"
             
             result = await session.run(query, id=node_id)
-            record = await result.single()
-            return record["deleted"] > 0
+            summary = await result.consume()
+            return summary.counters.nodes_deleted > 0
+    
+    async def delete_nodes(
+        self,
+        node_type: str,
+        ids: list[str],
+        batch_size: int = DELETE_BATCH_SIZE,
+    ) -> int:
+        """批量删除同类型节点及其关联关系
+        
+        一条 UNWIND 语句完成，每 batch_size 行提交一个内部事务
+        (CALL { ... } IN TRANSACTIONS 须在自动提交事务中执行)。
+        
+        Args:
+            node_type: 节点类型
+            ids: 节点ID列表
+            batch_size: 每个内部事务的行数
+            
+        Returns:
+            int: 删除的节点数
+        """
+        if not ids:
+            return 0
+        
+        query = _DELETE_NODES_QUERIES[_check_label(node_type)]
+        async with self.session() as session:
+            result = await session.run(query, ids=ids, batch_size=batch_size)
+            summary = await result.consume()
+            return summary.counters.nodes_deleted
+    
+    async def iter_nodes(
+        self,
+        node_type: str,
+        filters: dict[str, Any] | None = None,
+        limit: int = 100,
+        skip: int = 0,
+    ) -> AsyncIterator[dict]:
+        """逐条流式返回节点 (参数同 find_nodes)
+        
+        提前退出时请用 contextlib.aclosing 包裹以及时释放会话。
+        """
+        filters = filters or {}
+        query = _find_nodes_query(node_type, tuple(sorted(filters)))
+        params = {"filters": filters, "skip": skip, "limit": limit}
+        
+        async with self.session(write=False) as session:
+            result = await session.run(query, **params)
+            async for record in result:
+                yield dict(record["n"])
     
     async def find_nodes(
         self,
-        node_type: NodeType,
+        node_type: str,
         filters: dict[str, Any] | None = None,
         limit: int = 100,
         skip: int = 0,
@@ -205,28 +474,7 @@ class Neo4jClient:
         Returns:
             list[dict]: 节点列表
         """
-        async with self.session() as session:
-            where_clause = ""
-            if filters:
-                conditions = [f"n.{k} = ${k}" for k in filters.keys()]
-                where_clause = "WHERE " + " AND ".join(conditions)
-            
-            query = f"""
-            MATCH (n:{node_type.value})
-            {where_clause}
-            RETURN n
-            ORDER BY n.created_at DESC
-            SKIP $skip
-            LIMIT $limit
-            """
-            
-            params = {"skip": skip, "limit": limit}
-            if filters:
-                params.update(filters)
-            
-            result = await session.run(query, **params)
-            records = await result.data()
-            return [dict(r["n"]) for r in records]
+        return [node async for node in self.iter_nodes(node_type, filters, limit, skip)]
     
     # ==================== 关系操作 ====================
     
@@ -241,11 +489,10 @@ class Neo4jClient:
         """
         async with self.session() as session:
             properties = edge.to_neo4j_properties()
-            rel_type = edge.edge_type.value
+            rel_type = edge.edge_type
             
             query = f"""
-            MATCH (a {{id: $source_id}})
-            MATCH (b {{id: $target_id}})
+            {type(edge).match_endpoints_cypher("$source_id", "$target_id")}
             CREATE (a)-[r:{rel_type} $props]->(b)
             RETURN r.id as id
             """
@@ -267,13 +514,39 @@ class Neo4jClient:
             logger.debug(f"Created edge: {rel_type} with id {record['id']}")
             return record["id"]
     
+    async def create_edges_bulk(
+        self,
+        edges: list[BaseEdge],
+        batch_size: int = WRITE_BATCH_SIZE,
+    ) -> list[str]:
+        """批量创建关系
+        
+        按关系类型分组，每 batch_size 条一次 UNWIND 写入 (按 id MERGE，可重复执行)。
+        源/目标节点不存在的关系会被跳过。
+        
+        Args:
+            edges: 关系对象列表
+            batch_size: 每批行数
+            
+        Returns:
+            list[str]: 成功写入的关系ID列表
+        """
+        created = []
+        async with self.session() as session:
+            for edge_cls, rows in BaseEdge.batch_by_type(edges).items():
+                query = edge_cls.unwind_cypher()
+                for start in range(0, len(rows), batch_size):
+                    result = await session.run(query, rows=rows[start:start + batch_size])
+                    records = await result.data()
+                    created.extend(r["id"] for r in records)
+        
+        logger.debug(f"Created {len(created)}/{len(edges)} edges")
+        return created
+    
     async def get_edge(self, edge_id: str) -> dict | None:
         """获取关系"""
-        async with self.session() as session:
-            query = """
-            MATCH ()-[r {id: $id}]->()
-            RETURN r, type(r) as type
-            """
+        async with self.session(write=False) as session:
+            query = f"{_ANY_EDGE_BY_ID} RETURN r, type(r) AS type LIMIT 1"
             
             result = await session.run(query, id=edge_id)
             record = await result.single()
@@ -287,78 +560,107 @@ class Neo4jClient:
     async def delete_edge(self, edge_id: str) -> bool:
         """删除关系"""
         async with self.session() as session:
-            query = """
-            MATCH ()-[r {id: $id}]->()
-            DELETE r
-            RETURN count(r) as deleted
-            """
+            query = f"{_ANY_EDGE_BY_ID} DELETE r"
             
             result = await session.run(query, id=edge_id)
-            record = await result.single()
-            return record["deleted"] > 0
+            summary = await result.consume()
+            return summary.counters.relationships_deleted > 0
+    
+    async def delete_edges(
+        self,
+        edge_type: str,
+        ids: list[str],
+        batch_size: int = DELETE_BATCH_SIZE,
+    ) -> int:
+        """批量删除同类型关系 (分批提交方式同 delete_nodes)
+        
+        Returns:
+            int: 删除的关系数
+        """
+        if not ids:
+            return 0
+        
+        query = _DELETE_EDGES_QUERIES[_check_edge_type(edge_type)]
+        async with self.session() as session:
+            result = await session.run(query, ids=ids, batch_size=batch_size)
+            summary = await result.consume()
+            return summary.counters.relationships_deleted
+    
+    async def iter_edges(
+        self,
+        edge_type: str,
+        source_id: str | None = None,
+        target_id: str | None = None,
+        limit: int = 100,
+    ) -> AsyncIterator[dict]:
+        """逐条流式返回关系 (参数同 find_edges)"""
+        query = _find_edges_query(edge_type, bool(source_id), bool(target_id))
+        params = {"limit": limit, "source_id": source_id, "target_id": target_id}
+        
+        async with self.session(write=False) as session:
+            # 结果已由 map projection 组装为关系属性 + 端点 id
+            result = await session.run(query, **params)
+            async for record in result:
+                yield record["edge"]
     
     async def find_edges(
         self,
-        edge_type: EdgeType,
+        edge_type: str,
         source_id: str | None = None,
         target_id: str | None = None,
         limit: int = 100,
     ) -> list[dict]:
         """查找关系"""
-        async with self.session() as session:
-            conditions = []
-            params = {"limit": limit}
-            
-            if source_id:
-                conditions.append("a.id = $source_id")
-                params["source_id"] = source_id
-            if target_id:
-                conditions.append("b.id = $target_id")
-                params["target_id"] = target_id
-            
-            where_clause = ""
-            if conditions:
-                where_clause = "WHERE " + " AND ".join(conditions)
-            
-            query = f"""
-            MATCH (a)-[r:{edge_type.value}]->(b)
-            {where_clause}
-            RETURN r, a.id as source_id, b.id as target_id
-            LIMIT $limit
-            """
-            
-            result = await session.run(query, **params)
-            records = await result.data()
-            
-            edges = []
-            for r in records:
-                edge_data = dict(r["r"])
-                edge_data["source_id"] = r["source_id"]
-                edge_data["target_id"] = r["target_id"]
-                edges.append(edge_data)
-            
-            return edges
+        return [
+            edge async for edge in self.iter_edges(edge_type, source_id, target_id, limit)
+        ]
     
     # ==================== 复杂查询 ====================
     
     async def execute_query(
         self,
-        query: str,
-        parameters: dict[str, Any] | None = None
+        query: str | Query,
+        parameters: dict[str, Any] | None = None,
+        write: bool = False,
     ) -> list[dict]:
         """执行自定义 Cypher 查询
         
         Args:
-            query: Cypher 查询语句
+            query: Cypher 查询语句或 Query 对象 (携带超时与元数据)
             parameters: 查询参数
+            write: 是否包含写操作 (默认只读会话)
             
         Returns:
             list[dict]: 查询结果
         """
-        async with self.session() as session:
+        async with self.session(write=write) as session:
             result = await session.run(query, **(parameters or {}))
             return await result.data()
     
+    async def stream_query(
+        self,
+        query: str | Query,
+        parameters: dict[str, Any] | None = None,
+        write: bool = False,
+    ) -> AsyncIterator[dict]:
+        """执行自定义 Cypher 查询并逐行返回结果
+        
+        结果不整体物化，适合大结果集或只需前若干行的场景；
+        提前退出时请用 contextlib.aclosing 包裹以及时释放会话。
+        
+        Args:
+            query: Cypher 查询语句
+            parameters: 查询参数
+            write: 是否包含写操作 (默认只读会话)
+            
+        Yields:
+            dict: 单行结果
+        """
+        async with self.session(write=write) as session:
+            result = await session.run(query, **(parameters or {}))
+            async for record in result:
+                yield record.data()
+    
     async def get_drug_by_indication(
         self,
         indication_id: str,
@@ -461,7 +763,7 @@ class Neo4jClient:
         MATCH (d:Drug {id: $drug_id})-[:TREATS]->(i:Indication {id: $indication_id})
         MATCH (competitor:Drug)-[r:TREATS]->(i)
         WHERE competitor.id <> $drug_id
-        OPTIONAL MATCH (competitor)-[:OUTPUTS]->(:Trial)-[:OUTPUTS]->(e:EndpointData)
+        OPTIONAL MATCH (t:Trial {drug_id: competitor.id})-[:OUTPUTS]->(e:EndpointData)
         RETURN competitor, r, collect(e) as endpoints
         ORDER BY r.priority DESC
         """
@@ -474,24 +776,11 @@ class Neo4jClient:
     # ==================== 图谱统计 ====================
     
     async def get_statistics(self) -> dict:
-        """获取图谱统计信息"""
-        query = """
-        MATCH (n)
-        WITH labels(n) as labels, count(*) as count
-        UNWIND labels as label
-        RETURN label, sum(count) as node_count
-        ORDER BY node_count DESC
-        """
-        
-        node_stats = await self.execute_query(query)
-        
-        edge_query = """
-        MATCH ()-[r]->()
-        RETURN type(r) as edge_type, count(*) as edge_count
-        ORDER BY edge_count DESC
-        """
-        
-        edge_stats = await self.execute_query(edge_query)
+        """获取图谱统计信息 (各节点标签与关系类型的数量)"""
+        # 节点与关系统计在同一读事务中完成
+        node_stats, edge_stats = await self.run_many(
+            [(_NODE_COUNTS_QUERY, None), (_EDGE_COUNTS_QUERY, None)], write=False
+        )
         
         return {
             "nodes": {r["label"]: r["node_count"] for r in node_stats},
@@ -510,6 +799,11 @@ def get_neo4j_client() -> Neo4jClient:
             username=settings.neo4j.username,
             password=settings.neo4j.password,
             database=settings.neo4j.database,
+            max_connection_pool_size=settings.neo4j.max_connection_pool_size,
+            connection_acquisition_timeout=settings.neo4j.connection_acquisition_timeout,
+            max_connection_lifetime=settings.neo4j.max_connection_lifetime,
+            connection_timeout=settings.neo4j.connection_timeout,
+            keep_alive=settings.neo4j.keep_alive,
         )
     
     return _neo4j_client
@@ -521,32 +815,53 @@ async def init_neo4j_schema(client: Neo4jClient) -> None:
     Args:
         client: Neo4j 客户端
     """
-    async with client.session() as session:
-        # 创建唯一约束
-        constraints = [
-            "CREATE CONSTRAINT IF NOT EXISTS FOR (n:Company) REQUIRE n.id IS UNIQUE",
-            "CREATE CONSTRAINT IF NOT EXISTS FOR (n:Drug) REQUIRE n.id IS UNIQUE",
-            "CREATE CONSTRAINT IF NOT EXISTS FOR (n:Indication) REQUIRE n.id IS UNIQUE",
-            "CREATE CONSTRAINT IF NOT EXISTS FOR (n:Trial) REQUIRE n.id IS UNIQUE",
-            "CREATE CONSTRAINT IF NOT EXISTS FOR (n:Trial) REQUIRE n.nct_id IS UNIQUE",
-            "CREATE CONSTRAINT IF NOT EXISTS FOR (n:EndpointData) REQUIRE n.id IS UNIQUE",
-            "CREATE CONSTRAINT IF NOT EXISTS FOR (n:MediaAsset) REQUIRE n.id IS UNIQUE",
-            "CREATE CONSTRAINT IF NOT EXISTS FOR (n:ExternalFactor) REQUIRE n.id IS UNIQUE",
-            "CREATE CONSTRAINT IF NOT EXISTS FOR (n:ComboNode) REQUIRE n.id IS UNIQUE",
-            "CREATE CONSTRAINT IF NOT EXISTS FOR (n:LandmarkNode) REQUIRE n.id IS UNIQUE",
-        ]
-        
-        # 创建索引
-        indexes = [
-            "CREATE INDEX IF NOT EXISTS FOR (n:Drug) ON (n.name)",
-            "CREATE INDEX IF NOT EXISTS FOR (n:Drug) ON (n.target)",
-            "CREATE INDEX IF NOT EXISTS FOR (n:Indication) ON (n.name)",
-            "CREATE INDEX IF NOT EXISTS FOR (n:Company) ON (n.name)",
-            "CREATE INDEX IF NOT EXISTS FOR (n:Trial) ON (n.status)",
-        ]
-        
-        for query in constraints + indexes:
-            await session.run(query)
-        
-        logger.info("Neo4j schema initialized")
+    # 约束与索引由各模型类声明 (NEO4J_UNIQUE_KEYS / NEO4J_INDEX_KEYS)，在一个事务中提交
+    statements = [
+        query
+        for model in (*BaseNode.__subclasses__(), *BaseEdge.__subclasses__())
+        for query in model.cypher_index_statements()
+    ]
+    await client.run_many((query, None) for query in statements)
+    
+    logger.info("Neo4j schema initialized")
+
+
+async def warm_up_neo4j(
+    client: Neo4jClient,
+    page_cache: bool = False,
+    timeout: float = 30.0,
+) -> None:
+    """预热 Neo4j: 预编译分析查询模板，按需预加载页缓存
+    
+    服务端冷启动时执行计划缓存与页缓存均为空，首批分析查询会明显变慢。
+    EXPLAIN 只做规划不执行，可提前完成模板的解析与编译。
+    apoc.warmup.run 会把整个存储读入页缓存，大图上耗时可达数分钟，
+    因此需显式开启 (page_cache=True)，且仅在安装了 APOC 4.x 时存在。
+    
+    Args:
+        client: Neo4j 客户端
+        page_cache: 是否调用 apoc.warmup.run 预加载页缓存
+        timeout: 整个预热的最长秒数，超时后放弃剩余步骤，不阻塞启动
+    """
+    try:
+        async with asyncio.timeout(timeout):
+            for name in queries.__all__:
+                try:
+                    await client.execute_query(f"EXPLAIN {getattr(queries, name).text}")
+                except ClientError as e:
+                    logger.warning(f"Failed to precompile {name}: {e.message}")
+            
+            if page_cache:
+                try:
+                    # 服务端事务超时与客户端超时一致，放弃后不在服务端继续运行
+                    await client.execute_query(
+                        Query("CALL apoc.warmup.run(true, true, true)", timeout=timeout)
+                    )
+                except ClientError:
+                    logger.debug("apoc.warmup.run unavailable, skipping page cache warm-up")
+    except TimeoutError:
+        logger.warning(f"Neo4j warm-up exceeded {timeout}s, skipping the rest")
+        return
+    
+    logger.info("Neo4j warm-up finished")
 
@@ -8,6 +8,8 @@
 3. 数据诚信预警
 """
 
+from neo4j import Query
+
 # ==============================================================================
 # 竞争坍缩模拟
 # 如果药物X在适应症A的一线治疗实验中失败，图谱会自动沿路径找到所有
@@ -28,7 +30,7 @@ OPTIONAL MATCH (failed)-[:PART_OF_COMBO]->(combo_node:ComboNode)
 // 找出这些联合方案在该适应症的实验
 OPTIONAL MATCH (partner)-[treats:TREATS]->(ind:Indication {id: $failed_indication_id})
 OPTIONAL MATCH (partner)-[:DEVELOPED_BY]->(company:Company)
-OPTIONAL MATCH (partner)<-[:OUTPUTS]-(trial:Trial)-[:OUTPUTS]->(endpoint:EndpointData)
+OPTIONAL MATCH (trial:Trial {drug_id: partner.id})
 
 RETURN {
     failed_drug: failed.name,
@@ -61,7 +63,7 @@ WHERE other.id <> $drug_id
 
 OPTIONAL MATCH (combo)<-[:PART_OF_COMBO]-(all_drugs:Drug)
 OPTIONAL MATCH (trial:Trial)-[:OUTPUTS]->(endpoint:EndpointData)
-WHERE any(drug_id IN combo.drug_ids WHERE drug_id IN [trial.drug_id])
+WHERE trial.drug_id IN combo.drug_ids
 
 RETURN combo {
     .*,
@@ -95,7 +97,7 @@ WHERE ind.prevalence >= $min_prevalence
 
 // 检查是否有在研Phase III管线
 OPTIONAL MATCH (drug:Drug)-[treats:TREATS]->(ind)
-OPTIONAL MATCH (drug)<-[:OUTPUTS]-(trial:Trial)
+OPTIONAL MATCH (trial:Trial {drug_id: drug.id})
 WHERE trial.phase IN ['Phase III', 'Phase II/III']
   AND trial.status IN ['招募中', '进行中-不招募']
 
@@ -137,7 +139,7 @@ WHERE ind.unmet_need_score >= $min_unmet_need_score
 
 // 统计各阶段管线数量
 OPTIONAL MATCH (drug:Drug)-[:TREATS]->(ind)
-OPTIONAL MATCH (drug)<-[:OUTPUTS]-(trial:Trial)
+OPTIONAL MATCH (trial:Trial {drug_id: drug.id})
 
 WITH ind,
      count(DISTINCT CASE WHEN trial.phase = 'Phase III' THEN trial END) as phase3_count,
@@ -171,21 +173,30 @@ DATA_INTEGRITY_CHECK_QUERY = """
 // 参数: $p_value_threshold - p值阈值
 //       $censoring_threshold - 删失密度阈值
 
+// 先完成全部过滤，再为每个终点展开关联资源
 MATCH (trial:Trial)-[out:OUTPUTS]->(endpoint:EndpointData)
-WHERE (endpoint.hr_pfs_p_value IS NOT NULL AND endpoint.hr_pfs_p_value < $p_value_threshold)
-   OR (endpoint.hr_os_p_value IS NOT NULL AND endpoint.hr_os_p_value < $p_value_threshold)
-
-// 检查删失点密集度
-WITH trial, endpoint, out
-WHERE out.censoring_density_score IS NOT NULL 
-  AND out.censoring_density_score > $censoring_threshold
-
-// 获取关联的KM曲线资源
-OPTIONAL MATCH (endpoint)-[:HAS_ASSET]->(asset:MediaAsset)
-WHERE asset.asset_type = 'KM曲线'
-
-// 获取里程碑数据
-OPTIONAL MATCH (endpoint)-[:HAS_LANDMARK]->(landmark:LandmarkNode)
+WHERE out.censoring_density_score > $censoring_threshold
+  AND (endpoint.hr_pfs_p_value < $p_value_threshold
+       OR endpoint.hr_os_p_value < $p_value_threshold)
+
+// 获取关联的KM曲线资源 (每个终点取一条)
+CALL {
+    WITH endpoint
+    OPTIONAL MATCH (endpoint)-[:HAS_ASSET]->(asset:MediaAsset)
+    WHERE asset.asset_type = 'KM曲线'
+    RETURN asset.url AS km_asset
+    LIMIT 1
+}
+
+// 获取里程碑数据 (子查询内聚合，不与 KM 资源做笛卡尔积)
+CALL {
+    WITH endpoint
+    OPTIONAL MATCH (endpoint)-[:HAS_LANDMARK]->(landmark:LandmarkNode)
+    RETURN collect(landmark {
+        .month_12_rate, .month_24_rate, .month_36_rate,
+        .plateau_detected, .plateau_rate
+    }) AS landmarks
+}
 
 RETURN {
     trial: trial {.nct_id, .title, .phase, .enrollment_actual},
@@ -200,11 +211,8 @@ RETURN {
         tail_effect: out.tail_effect_strength,
         reliability_flag: out.data_reliability_flag
     },
-    km_asset: asset.url,
-    landmarks: collect(landmark {
-        .month_12_rate, .month_24_rate, .month_36_rate,
-        .plateau_detected, .plateau_rate
-    }),
+    km_asset: km_asset,
+    landmarks: landmarks,
     warning_level: CASE
         WHEN out.censoring_density_score > 0.7 
              AND (endpoint.hr_pfs_p_value < 0.001 OR endpoint.hr_os_p_value < 0.001)
@@ -230,7 +238,7 @@ WHERE (endpoint.hr_pfs_p_value < 0.01 AND endpoint.hr_pfs > 0.85)
    OR (endpoint.hr_os_p_value < 0.01 AND endpoint.hr_os > 0.85)
    OR (endpoint.orr_percent > 80 AND endpoint.grade3_plus_ae_rate > 60)
 
-OPTIONAL MATCH (trial)-[:OUTPUTS]->()<-[:DEVELOPED_BY]-(company:Company)
+OPTIONAL MATCH (company:Company)-[:CONDUCTS]->(trial)
 
 RETURN {
     trial_nct: trial.nct_id,
@@ -271,7 +279,7 @@ OPTIONAL MATCH (drug)-[:DEVELOPED_BY]->(company:Company)
 OPTIONAL MATCH (drug)-[treats:TREATS]->(ind:Indication)
 
 // 临床实验和终点数据
-OPTIONAL MATCH (trial:Trial)-[:OUTPUTS]->(drug)
+OPTIONAL MATCH (trial:Trial {drug_id: drug.id})
 OPTIONAL MATCH (trial)-[:OUTPUTS]->(endpoint:EndpointData)
 
 // 联合用药
@@ -313,42 +321,60 @@ INDICATION_LANDSCAPE_QUERY = """
 
 MATCH (ind:Indication {id: $indication_id})
 
+// 所有治疗药物: 每个药物的公司、最新实验与最佳疗效在各自子查询内聚合，
+// 外层按药物收集，避免 OPTIONAL MATCH 链式展开后的笛卡尔积
+CALL {
+    WITH ind
+    MATCH (drug:Drug)-[treats:TREATS]->(ind)
+    
+    CALL {
+        WITH drug
+        OPTIONAL MATCH (drug)-[:DEVELOPED_BY]->(company:Company)
+        RETURN company.name AS company
+        LIMIT 1
+    }
+    
+    CALL {
+        WITH drug
+        OPTIONAL MATCH (trial:Trial {drug_id: drug.id})
+        OPTIONAL MATCH (trial)-[:OUTPUTS]->(endpoint:EndpointData)
+        WITH trial, endpoint
+        ORDER BY trial.start_date DESC
+        RETURN head(collect(trial {.nct_id, .phase, .status})) AS latest_trial,
+               'Phase III' IN collect(trial.phase) AS in_phase3,
+               max(endpoint.mpfs_months) AS mpfs,
+               max(endpoint.mos_months) AS mos,
+               max(endpoint.orr_percent) AS orr
+    }
+    
+    RETURN collect({
+        drug: drug {.name, .molecule_type, .target},
+        company: company,
+        treatment_line: treats.treatment_line,
+        development_stage: treats.development_stage,
+        latest_trial: latest_trial,
+        best_efficacy: {mpfs: mpfs, mos: mos, orr: orr}
+    }) AS competitive_landscape,
+    count(DISTINCT drug) AS total_drugs,
+    count(DISTINCT CASE WHEN in_phase3 THEN drug END) AS drugs_in_phase3,
+    count(DISTINCT CASE WHEN treats.approval_status = '已获批' THEN drug END) AS drugs_approved
+}
+
 // 当前标准疗法
 OPTIONAL MATCH (ind)-[soc_rel:HAS_SOC]->(soc:Drug)
 WHERE soc_rel.is_current_soc = true
 
-// 所有治疗药物
-OPTIONAL MATCH (drug:Drug)-[treats:TREATS]->(ind)
-OPTIONAL MATCH (drug)-[:DEVELOPED_BY]->(company:Company)
-OPTIONAL MATCH (drug)<-[:OUTPUTS]-(trial:Trial)
-OPTIONAL MATCH (trial)-[:OUTPUTS]->(endpoint:EndpointData)
-
 RETURN {
     indication: ind {.*},
     current_soc: soc {.name, .target, .moa},
     soc_benchmark: soc_rel.soc_efficacy_benchmark,
     
-    competitive_landscape: collect(DISTINCT {
-        drug: drug {.name, .molecule_type, .target},
-        company: company.name,
-        treatment_line: treats.treatment_line,
-        development_stage: treats.development_stage,
-        latest_trial: {
-            nct_id: trial.nct_id,
-            phase: trial.phase,
-            status: trial.status
-        },
-        best_efficacy: {
-            mpfs: max(endpoint.mpfs_months),
-            mos: max(endpoint.mos_months),
-            orr: max(endpoint.orr_percent)
-        }
-    }),
+    competitive_landscape: competitive_landscape,
     
     summary: {
-        total_drugs: count(DISTINCT drug),
-        drugs_in_phase3: count(DISTINCT CASE WHEN trial.phase = 'Phase III' THEN drug END),
-        drugs_approved: count(DISTINCT CASE WHEN treats.approval_status = '已获批' THEN drug END)
+        total_drugs: total_drugs,
+        drugs_in_phase3: drugs_in_phase3,
+        drugs_approved: drugs_approved
     }
 } as landscape
 """
@@ -362,7 +388,7 @@ MATCH (company:Company {id: $company_id})
 // 药物管线
 OPTIONAL MATCH (drug:Drug)-[:DEVELOPED_BY]->(company)
 OPTIONAL MATCH (drug)-[treats:TREATS]->(ind:Indication)
-OPTIONAL MATCH (drug)<-[:OUTPUTS]-(trial:Trial)
+OPTIONAL MATCH (trial:Trial {drug_id: drug.id})
 
 RETURN {
     company: company {.*},
@@ -395,3 +421,31 @@ RETURN {
 } as company_pipeline
 """
 
+# ==============================================================================
+# 查询对象
+# 模板以 neo4j.Query 导出: 元数据写入服务端 query.log / SHOW TRANSACTIONS 便于归因，
+# 超时由服务端强制终止失控的全图扫描
+# ==============================================================================
+
+# 分析模板的事务超时 (秒)
+TEMPLATE_QUERY_TIMEOUT = 30.0
+
+
+def _query(text: str, name: str) -> Query:
+    return Query(
+        text,
+        metadata={"app": "biovalue", "query": name},
+        timeout=TEMPLATE_QUERY_TIMEOUT,
+    )
+
+
+COMPETITION_COLLAPSE_QUERY = _query(COMPETITION_COLLAPSE_QUERY, "competition_collapse")
+FIND_AFFECTED_COMBOS_QUERY = _query(FIND_AFFECTED_COMBOS_QUERY, "find_affected_combos")
+OPPORTUNITY_DISCOVERY_QUERY = _query(OPPORTUNITY_DISCOVERY_QUERY, "opportunity_discovery")
+HIGH_UNMET_NEED_QUERY = _query(HIGH_UNMET_NEED_QUERY, "high_unmet_need")
+DATA_INTEGRITY_CHECK_QUERY = _query(DATA_INTEGRITY_CHECK_QUERY, "data_integrity_check")
+SUSPICIOUS_DATA_QUERY = _query(SUSPICIOUS_DATA_QUERY, "suspicious_data")
+DRUG_FULL_PROFILE_QUERY = _query(DRUG_FULL_PROFILE_QUERY, "drug_full_profile")
+INDICATION_LANDSCAPE_QUERY = _query(INDICATION_LANDSCAPE_QUERY, "indication_landscape")
+COMPANY_PIPELINE_QUERY = _query(COMPANY_PIPELINE_QUERY, "company_pipeline")
+
@@ -8,7 +8,7 @@
 """
 
 from .base import BaseLLM, LLMType
-from .factory import LLMFactory, get_llm
+from .factory import LLMFactory, close_llms, get_llm
 
-__all__ = ["BaseLLM", "LLMType", "LLMFactory", "get_llm"]
+__all__ = ["BaseLLM", "LLMType", "LLMFactory", "close_llms", "get_llm"]
 
@@ -3,10 +3,19 @@
 定义 LLM 的统一抽象接口，实现解耦设计
 """
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, AsyncIterator, Literal, TypeVar
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, Literal, TypeVar
 
+import orjson
 from pydantic import BaseModel
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+from src.utils import get_logger
+
+logger = get_logger(__name__)
 
 # LLM 类型定义
 LLMType = Literal["reasoning", "basic", "extraction", "embedding"]
@@ -14,13 +23,65 @@ LLMType = Literal["reasoning", "basic", "extraction", "embedding"]
 # 泛型类型变量，用于结构化输出
 T = TypeVar("T", bound=BaseModel)
 
+# 连续多少次请求缓存却未命中时发出警告
+CACHE_MISS_WARN_THRESHOLD = 3
+
+# 每个实例同时在途的 API 请求数上限 (可通过 max_concurrency 参数调整)
+DEFAULT_MAX_CONCURRENCY = 16
+
+# 每个实例缓存的嵌入向量条数 (同一模型对同一文本的嵌入是确定的)
+EMBED_CACHE_SIZE = 4096
+
 
 class LLMResponse(BaseModel):
     """LLM 响应模型"""
     content: str
     model: str
     usage: dict[str, int] | None = None
-    raw_response: Any = None
+    raw_response: Any = None  # 仅在 include_raw=True 时保留完整的 API 响应
+
+
+def normalize_usage(usage: dict[str, Any] | None) -> dict[str, int] | None:
+    """将提供商返回的 usage 统一为扁平的整数字典
+    
+    OpenAI/Qwen 在 prompt_tokens_details.cached_tokens 中返回提示词缓存命中数，
+    DeepSeek 使用 prompt_cache_hit_tokens，统一记录为 cached_tokens。
+    """
+    if not usage:
+        return None
+    
+    normalized = {k: v for k, v in usage.items() if isinstance(v, int)}
+    details = usage.get("prompt_tokens_details") or {}
+    cached = details.get("cached_tokens", usage.get("prompt_cache_hit_tokens"))
+    normalized["cached_tokens"] = cached or 0
+    return normalized
+
+
+@lru_cache(maxsize=256)
+def _schema_prompt(schema: type[BaseModel], instruction: str = "") -> str:
+    """schema 的 JSON 格式约束提示词 (只取决于模型类与附加说明，按类缓存)"""
+    schema_json = orjson.dumps(schema.model_json_schema(), option=orjson.OPT_INDENT_2).decode()
+    prompt = f"""你必须以 JSON 格式响应，严格遵循以下 schema:
+{schema_json}"""
+    return f"{prompt}\n\n{instruction}" if instruction else prompt
+
+
+def schema_system_prompt(
+    schema: type[BaseModel],
+    system_prompt: str | None = None,
+    instruction: str = "",
+) -> str:
+    """structured_output 的系统提示词
+    
+    调用方的系统提示词在前，schema 约束在后，保持可缓存的公共前缀。
+    
+    Args:
+        schema: Pydantic 模型类
+        system_prompt: 调用方的系统提示词
+        instruction: 附加在 schema 之后的说明 (如不支持 JSON 模式的模型需强调只输出 JSON)
+    """
+    schema_prompt = _schema_prompt(schema, instruction)
+    return f"{system_prompt}\n\n{schema_prompt}" if system_prompt else schema_prompt
 
 
 class BaseLLM(ABC):
@@ -45,6 +106,75 @@ class BaseLLM(ABC):
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.extra_kwargs = kwargs
+        self._cache_miss_streak = 0
+        self._embed_cache: OrderedDict[str, list[float]] = OrderedDict()
+        # 调用方可直接 asyncio.gather 大量请求，由信号量限制实际并发，避免触发限流
+        self._semaphore = asyncio.Semaphore(kwargs.get("max_concurrency", DEFAULT_MAX_CONCURRENCY))
+    
+    async def _embed_deduplicated(
+        self,
+        texts: list[str],
+        fetch: Callable[[list[str]], Awaitable[list[list[float]]]],
+    ) -> list[list[float]]:
+        """去重并查缓存后再请求嵌入
+        
+        重复文本与近期已嵌入过的文本不再请求 API，结果按 texts 原顺序返回。
+        
+        Args:
+            texts: 待嵌入文本
+            fetch: 实际请求 API 的函数，按输入顺序返回向量
+        """
+        cache = self._embed_cache
+        found: dict[str, list[float]] = {}
+        for t in dict.fromkeys(texts):
+            if t in cache:
+                cache.move_to_end(t)
+                found[t] = cache[t]
+        
+        misses = [t for t in dict.fromkeys(texts) if t not in found]
+        if misses:
+            for t, vector in zip(misses, await fetch(misses)):
+                found[t] = cache[t] = vector
+            while len(cache) > EMBED_CACHE_SIZE:
+                cache.popitem(last=False)
+        
+        return [found[t] for t in texts]
+    
+    def _raw_response(self, data: Any, request_kwargs: dict[str, Any]) -> Any:
+        """按需保留原始响应
+        
+        长时间运行的 Agent 会积累大量响应，默认不持有完整 JSON；
+        调试时可按调用或按实例传入 include_raw=True。
+        """
+        if request_kwargs.get("include_raw", self.extra_kwargs.get("include_raw", False)):
+            return data
+        return None
+    
+    def _track_prompt_cache(self, usage: dict[str, int] | None, request_kwargs: dict[str, Any]) -> None:
+        """记录提示词缓存命中情况
+        
+        仅统计请求了缓存 (cache_system_prompt / prompt_cache_key) 的调用；
+        连续未命中说明缓存前缀在变化，缓存只写不读。
+        """
+        if not usage or not (
+            request_kwargs.get("cache_system_prompt") or request_kwargs.get("prompt_cache_key")
+        ):
+            return
+        
+        cached = usage.get("cached_tokens", 0)
+        logger.debug(
+            f"Prompt cache: {cached}/{usage.get('prompt_tokens', 0)} tokens read from cache"
+        )
+        if cached:
+            self._cache_miss_streak = 0
+            return
+        
+        self._cache_miss_streak += 1
+        if self._cache_miss_streak == CACHE_MISS_WARN_THRESHOLD:
+            logger.warning(
+                f"{self!r}: prompt cache missed {self._cache_miss_streak} requests in a row, "
+                "check that the cached prefix is stable across calls"
+            )
     
     @abstractmethod
     async def generate(
@@ -58,7 +188,7 @@ class BaseLLM(ABC):
         Args:
             prompt: 用户提示词
             system_prompt: 系统提示词
-            **kwargs: 额外参数
+            **kwargs: 额外参数 (include_raw=True 时在 raw_response 中保留原始响应)
             
         Returns:
             LLMResponse: 包含生成内容的响应对象
@@ -74,6 +204,9 @@ class BaseLLM(ABC):
     ) -> AsyncIterator[str]:
         """流式生成文本
         
+        默认每次网络读取返回一个片段 (可能包含多个 token)，
+        kwargs 中 per_token=True 时按服务端事件逐个返回。
+        
         Args:
             prompt: 用户提示词
             system_prompt: 系统提示词
@@ -142,3 +275,20 @@ class LLMResponseError(LLMError):
     """响应解析错误"""
     pass
 
+
+class LLMServerError(LLMResponseError):
+    """服务端错误 (5xx)"""
+    pass
+
+
+# 只重试瞬时错误: 连接失败/超时、限流与服务端 5xx；其余 4xx 与解析错误重试无益
+RETRYABLE_ERRORS = (LLMConnectionError, LLMRateLimitError, LLMServerError)
+
+# generate 的重试策略 (指数退避，最多 3 次)
+llm_retry = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=2, max=10),
+    retry=retry_if_exception_type(RETRYABLE_ERRORS),
+    reraise=True,
+)
+
@@ -37,25 +37,26 @@ class LLMFactory:
         "ollama": OllamaLLM,
     }
     
+    # 支持的 LLM 类型 (对应 Settings.<type>_model)
+    LLM_TYPES = ("reasoning", "basic", "extraction", "embedding")
+    
+    # base_url 特征 -> 提供商，按顺序匹配第一条
+    PROVIDER_RULES = (
+        ("deepseek", "deepseek"),
+        ("dashscope", "qwen"),
+        ("aliyun", "qwen"),
+        (":11434", "ollama"),  # Ollama 默认端口
+        ("openai", "openai"),
+    )
+    
     @classmethod
     def detect_provider(cls, config: LLMConfig) -> str:
-        """根据配置检测 LLM 提供商"""
+        """根据配置检测 LLM 提供商 (未匹配时默认使用 OpenAI 兼容接口)"""
         base_url = config.base_url.lower()
-        
-        if "deepseek" in base_url:
-            return "deepseek"
-        elif "dashscope" in base_url or "aliyun" in base_url:
-            return "qwen"
-        elif "localhost" in base_url or "127.0.0.1" in base_url:
-            # 检查是否是 Ollama
-            if "11434" in base_url:
-                return "ollama"
-            return "openai"  # 默认兼容 OpenAI API
-        elif "openai" in base_url:
-            return "openai"
-        else:
-            # 默认使用 OpenAI 兼容接口
-            return "openai"
+        return next(
+            (provider for needle, provider in cls.PROVIDER_RULES if needle in base_url),
+            "openai",
+        )
     
     @classmethod
     def create(
@@ -88,6 +89,9 @@ class LLMFactory:
             base_url=config.base_url,
             temperature=config.temperature,
             max_tokens=config.max_tokens,
+            pool_max=config.pool_max,
+            max_concurrency=config.max_concurrency,
+            request_compression=config.request_compression,
         )
     
     @classmethod
@@ -100,26 +104,19 @@ class LLMFactory:
         Returns:
             BaseLLM: LLM 实例
         """
-        settings = get_settings()
-        
-        config_map = {
-            "reasoning": settings.reasoning_model,
-            "basic": settings.basic_model,
-            "extraction": settings.extraction_model,
-            "embedding": settings.embedding_model,
-        }
-        
-        config = config_map.get(llm_type)
-        if config is None:
+        if llm_type not in cls.LLM_TYPES:
             raise ValueError(f"Unknown LLM type: {llm_type}")
         
+        # 只加载所需类型的子配置
+        config = getattr(get_settings(), f"{llm_type}_model")
         return cls.create(config)
 
 
 def get_llm(llm_type: LLMType = "basic") -> BaseLLM:
     """获取 LLM 实例
     
-    使用缓存机制，避免重复创建实例。
+    使用缓存机制，每种类型在进程内只创建一个实例，
+    其 HTTP 客户端 (连接池) 在各节点调用间复用。
     
     Args:
         llm_type: LLM 类型
@@ -127,10 +124,10 @@ def get_llm(llm_type: LLMType = "basic") -> BaseLLM:
     Returns:
         BaseLLM: LLM 实例
     """
-    if llm_type not in _llm_cache:
-        _llm_cache[llm_type] = LLMFactory.create_from_settings(llm_type)
-    
-    return _llm_cache[llm_type]
+    llm = _llm_cache.get(llm_type)
+    if llm is None:
+        llm = _llm_cache[llm_type] = LLMFactory.create_from_settings(llm_type)
+    return llm
 
 
 def clear_llm_cache():
@@ -138,6 +135,16 @@ def clear_llm_cache():
     _llm_cache.clear()
 
 
+async def close_llms():
+    """关闭所有缓存实例的 HTTP 客户端并清除缓存"""
+    for llm in _llm_cache.values():
+        try:
+            await llm.close()
+        except Exception as e:
+            logger.warning(f"Failed to close {llm!r}: {e}")
+    _llm_cache.clear()
+
+
 # 便捷函数
 def get_reasoning_llm() -> BaseLLM:
     """获取推理 LLM"""
@@ -5,12 +5,11 @@ DeepSeek API 的 LLM 实现，支持:
 - deepseek-reasoner (推理增强模型)
 """
 
-import json
 from typing import Any, AsyncIterator, TypeVar
 
-import httpx
+import aiohttp
+import orjson
 from pydantic import BaseModel
-from tenacity import retry, stop_after_attempt, wait_exponential
 
 from ..base import (
     BaseLLM,
@@ -18,14 +17,30 @@ from ..base import (
     LLMRateLimitError,
     LLMResponse,
     LLMResponseError,
+    LLMServerError,
+    llm_retry,
+    normalize_usage,
+    schema_system_prompt,
+)
+from .http import (
+    SessionMixin,
+    encode_body,
+    iter_line_batches,
+    merge_pieces,
+    read_json,
 )
 
 T = TypeVar("T", bound=BaseModel)
 
+# structured_output 在 schema 之后追加的输出约束
+_JSON_ONLY = "不要输出任何其他内容，只输出 JSON。"
+
 
-class DeepSeekLLM(BaseLLM):
+class DeepSeekLLM(SessionMixin, BaseLLM):
     """DeepSeek LLM 实现"""
     
+    SESSION_TIMEOUT = 120.0  # DeepSeek 推理模型可能需要更长时间
+    
     def __init__(
         self,
         model: str = "deepseek-chat",
@@ -43,20 +58,6 @@ class DeepSeekLLM(BaseLLM):
             max_tokens=max_tokens,
             **kwargs
         )
-        self._client: httpx.AsyncClient | None = None
-    
-    @property
-    def client(self) -> httpx.AsyncClient:
-        if self._client is None:
-            self._client = httpx.AsyncClient(
-                base_url=self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                timeout=120.0,  # DeepSeek 推理模型可能需要更长时间
-            )
-        return self._client
     
     def _build_messages(
         self,
@@ -70,11 +71,7 @@ class DeepSeekLLM(BaseLLM):
         messages.append({"role": "user", "content": prompt})
         return messages
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        reraise=True,
-    )
+    @llm_retry
     async def generate(
         self,
         prompt: str,
@@ -83,21 +80,25 @@ class DeepSeekLLM(BaseLLM):
     ) -> LLMResponse:
         """生成文本响应"""
         try:
-            response = await self.client.post(
-                "/chat/completions",
-                json={
-                    "model": self.model,
-                    "messages": self._build_messages(prompt, system_prompt),
-                    "temperature": kwargs.get("temperature", self.temperature),
-                    "max_tokens": kwargs.get("max_tokens", self.max_tokens),
-                },
-            )
+            payload = {
+                "model": self.model,
+                "messages": self._build_messages(prompt, system_prompt),
+                "temperature": kwargs.get("temperature", self.temperature),
+                "max_tokens": kwargs.get("max_tokens", self.max_tokens),
+            }
+            # JSON 模式 (structured_output 使用)
+            if response_format := kwargs.get("response_format"):
+                payload["response_format"] = response_format
             
-            if response.status_code == 429:
-                raise LLMRateLimitError("Rate limit exceeded")
-            
-            response.raise_for_status()
-            data = response.json()
+            body, headers = encode_body(payload, self.extra_kwargs.get("request_compression", False))
+            async with self._semaphore, self.client.post(
+                self._url("/chat/completions"), data=body, headers=headers
+            ) as response:
+                if response.status == 429:
+                    raise LLMRateLimitError("Rate limit exceeded")
+                
+                response.raise_for_status()
+                data = await read_json(response)
             
             # DeepSeek reasoner 可能有 reasoning_content
             content = data["choices"][0]["message"]["content"]
@@ -106,17 +107,21 @@ class DeepSeekLLM(BaseLLM):
             if reasoning:
                 content = f"【推理过程】\n{reasoning}\n\n【结论】\n{content}"
             
+            usage = normalize_usage(data.get("usage"))
+            self._track_prompt_cache(usage, kwargs)
+            
             return LLMResponse(
                 content=content,
                 model=data["model"],
-                usage=data.get("usage"),
-                raw_response=data,
+                usage=usage,
+                raw_response=self._raw_response(data, kwargs),
             )
             
-        except httpx.ConnectError as e:
+        except aiohttp.ClientConnectionError as e:
             raise LLMConnectionError(f"Failed to connect to DeepSeek: {e}")
-        except httpx.HTTPStatusError as e:
-            raise LLMResponseError(f"HTTP error: {e}")
+        except aiohttp.ClientResponseError as e:
+            error_cls = LLMServerError if e.status >= 500 else LLMResponseError
+            raise error_cls(f"HTTP error: {e}")
     
     async def generate_stream(
         self,
@@ -126,9 +131,8 @@ class DeepSeekLLM(BaseLLM):
     ) -> AsyncIterator[str]:
         """流式生成文本"""
         try:
-            async with self.client.stream(
-                "POST",
-                "/chat/completions",
+            async with self._semaphore, self.client.post(
+                self._url("/chat/completions"),
                 json={
                     "model": self.model,
                     "messages": self._build_messages(prompt, system_prompt),
@@ -138,22 +142,41 @@ class DeepSeekLLM(BaseLLM):
                 },
             ) as response:
                 response.raise_for_status()
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
+                # 每次网络读取中的多个 SSE 事件合并为一个片段返回，减少 yield 次数；
+                # per_token=True 时逐个事件返回
+                per_token = kwargs.get("per_token", False)
+                async for lines in iter_line_batches(response):
+                    reasonings = []
+                    pieces = []
+                    done = False
+                    for line in lines:
+                        # SSE 行按字节处理，orjson 直接解析
+                        line = line.strip()
+                        if not line.startswith(b"data: "):
+                            continue
                         data = line[6:]
-                        if data == "[DONE]":
+                        if data == b"[DONE]":
+                            done = True
                             break
                         try:
-                            chunk = json.loads(data)
-                            delta = chunk["choices"][0]["delta"]
-                            if content := delta.get("content"):
-                                yield content
-                            if reasoning := delta.get("reasoning_content"):
-                                yield f"[推理]{reasoning}"
-                        except json.JSONDecodeError:
+                            chunk = orjson.loads(data)
+                        except orjson.JSONDecodeError:
                             continue
-                            
-        except httpx.ConnectError as e:
+                        delta = chunk["choices"][0]["delta"]
+                        if reasoning := delta.get("reasoning_content"):
+                            reasonings.append(reasoning)
+                        if content := delta.get("content"):
+                            pieces.append(content)
+                    
+                    # 推理过程先于结论输出
+                    for reasoning in merge_pieces(reasonings, per_token):
+                        yield f"[推理]{reasoning}"
+                    for piece in merge_pieces(pieces, per_token):
+                        yield piece
+                    if done:
+                        break
+            
+        except aiohttp.ClientConnectionError as e:
             raise LLMConnectionError(f"Failed to connect to DeepSeek: {e}")
     
     async def structured_output(
@@ -164,35 +187,22 @@ class DeepSeekLLM(BaseLLM):
         **kwargs
     ) -> T:
         """生成结构化输出"""
-        schema_json = schema.model_json_schema()
-        enhanced_system = f"""你必须以 JSON 格式响应，严格遵循以下 schema:
-{json.dumps(schema_json, ensure_ascii=False, indent=2)}
-
-不要输出任何其他内容，只输出 JSON。
-
-{system_prompt or ''}"""
-        
+        kwargs.setdefault("temperature", 0)  # 结构化输出使用低温度
+        kwargs["include_raw"] = True  # 需要从原始响应中取结论
         response = await self.generate(
             prompt=prompt,
-            system_prompt=enhanced_system,
-            temperature=0,
+            system_prompt=schema_system_prompt(schema, system_prompt, _JSON_ONLY),
+            response_format={"type": "json_object"},
             **kwargs
         )
         
+        # 直接取模型输出的结论 (不含推理过程)，无需从拼接后的文本中切分
+        content = response.raw_response["choices"][0]["message"]["content"]
+        
+        # JSON 模式下响应即为 JSON 文本，直接校验
         try:
-            content = response.content
-            # 移除推理过程，只保留结论部分
-            if "【结论】" in content:
-                content = content.split("【结论】")[1]
-            
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0]
-            
-            data = json.loads(content.strip())
-            return schema.model_validate(data)
-        except (json.JSONDecodeError, ValueError) as e:
+            return schema.model_validate_json(content)
+        except ValueError as e:
             raise LLMResponseError(f"Failed to parse structured output: {e}")
     
     async def embed(self, text: str | list[str]) -> list[list[float]]:
@@ -201,10 +211,4 @@ class DeepSeekLLM(BaseLLM):
         注意: DeepSeek 目前不提供嵌入 API，此方法会抛出异常
         """
         raise NotImplementedError("DeepSeek does not support embedding API")
-    
-    async def close(self):
-        """关闭客户端连接"""
-        if self._client:
-            await self._client.aclose()
-            self._client = None
 
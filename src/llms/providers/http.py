@@ -0,0 +1,176 @@
+# LLM 提供商 HTTP 会话
+"""
+LLM 提供商共用的 HTTP 会话:
+指向同一服务、使用相同凭据与连接参数的 LLM 实例 (如 basic / extraction 模型)
+共享一个会话及其连接池，按引用计数在最后一个实例关闭时释放。
+"""
+
+import base64
+import gzip
+from typing import Any, AsyncIterator
+
+import aiohttp
+import numpy as np
+import orjson
+
+# 单个会话的连接池上限 (可通过 extra_kwargs["pool_max"] 按模型调整)
+DEFAULT_POOL_MAX = 64
+
+# 空闲连接保持秒数
+KEEPALIVE_TIMEOUT = 60
+
+# 请求体超过该字节数时才压缩 (小请求压缩得不偿失)
+COMPRESS_MIN_BYTES = 4096
+
+
+def _dumps(obj: Any) -> str:
+    """序列化 JSON 请求体"""
+    return orjson.dumps(obj).decode()
+
+
+def encode_body(payload: Any, compress: bool = False) -> tuple[bytes, dict[str, str]]:
+    """序列化 JSON 请求体，返回 (请求体, 附加请求头)
+    
+    compress 为 True 且请求体较大时以 gzip (最快级别) 压缩；
+    部分 OpenAI 兼容网关不支持压缩请求，因此默认关闭。
+    """
+    body = orjson.dumps(payload)
+    if compress and len(body) > COMPRESS_MIN_BYTES:
+        return gzip.compress(body, compresslevel=1), {"Content-Encoding": "gzip"}
+    return body, {}
+
+
+def decode_embeddings(items: list[dict[str, Any]]) -> np.ndarray:
+    """将 /embeddings 响应的 data 列表解码为 (n, d) float32 矩阵
+    
+    兼容 encoding_format="base64" (小端 float32 字节) 与默认的浮点数组两种格式。
+    """
+    vectors = [item["embedding"] for item in items]
+    if vectors and isinstance(vectors[0], str):
+        return np.stack([np.frombuffer(base64.b64decode(v), dtype=np.float32) for v in vectors])
+    return np.asarray(vectors, dtype=np.float32)
+
+
+async def read_json(response: aiohttp.ClientResponse) -> Any:
+    """解码 JSON 响应体 (orjson 直接解析字节，跳过 str 解码)"""
+    return orjson.loads(await response.read())
+
+
+async def iter_line_batches(response: aiohttp.ClientResponse) -> AsyncIterator[list[bytes]]:
+    """按网络读取分批返回流式响应中的完整行
+    
+    每次读取到的数据按换行切分，末尾不完整的行留待与下一次读取拼接。
+    """
+    buffer = b""
+    async for data in response.content.iter_any():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        if lines:
+            yield lines
+    if buffer:
+        yield [buffer]
+
+
+def merge_pieces(pieces: list[str], per_token: bool = False) -> list[str]:
+    """合并同一批次解析出的文本片段 (per_token=True 时保持逐个返回)"""
+    if per_token or len(pieces) <= 1:
+        return pieces
+    return ["".join(pieces)]
+
+
+def create_session(
+    headers: dict[str, str],
+    timeout: float,
+    pool_max: int = DEFAULT_POOL_MAX,
+) -> aiohttp.ClientSession:
+    """创建带长连接池的会话
+    
+    显式保留空闲连接并缓存 DNS 解析结果，连续调用复用已建立的 TCP/TLS 连接。
+    超时按单次连接/读取计时，不限制流式响应的总时长。
+    """
+    connector = aiohttp.TCPConnector(
+        limit=pool_max,
+        limit_per_host=pool_max,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=300,
+        enable_cleanup_closed=True,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers=headers,
+        timeout=aiohttp.ClientTimeout(connect=timeout, sock_read=timeout),
+        json_serialize=_dumps,
+    )
+
+
+# 进程内共享的会话及其引用计数，按 (base_url, 请求头, 超时, 连接池上限) 复用
+_SESSIONS: dict[tuple, aiohttp.ClientSession] = {}
+_REFCOUNTS: dict[tuple, int] = {}
+
+
+def acquire_session(
+    base_url: str,
+    headers: dict[str, str],
+    timeout: float,
+    pool_max: int = DEFAULT_POOL_MAX,
+) -> aiohttp.ClientSession:
+    """获取共享会话并增加引用计数 (不存在或已关闭时新建)"""
+    key = (base_url, tuple(sorted(headers.items())), timeout, pool_max)
+    session = _SESSIONS.get(key)
+    if session is None or session.closed:
+        session = _SESSIONS[key] = create_session(headers, timeout, pool_max)
+        _REFCOUNTS[key] = 0
+    _REFCOUNTS[key] += 1
+    return session
+
+
+async def release_session(session: aiohttp.ClientSession) -> None:
+    """释放一次引用，引用归零时关闭会话"""
+    for key, shared in _SESSIONS.items():
+        if shared is session:
+            _REFCOUNTS[key] -= 1
+            if _REFCOUNTS[key] > 0:
+                return
+            del _SESSIONS[key], _REFCOUNTS[key]
+            break
+    
+    if not session.closed:
+        await session.close()
+
+
+
+class SessionMixin:
+    """LLM 提供商的共享 HTTP 会话、URL 拼接与释放 (与 BaseLLM 一同继承)
+    
+    子类通过 SESSION_TIMEOUT 与 _session_headers 声明各自的连接参数。
+    """
+    
+    SESSION_TIMEOUT: float = 60.0
+    _client: aiohttp.ClientSession | None = None
+    
+    def _session_headers(self) -> dict[str, str]:
+        """会话请求头 (默认 Bearer 鉴权)"""
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+    
+    @property
+    def client(self) -> aiohttp.ClientSession:
+        if self._client is None or self._client.closed:
+            self._client = acquire_session(
+                self.base_url,
+                headers=self._session_headers(),
+                timeout=self.SESSION_TIMEOUT,
+                pool_max=self.extra_kwargs.get("pool_max", DEFAULT_POOL_MAX),
+            )
+        return self._client
+    
+    def _url(self, path: str) -> str:
+        return f"{self.base_url.rstrip('/')}{path}"
+    
+    async def close(self):
+        """释放客户端连接 (共享会话在最后一个引用释放时关闭)"""
+        if self._client:
+            await release_session(self._client)
+            self._client = None
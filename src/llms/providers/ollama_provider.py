@@ -7,12 +7,12 @@ Ollama 本地部署的 LLM 实现，支持:
 - 等所有 Ollama 支持的模型
 """
 
-import json
+import asyncio
 from typing import Any, AsyncIterator, TypeVar
 
-import httpx
+import aiohttp
+import orjson
 from pydantic import BaseModel
-from tenacity import retry, stop_after_attempt, wait_exponential
 
 from ..base import (
     BaseLLM,
@@ -20,14 +20,28 @@ from ..base import (
     LLMRateLimitError,
     LLMResponse,
     LLMResponseError,
+    LLMServerError,
+    llm_retry,
+    schema_system_prompt,
+)
+from .http import (
+    SessionMixin,
+    iter_line_batches,
+    merge_pieces,
+    read_json,
 )
 
 T = TypeVar("T", bound=BaseModel)
 
+# structured_output 在 schema 之后追加的输出约束
+_JSON_ONLY = "只输出 JSON，不要输出其他内容。"
+
 
-class OllamaLLM(BaseLLM):
+class OllamaLLM(SessionMixin, BaseLLM):
     """Ollama 本地 LLM 实现"""
     
+    SESSION_TIMEOUT = 120.0  # 本地模型可能需要更长时间
+    
     def __init__(
         self,
         model: str = "llama3",
@@ -45,23 +59,12 @@ class OllamaLLM(BaseLLM):
             max_tokens=max_tokens,
             **kwargs
         )
-        self._client: httpx.AsyncClient | None = None
     
-    @property
-    def client(self) -> httpx.AsyncClient:
-        if self._client is None:
-            self._client = httpx.AsyncClient(
-                base_url=self.base_url,
-                headers={"Content-Type": "application/json"},
-                timeout=120.0,  # 本地模型可能需要更长时间
-            )
-        return self._client
+    def _session_headers(self) -> dict[str, str]:
+        """Ollama 不需要鉴权"""
+        return {"Content-Type": "application/json"}
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        reraise=True,
-    )
+    @llm_retry
     async def generate(
         self,
         prompt: str,
@@ -74,21 +77,24 @@ class OllamaLLM(BaseLLM):
             if system_prompt:
                 full_prompt = f"{system_prompt}\n\n{prompt}"
             
-            response = await self.client.post(
-                "/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": full_prompt,
-                    "options": {
-                        "temperature": kwargs.get("temperature", self.temperature),
-                        "num_predict": kwargs.get("max_tokens", self.max_tokens),
-                    },
-                    "stream": False,
+            payload = {
+                "model": self.model,
+                "prompt": full_prompt,
+                "options": {
+                    "temperature": kwargs.get("temperature", self.temperature),
+                    "num_predict": kwargs.get("max_tokens", self.max_tokens),
                 },
-            )
+                "stream": False,
+            }
+            # JSON 模式
+            if kwargs.get("response_format"):
+                payload["format"] = "json"
             
-            response.raise_for_status()
-            data = response.json()
+            async with self._semaphore, self.client.post(
+                self._url("/api/generate"), json=payload
+            ) as response:
+                response.raise_for_status()
+                data = await read_json(response)
             
             return LLMResponse(
                 content=data["response"],
@@ -98,13 +104,14 @@ class OllamaLLM(BaseLLM):
                     "completion_tokens": data.get("eval_count", 0),
                     "total_tokens": data.get("prompt_eval_count", 0) + data.get("eval_count", 0),
                 },
-                raw_response=data,
+                raw_response=self._raw_response(data, kwargs),
             )
             
-        except httpx.ConnectError as e:
+        except aiohttp.ClientConnectionError as e:
             raise LLMConnectionError(f"Failed to connect to Ollama: {e}. Is Ollama running?")
-        except httpx.HTTPStatusError as e:
-            raise LLMResponseError(f"HTTP error: {e}")
+        except aiohttp.ClientResponseError as e:
+            error_cls = LLMServerError if e.status >= 500 else LLMResponseError
+            raise error_cls(f"HTTP error: {e}")
     
     async def generate_stream(
         self,
@@ -118,9 +125,8 @@ class OllamaLLM(BaseLLM):
             if system_prompt:
                 full_prompt = f"{system_prompt}\n\n{prompt}"
             
-            async with self.client.stream(
-                "POST",
-                "/api/generate",
+            async with self._semaphore, self.client.post(
+                self._url("/api/generate"),
                 json={
                     "model": self.model,
                     "prompt": full_prompt,
@@ -132,17 +138,29 @@ class OllamaLLM(BaseLLM):
                 },
             ) as response:
                 response.raise_for_status()
-                async for line in response.aiter_lines():
-                    try:
-                        data = json.loads(line)
+                # 每次网络读取中的多行合并为一个片段返回，减少 yield 次数；
+                # per_token=True 时逐行返回
+                per_token = kwargs.get("per_token", False)
+                async for lines in iter_line_batches(response):
+                    pieces = []
+                    done = False
+                    for line in lines:
+                        try:
+                            data = orjson.loads(line)
+                        except orjson.JSONDecodeError:
+                            continue
                         if content := data.get("response"):
-                            yield content
+                            pieces.append(content)
                         if data.get("done"):
+                            done = True
                             break
-                    except json.JSONDecodeError:
-                        continue
-                            
-        except httpx.ConnectError as e:
+                    
+                    for piece in merge_pieces(pieces, per_token):
+                        yield piece
+                    if done:
+                        break
+            
+        except aiohttp.ClientConnectionError as e:
             raise LLMConnectionError(f"Failed to connect to Ollama: {e}")
     
     async def structured_output(
@@ -153,31 +171,18 @@ class OllamaLLM(BaseLLM):
         **kwargs
     ) -> T:
         """生成结构化输出"""
-        schema_json = schema.model_json_schema()
-        enhanced_system = f"""你必须以 JSON 格式响应，严格遵循以下 schema:
-{json.dumps(schema_json, ensure_ascii=False, indent=2)}
-
-只输出 JSON，不要输出其他内容。
-
-{system_prompt or ''}"""
-        
+        kwargs.setdefault("temperature", 0)  # 结构化输出使用低温度
         response = await self.generate(
             prompt=prompt,
-            system_prompt=enhanced_system,
-            temperature=0,
+            system_prompt=schema_system_prompt(schema, system_prompt, _JSON_ONLY),
+            response_format={"type": "json_object"},
             **kwargs
         )
         
+        # JSON 模式下响应即为 JSON 文本，直接校验
         try:
-            content = response.content
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0]
-            
-            data = json.loads(content.strip())
-            return schema.model_validate(data)
-        except (json.JSONDecodeError, ValueError) as e:
+            return schema.model_validate_json(response.content)
+        except ValueError as e:
             raise LLMResponseError(f"Failed to parse structured output: {e}")
     
     async def embed(self, text: str | list[str]) -> list[list[float]]:
@@ -185,28 +190,29 @@ class OllamaLLM(BaseLLM):
         if isinstance(text, str):
             text = [text]
         
-        try:
-            embeddings = []
-            for t in text:
-                response = await self.client.post(
-                    "/api/embeddings",
+        # /api/embeddings 每次只接受一条文本: 并发发出请求，消除逐条往返的等待；
+        # 信号量限制同时在途的请求数 (Ollama 服务端仍按模型排队执行)
+        semaphore = asyncio.Semaphore(self.extra_kwargs.get("embed_concurrency", 8))
+        
+        async def embed_one(t: str) -> list[float]:
+            async with semaphore:
+                async with self._semaphore, self.client.post(
+                    self._url("/api/embeddings"),
                     json={
                         "model": self.model,
                         "prompt": t,
                     },
-                )
-                response.raise_for_status()
-                data = response.json()
-                embeddings.append(data["embedding"])
-            
-            return embeddings
+                ) as response:
+                    response.raise_for_status()
+                    data = await read_json(response)
+            return data["embedding"]
+        
+        async def fetch(texts: list[str]) -> list[list[float]]:
+            return list(await asyncio.gather(*(embed_one(t) for t in texts)))
+        
+        try:
+            return await self._embed_deduplicated(text, fetch)
             
-        except httpx.ConnectError as e:
+        except aiohttp.ClientConnectionError as e:
             raise LLMConnectionError(f"Failed to connect to Ollama: {e}")
-    
-    async def close(self):
-        """关闭客户端连接"""
-        if self._client:
-            await self._client.aclose()
-            self._client = None
 
@@ -6,12 +6,11 @@ OpenAI API 的 LLM 实现，支持:
 - text-embedding-3-small / text-embedding-3-large
 """
 
-import json
 from typing import Any, AsyncIterator, TypeVar
 
-import httpx
+import aiohttp
+import orjson
 from pydantic import BaseModel
-from tenacity import retry, stop_after_attempt, wait_exponential
 
 from ..base import (
     BaseLLM,
@@ -19,12 +18,24 @@ from ..base import (
     LLMRateLimitError,
     LLMResponse,
     LLMResponseError,
+    LLMServerError,
+    llm_retry,
+    normalize_usage,
+    schema_system_prompt,
+)
+from .http import (
+    SessionMixin,
+    decode_embeddings,
+    encode_body,
+    iter_line_batches,
+    merge_pieces,
+    read_json,
 )
 
 T = TypeVar("T", bound=BaseModel)
 
 
-class OpenAILLM(BaseLLM):
+class OpenAILLM(SessionMixin, BaseLLM):
     """OpenAI LLM 实现"""
     
     def __init__(
@@ -44,20 +55,6 @@ class OpenAILLM(BaseLLM):
             max_tokens=max_tokens,
             **kwargs
         )
-        self._client: httpx.AsyncClient | None = None
-    
-    @property
-    def client(self) -> httpx.AsyncClient:
-        if self._client is None:
-            self._client = httpx.AsyncClient(
-                base_url=self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                timeout=60.0,
-            )
-        return self._client
     
     def _build_messages(
         self,
@@ -71,11 +68,7 @@ class OpenAILLM(BaseLLM):
         messages.append({"role": "user", "content": prompt})
         return messages
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        reraise=True,
-    )
+    @llm_retry
     async def generate(
         self,
         prompt: str,
@@ -84,33 +77,44 @@ class OpenAILLM(BaseLLM):
     ) -> LLMResponse:
         """生成文本响应"""
         try:
-            response = await self.client.post(
-                "/chat/completions",
-                json={
-                    "model": self.model,
-                    "messages": self._build_messages(prompt, system_prompt),
-                    "temperature": kwargs.get("temperature", self.temperature),
-                    "max_tokens": kwargs.get("max_tokens", self.max_tokens),
-                },
-            )
+            payload = {
+                "model": self.model,
+                "messages": self._build_messages(prompt, system_prompt),
+                "temperature": kwargs.get("temperature", self.temperature),
+                "max_tokens": kwargs.get("max_tokens", self.max_tokens),
+            }
+            # JSON 模式 (structured_output 使用)
+            if response_format := kwargs.get("response_format"):
+                payload["response_format"] = response_format
+            # 同一会话使用固定的缓存键，使请求路由到同一缓存
+            if prompt_cache_key := kwargs.get("prompt_cache_key"):
+                payload["prompt_cache_key"] = prompt_cache_key
             
-            if response.status_code == 429:
-                raise LLMRateLimitError("Rate limit exceeded")
+            body, headers = encode_body(payload, self.extra_kwargs.get("request_compression", False))
+            async with self._semaphore, self.client.post(
+                self._url("/chat/completions"), data=body, headers=headers
+            ) as response:
+                if response.status == 429:
+                    raise LLMRateLimitError("Rate limit exceeded")
+                
+                response.raise_for_status()
+                data = await read_json(response)
             
-            response.raise_for_status()
-            data = response.json()
+            usage = normalize_usage(data.get("usage"))
+            self._track_prompt_cache(usage, kwargs)
             
             return LLMResponse(
                 content=data["choices"][0]["message"]["content"],
                 model=data["model"],
-                usage=data.get("usage"),
-                raw_response=data,
+                usage=usage,
+                raw_response=self._raw_response(data, kwargs),
             )
             
-        except httpx.ConnectError as e:
+        except aiohttp.ClientConnectionError as e:
             raise LLMConnectionError(f"Failed to connect to OpenAI: {e}")
-        except httpx.HTTPStatusError as e:
-            raise LLMResponseError(f"HTTP error: {e}")
+        except aiohttp.ClientResponseError as e:
+            error_cls = LLMServerError if e.status >= 500 else LLMResponseError
+            raise error_cls(f"HTTP error: {e}")
     
     async def generate_stream(
         self,
@@ -120,9 +124,8 @@ class OpenAILLM(BaseLLM):
     ) -> AsyncIterator[str]:
         """流式生成文本"""
         try:
-            async with self.client.stream(
-                "POST",
-                "/chat/completions",
+            async with self._semaphore, self.client.post(
+                self._url("/chat/completions"),
                 json={
                     "model": self.model,
                     "messages": self._build_messages(prompt, system_prompt),
@@ -132,19 +135,34 @@ class OpenAILLM(BaseLLM):
                 },
             ) as response:
                 response.raise_for_status()
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
+                # 每次网络读取中的多个 SSE 事件合并为一个片段返回，减少 yield 次数；
+                # per_token=True 时逐个事件返回
+                per_token = kwargs.get("per_token", False)
+                async for lines in iter_line_batches(response):
+                    pieces = []
+                    done = False
+                    for line in lines:
+                        # SSE 行按字节处理，orjson 直接解析
+                        line = line.strip()
+                        if not line.startswith(b"data: "):
+                            continue
                         data = line[6:]
-                        if data == "[DONE]":
+                        if data == b"[DONE]":
+                            done = True
                             break
                         try:
-                            chunk = json.loads(data)
-                            if content := chunk["choices"][0]["delta"].get("content"):
-                                yield content
-                        except json.JSONDecodeError:
+                            chunk = orjson.loads(data)
+                        except orjson.JSONDecodeError:
                             continue
-                            
-        except httpx.ConnectError as e:
+                        if content := chunk["choices"][0]["delta"].get("content"):
+                            pieces.append(content)
+                    
+                    for piece in merge_pieces(pieces, per_token):
+                        yield piece
+                    if done:
+                        break
+            
+        except aiohttp.ClientConnectionError as e:
             raise LLMConnectionError(f"Failed to connect to OpenAI: {e}")
     
     async def structured_output(
@@ -155,32 +173,18 @@ class OpenAILLM(BaseLLM):
         **kwargs
     ) -> T:
         """生成结构化输出"""
-        # 构建包含 JSON schema 的提示
-        schema_json = schema.model_json_schema()
-        enhanced_system = f"""你必须以 JSON 格式响应，严格遵循以下 schema:
-{json.dumps(schema_json, ensure_ascii=False, indent=2)}
-
-{system_prompt or ''}"""
-        
+        kwargs.setdefault("temperature", 0)  # 结构化输出使用低温度
         response = await self.generate(
             prompt=prompt,
-            system_prompt=enhanced_system,
-            temperature=0,  # 结构化输出使用低温度
+            system_prompt=schema_system_prompt(schema, system_prompt),
+            response_format={"type": "json_object"},
             **kwargs
         )
         
-        # 解析 JSON 响应
+        # JSON 模式下响应即为 JSON 文本，直接校验
         try:
-            # 尝试提取 JSON 内容
-            content = response.content
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0]
-            
-            data = json.loads(content.strip())
-            return schema.model_validate(data)
-        except (json.JSONDecodeError, ValueError) as e:
+            return schema.model_validate_json(response.content)
+        except ValueError as e:
             raise LLMResponseError(f"Failed to parse structured output: {e}")
     
     async def embed(self, text: str | list[str]) -> list[list[float]]:
@@ -188,25 +192,23 @@ class OpenAILLM(BaseLLM):
         if isinstance(text, str):
             text = [text]
         
-        try:
-            response = await self.client.post(
-                "/embeddings",
+        async def fetch(batch: list[str]) -> list[list[float]]:
+            async with self._semaphore, self.client.post(
+                self._url("/embeddings"),
                 json={
                     "model": self.model if "embedding" in self.model else "text-embedding-3-small",
-                    "input": text,
+                    "input": batch,
+                    # base64 响应体约为浮点数组的一半，且免去逐个解析 JSON 浮点数
+                    "encoding_format": "base64",
                 },
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            return [item["embedding"] for item in data["data"]]
+            ) as response:
+                response.raise_for_status()
+                data = await read_json(response)
+            return decode_embeddings(data["data"]).tolist()
+        
+        try:
+            return await self._embed_deduplicated(text, fetch)
             
-        except httpx.ConnectError as e:
+        except aiohttp.ClientConnectionError as e:
             raise LLMConnectionError(f"Failed to connect to OpenAI: {e}")
-    
-    async def close(self):
-        """关闭客户端连接"""
-        if self._client:
-            await self._client.aclose()
-            self._client = None
 
@@ -7,12 +7,13 @@
 - text-embedding-v2
 """
 
-import json
+import asyncio
 from typing import Any, AsyncIterator, TypeVar
 
-import httpx
+import aiohttp
+import numpy as np
+import orjson
 from pydantic import BaseModel
-from tenacity import retry, stop_after_attempt, wait_exponential
 
 from ..base import (
     BaseLLM,
@@ -20,12 +21,27 @@ from ..base import (
     LLMRateLimitError,
     LLMResponse,
     LLMResponseError,
+    LLMServerError,
+    llm_retry,
+    normalize_usage,
+    schema_system_prompt,
+)
+from .http import (
+    SessionMixin,
+    decode_embeddings,
+    encode_body,
+    iter_line_batches,
+    merge_pieces,
+    read_json,
 )
 
 T = TypeVar("T", bound=BaseModel)
 
+# text-embedding-v2 单次请求的文本条数上限
+EMBED_BATCH_SIZE = 25
+
 
-class QwenLLM(BaseLLM):
+class QwenLLM(SessionMixin, BaseLLM):
     """通义千问 LLM 实现"""
     
     def __init__(
@@ -45,38 +61,35 @@ class QwenLLM(BaseLLM):
             max_tokens=max_tokens,
             **kwargs
         )
-        self._client: httpx.AsyncClient | None = None
-    
-    @property
-    def client(self) -> httpx.AsyncClient:
-        if self._client is None:
-            self._client = httpx.AsyncClient(
-                base_url=self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                timeout=60.0,
-            )
-        return self._client
     
     def _build_messages(
         self,
         prompt: str,
-        system_prompt: str | None = None
-    ) -> list[dict[str, str]]:
-        """构建消息列表"""
+        system_prompt: str | None = None,
+        cache_system_prompt: bool = False,
+    ) -> list[dict[str, Any]]:
+        """构建消息列表
+        
+        cache_system_prompt 为 True 时，将系统提示词标记为 DashScope 显式缓存块，
+        跨请求复用相同前缀。
+        """
         messages = []
         if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
+            if cache_system_prompt:
+                messages.append({
+                    "role": "system",
+                    "content": [{
+                        "type": "text",
+                        "text": system_prompt,
+                        "cache_control": {"type": "ephemeral"},
+                    }],
+                })
+            else:
+                messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
         return messages
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        reraise=True,
-    )
+    @llm_retry
     async def generate(
         self,
         prompt: str,
@@ -85,33 +98,45 @@ class QwenLLM(BaseLLM):
     ) -> LLMResponse:
         """生成文本响应"""
         try:
-            response = await self.client.post(
-                "/chat/completions",
-                json={
-                    "model": self.model,
-                    "messages": self._build_messages(prompt, system_prompt),
-                    "temperature": kwargs.get("temperature", self.temperature),
-                    "max_tokens": kwargs.get("max_tokens", self.max_tokens),
-                },
-            )
+            payload = {
+                "model": self.model,
+                "messages": self._build_messages(
+                    prompt,
+                    system_prompt,
+                    kwargs.get("cache_system_prompt", False),
+                ),
+                "temperature": kwargs.get("temperature", self.temperature),
+                "max_tokens": kwargs.get("max_tokens", self.max_tokens),
+            }
+            # JSON 模式 (structured_output 使用)
+            if response_format := kwargs.get("response_format"):
+                payload["response_format"] = response_format
             
-            if response.status_code == 429:
-                raise LLMRateLimitError("Rate limit exceeded")
+            body, headers = encode_body(payload, self.extra_kwargs.get("request_compression", False))
+            async with self._semaphore, self.client.post(
+                self._url("/chat/completions"), data=body, headers=headers
+            ) as response:
+                if response.status == 429:
+                    raise LLMRateLimitError("Rate limit exceeded")
+                
+                response.raise_for_status()
+                data = await read_json(response)
             
-            response.raise_for_status()
-            data = response.json()
+            usage = normalize_usage(data.get("usage"))
+            self._track_prompt_cache(usage, kwargs)
             
             return LLMResponse(
                 content=data["choices"][0]["message"]["content"],
                 model=data["model"],
-                usage=data.get("usage"),
-                raw_response=data,
+                usage=usage,
+                raw_response=self._raw_response(data, kwargs),
             )
             
-        except httpx.ConnectError as e:
+        except aiohttp.ClientConnectionError as e:
             raise LLMConnectionError(f"Failed to connect to Qwen: {e}")
-        except httpx.HTTPStatusError as e:
-            raise LLMResponseError(f"HTTP error: {e}")
+        except aiohttp.ClientResponseError as e:
+            error_cls = LLMServerError if e.status >= 500 else LLMResponseError
+            raise error_cls(f"HTTP error: {e}")
     
     async def generate_stream(
         self,
@@ -121,31 +146,49 @@ class QwenLLM(BaseLLM):
     ) -> AsyncIterator[str]:
         """流式生成文本"""
         try:
-            async with self.client.stream(
-                "POST",
-                "/chat/completions",
+            async with self._semaphore, self.client.post(
+                self._url("/chat/completions"),
                 json={
                     "model": self.model,
-                    "messages": self._build_messages(prompt, system_prompt),
+                    "messages": self._build_messages(
+                        prompt,
+                        system_prompt,
+                        kwargs.get("cache_system_prompt", False),
+                    ),
                     "temperature": kwargs.get("temperature", self.temperature),
                     "max_tokens": kwargs.get("max_tokens", self.max_tokens),
                     "stream": True,
                 },
             ) as response:
                 response.raise_for_status()
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
+                # 每次网络读取中的多个 SSE 事件合并为一个片段返回，减少 yield 次数；
+                # per_token=True 时逐个事件返回
+                per_token = kwargs.get("per_token", False)
+                async for lines in iter_line_batches(response):
+                    pieces = []
+                    done = False
+                    for line in lines:
+                        # SSE 行按字节处理，orjson 直接解析
+                        line = line.strip()
+                        if not line.startswith(b"data: "):
+                            continue
                         data = line[6:]
-                        if data == "[DONE]":
+                        if data == b"[DONE]":
+                            done = True
                             break
                         try:
-                            chunk = json.loads(data)
-                            if content := chunk["choices"][0]["delta"].get("content"):
-                                yield content
-                        except json.JSONDecodeError:
+                            chunk = orjson.loads(data)
+                        except orjson.JSONDecodeError:
                             continue
-                            
-        except httpx.ConnectError as e:
+                        if content := chunk["choices"][0]["delta"].get("content"):
+                            pieces.append(content)
+                    
+                    for piece in merge_pieces(pieces, per_token):
+                        yield piece
+                    if done:
+                        break
+            
+        except aiohttp.ClientConnectionError as e:
             raise LLMConnectionError(f"Failed to connect to Qwen: {e}")
     
     async def structured_output(
@@ -156,29 +199,18 @@ class QwenLLM(BaseLLM):
         **kwargs
     ) -> T:
         """生成结构化输出"""
-        schema_json = schema.model_json_schema()
-        enhanced_system = f"""你必须以 JSON 格式响应，严格遵循以下 schema:
-{json.dumps(schema_json, ensure_ascii=False, indent=2)}
-
-{system_prompt or ''}"""
-        
+        kwargs.setdefault("temperature", 0)  # 结构化输出使用低温度
         response = await self.generate(
             prompt=prompt,
-            system_prompt=enhanced_system,
-            temperature=0,
+            system_prompt=schema_system_prompt(schema, system_prompt),
+            response_format={"type": "json_object"},
             **kwargs
         )
         
+        # JSON 模式下响应即为 JSON 文本，直接校验
         try:
-            content = response.content
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0]
-            
-            data = json.loads(content.strip())
-            return schema.model_validate(data)
-        except (json.JSONDecodeError, ValueError) as e:
+            return schema.model_validate_json(response.content)
+        except ValueError as e:
             raise LLMResponseError(f"Failed to parse structured output: {e}")
     
     async def embed(self, text: str | list[str]) -> list[list[float]]:
@@ -186,25 +218,30 @@ class QwenLLM(BaseLLM):
         if isinstance(text, str):
             text = [text]
         
-        try:
-            response = await self.client.post(
-                "/embeddings",
+        async def embed_batch(batch: list[str]) -> np.ndarray:
+            async with self._semaphore, self.client.post(
+                self._url("/embeddings"),
                 json={
                     "model": "text-embedding-v2",
-                    "input": text,
+                    "input": batch,
                 },
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            return [item["embedding"] for item in data["data"]]
+            ) as response:
+                response.raise_for_status()
+                data = await read_json(response)
+            return decode_embeddings(data["data"])
+        
+        async def fetch(texts: list[str]) -> list[list[float]]:
+            # DashScope 单次请求最多 EMBED_BATCH_SIZE 条，超出时分批并发请求
+            batches = [
+                texts[start:start + EMBED_BATCH_SIZE]
+                for start in range(0, len(texts), EMBED_BATCH_SIZE)
+            ]
+            results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+            return np.concatenate(results).tolist()
+        
+        try:
+            return await self._embed_deduplicated(text, fetch)
             
-        except httpx.ConnectError as e:
+        except aiohttp.ClientConnectionError as e:
             raise LLMConnectionError(f"Failed to connect to Qwen: {e}")
-    
-    async def close(self):
-        """关闭客户端连接"""
-        if self._client:
-            await self._client.aclose()
-            self._client = None
 
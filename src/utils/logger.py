@@ -5,6 +5,7 @@
 
 import logging
 import sys
+from functools import cache
 from typing import Any
 
 import structlog
@@ -18,11 +19,13 @@ def setup_logging(log_level: str = "INFO") -> None:
     if _configured:
         return
     
+    level = getattr(logging, log_level.upper())
+    
     # 配置标准日志
     logging.basicConfig(
         format="%(message)s",
         stream=sys.stdout,
-        level=getattr(logging, log_level.upper()),
+        level=level,
     )
     
     # 配置 structlog
@@ -35,9 +38,8 @@ def setup_logging(log_level: str = "INFO") -> None:
             structlog.processors.TimeStamper(fmt="iso"),
             structlog.dev.ConsoleRenderer(colors=True),
         ],
-        wrapper_class=structlog.make_filtering_bound_logger(
-            getattr(logging, log_level.upper())
-        ),
+        # 级别在配置时解析为整数，低于级别的日志方法直接为空操作
+        wrapper_class=structlog.make_filtering_bound_logger(level),
         context_class=dict,
         logger_factory=structlog.PrintLoggerFactory(),
         cache_logger_on_first_use=True,
@@ -46,8 +48,12 @@ def setup_logging(log_level: str = "INFO") -> None:
     _configured = True
 
 
+@cache
 def get_logger(name: str = __name__) -> Any:
-    """获取日志记录器"""
-    setup_logging()
+    """获取日志记录器 (同名记录器只创建一次)"""
     return structlog.get_logger(name)
 
+
+# 导入时完成默认配置，get_logger 无需逐次检查
+setup_logging()
+
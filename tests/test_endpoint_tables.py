@@ -0,0 +1,111 @@
+# 终点数据列式表测试
+"""
+测试 EndpointDataTable 的往返转换与批量分析核函数
+"""
+
+import math
+from datetime import date
+
+import numpy as np
+import pytest
+
+from src.knowledge.models.nodes import EndpointData
+from src.knowledge.models.tables import (
+    EndpointDataTable,
+    compute_censoring_density,
+    compute_tail_effect,
+)
+
+
+@pytest.fixture
+def endpoints():
+    return [
+        EndpointData(
+            trial_id="trial_001",
+            data_cutoff_date=date(2024, 6, 30),
+            mpfs_months=12.345678901,
+            hr_pfs=0.61,
+            hr_pfs_ci_lower=0.5,
+            hr_pfs_ci_upper=0.75,
+            hr_pfs_p_value=0.001,
+            treatment_related_death=3,
+            censoring_density_score=0.7,
+            data_maturity="成熟",
+        ),
+        EndpointData(
+            trial_id="trial_002",
+            hr_os=0.9,
+            hr_os_p_value=0.2,
+        ),
+    ]
+
+
+class TestEndpointDataTable:
+    """终点数据列式表测试"""
+    
+    def test_round_trip(self, endpoints):
+        """测试实例 -> 列式表 -> 行字典无损还原"""
+        table = EndpointDataTable.from_instances(endpoints)
+        rows = list(table.iter_rows())
+        
+        assert len(table) == 2
+        assert table["mpfs_months"].dtype == np.float64
+        for endpoint, row in zip(endpoints, rows):
+            assert EndpointData.model_validate(row) == endpoint
+    
+    def test_row_types(self, endpoints):
+        """测试整数字段、缺失值与非数值字段的还原"""
+        first, second = EndpointDataTable.from_instances(endpoints).iter_rows()
+        
+        assert first["treatment_related_death"] == 3
+        assert isinstance(first["treatment_related_death"], int)
+        assert first["mpfs_months"] == 12.345678901
+        assert first["data_cutoff_date"] == date(2024, 6, 30)
+        assert first["data_maturity"] == "成熟"
+        assert second["treatment_related_death"] is None
+        assert second["data_cutoff_date"] is None
+    
+    def test_masks(self, endpoints):
+        """测试显著性与可疑数据筛选"""
+        table = EndpointDataTable.from_instances(endpoints)
+        
+        assert table.significant_mask().tolist() == [True, False]
+        assert table.suspicious_mask().tolist() == [True, False]
+        assert table.hr_ci_ratio()[0] == pytest.approx(1.5)
+        assert math.isnan(table.hr_ci_ratio()[1])
+
+
+class TestKernels:
+    """批量分析核函数测试"""
+    
+    def test_tail_effect(self):
+        """测试拖尾效应强度"""
+        rates = np.array([
+            [80, 60, 55, 50, 45],  # 后期每月下降 0.417，前期 1.667
+            [80, 60, 50, np.nan, np.nan],  # 以 36 个月为最晚里程碑
+            [80, 60, np.nan, np.nan, np.nan],  # 缺少 24 个月之后的数据
+            [60, 60, 50, 40, 30],  # 前期无下降
+        ])
+        
+        strength = compute_tail_effect(rates)
+        
+        assert strength[0] == pytest.approx(0.75)
+        assert strength[1] == pytest.approx(1 - (10 / 12) / (20 / 12))
+        assert np.isnan(strength[2:]).all()
+    
+    def test_censoring_density(self):
+        """测试删失点密集度"""
+        at_risk = np.array([
+            [100, 80, 50],
+            [100, 100, 100],
+        ])
+        events = np.array([
+            [10, 10],
+            [0, 0],
+        ])
+        
+        density = compute_censoring_density(at_risk, events)
+        
+        # 离开风险集 50 人，其中 20 人为事件、30 人为删失
+        assert density[0] == pytest.approx(0.6)
+        assert np.isnan(density[1])
@@ -56,6 +56,31 @@ class TestDrugModel:
         assert props["name"] == "Trastuzumab"
         assert props["molecule_type"] == "单抗"
         assert props["loe_date"] == "2025-12-31"
+    
+    @pytest.mark.parametrize(
+        "molecule_type,expected",
+        [
+            (MoleculeType.ADC, "ADC"),
+            (MoleculeType.MONOCLONAL, "单抗"),
+            (MoleculeType.BISPECIFIC, "双抗"),
+            (MoleculeType.SMALL_MOLECULE, "小分子"),
+            (MoleculeType.CAR_T, "CAR-T"),
+            (MoleculeType.MRNA, "mRNA"),
+            (MoleculeType.GENE_THERAPY, "基因疗法"),
+            (MoleculeType.CELL_THERAPY, "细胞疗法"),
+            (MoleculeType.OTHER, "其他"),
+        ],
+    )
+    def test_molecule_type_to_neo4j(self, molecule_type, expected):
+        """测试各分子类型写入 Neo4j 的取值"""
+        drug = Drug(
+            name="Test Drug",
+            molecule_type=molecule_type,
+            target="PD-1",
+            moa="测试",
+        )
+        
+        assert drug.to_neo4j_properties()["molecule_type"] == expected
 
 
 class TestCompanyModel:
@@ -109,6 +134,14 @@ class TestTrialModel:
         assert trial.nct_id == "NCT12345678"
         assert trial.design == TrialDesign.DOUBLE_BLIND
         assert trial.phase == TrialPhase.PHASE_3
+    
+    def test_unwind_cypher_merge_key(self):
+        """测试批量写入按自然键 MERGE，命中时保留原 id"""
+        query = Trial.unwind_cypher()
+        
+        assert "MERGE (n:Trial {nct_id: row.nct_id})" in query
+        assert "id: n.id" in query
+        assert "MERGE (n:EndpointData {id: row.id})" in EndpointData.unwind_cypher()
 
 
 class TestEndpointDataModel:
@@ -0,0 +1,48 @@
+# 工作流路由测试
+"""
+测试工作流 API 路由
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.routes import workflow
+from src.graph.nodes import extractor
+
+
+class StubLLM:
+    """返回固定提取结果的 LLM 桩"""
+    
+    async def structured_output(self, prompt, schema, system_prompt=None, **kwargs):
+        return schema(
+            entities={
+                "Drug": [{"name": "Pembrolizumab", "target": "PD-1", "confidence": 0.9}],
+            }
+        )
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(extractor, "get_llm", lambda llm_type: StubLLM())
+    app = FastAPI()
+    app.include_router(workflow.router, prefix="/api/v1/workflow")
+    return TestClient(app)
+
+
+class TestExtractRoute:
+    """数据提取路由测试"""
+    
+    def test_extract_entities(self, client):
+        """测试直接调用提取节点"""
+        response = client.post(
+            "/api/v1/workflow/extract",
+            json={"text": "Pembrolizumab 是一种 PD-1 抑制剂", "target_entities": ["Drug"]},
+        )
+        
+        assert response.status_code == 200
+        body = response.json()
+        assert body["count"] == 1
+        assert body["entities"][0]["entity_type"] == "Drug"
+        assert body["entities"][0]["data"]["name"] == "Pembrolizumab"
+        assert body["entities"][0]["confidence"] == 0.9